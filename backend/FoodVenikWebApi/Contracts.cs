@@ -10,5 +10,10 @@ public record ChatMessage(string Text, JsonElement Profile);
 //    This is the data that gets sent to RabbitMQ for the agent.
 public record AgentJobPayload(string JobId, string UserId, string NewMessage, JsonElement UserProfile);
 
-// This record is for the agent's response and does not need to be changed.
-public record AgentResponse(string UserId, string Message);
\ No newline at end of file
+// This record is for the agent's response. JobId lets the client replace the text it streamed for that job;
+// older agents leave it out.
+public record AgentResponse(string UserId, string Message, string? JobId = null);
+
+// A partial answer streamed by the agent. Chunks of one answer share the JobId and arrive in Sequence order;
+// the complete answer is still sent as an AgentResponse afterwards.
+public record AgentResponseChunk(string UserId, string JobId, int Sequence, string Delta, bool Done);
\ No newline at end of file
@@ -66,7 +66,24 @@ app.MapPost("/chat", async (ChatMessage message, IPublishEndpoint publishEndpoin
 app.MapPost("/internal/agent-response",
     async (AgentResponse response, IHubContext<ChatHub> hubContext) =>
 {
-    await hubContext.Clients.All.SendAsync("ReceiveMessage", response.Message);
+    await hubContext.Clients.All.SendAsync("ReceiveMessage", response.Message, response.JobId);
+    return Results.Ok();
+});
+
+app.MapPost("/internal/agent-responses",
+    async (AgentResponse[] responses, IHubContext<ChatHub> hubContext) =>
+{
+    foreach (var response in responses)
+    {
+        await hubContext.Clients.All.SendAsync("ReceiveMessage", response.Message, response.JobId);
+    }
+    return Results.Ok();
+});
+
+app.MapPost("/internal/agent-response-chunk",
+    async (AgentResponseChunk chunk, IHubContext<ChatHub> hubContext) =>
+{
+    await hubContext.Clients.All.SendAsync("ReceiveMessageChunk", chunk.JobId, chunk.Sequence, chunk.Delta, chunk.Done);
     return Results.Ok();
 });
 
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import time
+import httpx
+
+# --- Configuration ---
+# Jobs collected into one batch (0 handles every message on its own) and how long to wait for more
+BATCH_SIZE = int(os.getenv("AGENT_BATCH_SIZE", "0"))
+BATCH_WINDOW = float(os.getenv("AGENT_BATCH_WINDOW", "0.05"))
+BACKEND_BULK_URL = os.getenv("BACKEND_BULK_URL", 'https://localhost:7160/internal/agent-responses')
+
+
+class BatchScheduler:
+    """
+    Groups incoming jobs into micro-batches for an AgentWorker.
+
+    A batch is started once `max_batch` messages are waiting or `window`
+    seconds after its first message arrived. Its LLM calls run concurrently,
+    bounded by the worker's concurrency and sharing its HTTP pool; the answers
+    are then posted in one request to `bulk_url` and every message is acked on
+    its own. If the bulk post fails, answers are delivered one by one so a
+    single bad response cannot requeue the whole batch.
+
+    Args:
+        worker: AgentWorker doing the parsing, generation and delivery.
+        max_batch: Most messages in one batch; RabbitMQ prefetch must be at least this.
+        window: Seconds to wait for a batch to fill up.
+        bulk_url: Endpoint receiving a list of {"userId", "jobId", "message"}; None posts each answer separately.
+    """
+
+    def __init__(self, worker, max_batch=BATCH_SIZE, window=BATCH_WINDOW, bulk_url=BACKEND_BULK_URL):
+        self.worker = worker
+        self.max_batch = max_batch
+        self.window = window
+        self.bulk_url = bulk_url
+        self.batch_sizes = []
+        self.bulk_posts = 0
+        self._pending = []
+
+    async def submit(self, message):
+        """Consumer callback: the submitter that fills or times out a batch runs it."""
+        batch = self._pending
+        batch.append((message, time.perf_counter()))
+        if len(batch) >= self.max_batch:
+            self._pending = []
+            await self.run(batch)
+        elif len(batch) == 1:
+            await asyncio.sleep(self.window)
+            if self._pending is batch:
+                self._pending = []
+                await self.run(batch)
+
+    async def _generate(self, payload):
+        async with self.worker.semaphore:
+            return await self.worker.generate(payload)
+
+    async def run(self, batch):
+        self.batch_sizes.append(len(batch))
+        jobs = []
+        for message, started in batch:
+            payload = await self.worker.parse(message)
+            if payload is not None:
+                jobs.append((message, started, payload))
+        if not jobs:
+            return
+
+        responses = await asyncio.gather(*(self._generate(payload) for _, _, payload in jobs))
+
+        if self.bulk_url is not None and len(jobs) > 1:
+            try:
+                resp = await self.worker.http.post(self.bulk_url, json=responses)
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f" [!] Bulk delivery of {len(jobs)} responses failed, posting them one by one: {e}")
+            else:
+                self.bulk_posts += 1
+                for (message, started, _), response_data in zip(jobs, responses):
+                    await self.worker.ack(message, response_data, started)
+                return
+
+        await asyncio.gather(*(self.worker.settle(message, response_data, started)
+                               for (message, started, _), response_data in zip(jobs, responses)))
@@ -0,0 +1,140 @@
+import os
+import re
+from prompt_builder import count_tokens
+
+try:
+    from shared.catalog_index import CatalogIndex, normalize_text
+except ImportError:  # the agent runs without the repository's shared package too, just ungrounded
+    CatalogIndex = None
+    normalize_text = str.lower
+
+# --- Configuration ---
+# Directory written by the ETL (html_parser.py --catalog-index); unset: answers are not grounded
+CATALOG_INDEX_PATH = os.getenv("AGENT_CATALOG_INDEX")
+PRODUCT_LIMIT = int(os.getenv("AGENT_PRODUCT_LIMIT", "8"))
+PRODUCT_TOKEN_BUDGET = int(os.getenv("AGENT_PRODUCT_TOKEN_BUDGET", "250"))
+
+# Per 100 g, roughly the thresholds of EU nutrition claims
+HIGH_PROTEIN = 10.0
+LOW_SUGAR = 5.0
+LOW_FAT = 3.0
+LOW_KCAL = 100.0
+
+# Words in a question or dossier allergy -> allergen tags in the index. Nut
+# allergies exclude peanuts as well, they are usually meant together.
+ALLERGY_WORDS = [
+    (re.compile(r"pinda|peanut"), ("peanuts",)),
+    (re.compile(r"noot|noten|\bnuts?\b|nut-free|notenvrij"), ("nuts", "peanuts")),
+    (re.compile(r"gluten|tarwe|wheat|coeliak|celiac"), ("gluten",)),
+    (re.compile(r"lactose|zuivel|dairy|melk|milk"), ("milk",)),
+    (re.compile(r"\bei\b|eieren|\beggs?\b"), ("egg",)),
+    (re.compile(r"soja|\bsoy"), ("soy",)),
+    (re.compile(r"schaaldier|shellfish|garnal|shrimp|kreeft"), ("shellfish",)),
+    (re.compile(r"\bvis\b|\bfish\b"), ("fish",)),
+    (re.compile(r"sesam"), ("sesame",)),
+    (re.compile(r"selderij|celery"), ("celery",)),
+    (re.compile(r"mosterd|mustard"), ("mustard",)),
+    (re.compile(r"lupine|lupin"), ("lupin",)),
+    (re.compile(r"sulfiet|sulphite|sulfite"), ("sulphite",)),
+]
+_WITHOUT = re.compile(r"\b(?:zonder|without|geen|no|free of|vrij van)\s+([\w-]+)|\b(\w+?)[- ]?(?:free|vrij)\b")
+# "allergic to nuts", "allergisch voor noten", "nut allergy", "notenallergie", "lactose intolerant"
+_ALLERGIC = re.compile(r"\b(?:allergic to|allergisch (?:voor|aan)|allergie voor|intolerant (?:to|voor))\s+([^,.;!?]+)"
+                       r"|\b([\w-]+?)[- ]?(?:allergie|allergy|allergies|intolerantie|intolerance|intolerant)\b")
+# A price cap needs a currency next to the number: "under 200 kcal" or
+# "max 5 g sugar" are nutrition limits, not prices
+_AMOUNT = r"(\d+(?:[.,]\d+)?)"
+_MAX_PRICE = re.compile(r"(?:under|below|less than|max(?:imaal)?|onder|minder dan|tot|goedkoper dan|cheaper than|<)"
+                        rf"\s*(?:de\s+)?(?:(?:€|\beur\b|\beuro\b)\s*{_AMOUNT}|{_AMOUNT}\s*(?:€|euro\b|eur\b))")
+# (pattern, column, (low, high)) for the nutrition wishes people actually type
+NUTRITION_WISHES = [
+    (re.compile(r"high[- ]protein|protein[- ]rich|eiwitrijk|veel eiwit|rijk aan eiwit"), "protein",
+     (HIGH_PROTEIN, None)),
+    (re.compile(r"low[- ]sugar|sugar[- ]free|suikerarm|suikervrij|weinig suiker|minder suiker"), "sugar",
+     (None, LOW_SUGAR)),
+    (re.compile(r"low[- ]fat|vetarm|weinig vet|mager"), "fat", (None, LOW_FAT)),
+    (re.compile(r"low[- ]cal|calorie[- ]?arm|caloriearm|weinig calorie|light\b"), "kcal", (None, LOW_KCAL)),
+]
+_SORT_FOR = {"protein": "-protein", "sugar": "sugar", "fat": "fat", "kcal": "kcal"}
+
+_index = None
+
+
+def open_index(path=CATALOG_INDEX_PATH):
+    """The shared index, opened once per process; None when not configured."""
+    global _index
+    if not path or CatalogIndex is None:
+        return None
+    if _index is None:
+        try:
+            _index = CatalogIndex(path)
+        except FileNotFoundError:
+            print(f" [⚠️] No catalog index at {path} yet, answers are not grounded")
+            return None
+    else:
+        _index.reload_if_changed()
+    return _index
+
+
+def allergen_tags(text):
+    text = normalize_text(text)
+    return {tag for pattern, tags in ALLERGY_WORDS if pattern.search(text) for tag in tags}
+
+
+def question_filters(question, profile=None):
+    """
+    Turn a question such as "high protein under €3 without nuts" into
+    keyword arguments for CatalogIndex.search. Allergies from the dossier
+    are always excluded, whether or not the question mentions them, and so
+    are allergies the question states ("I have a nut allergy").
+    """
+    text = normalize_text(question)
+    ranges = {}
+    sort = None
+    for pattern, column, bounds in NUTRITION_WISHES:
+        if pattern.search(text):
+            ranges[column] = bounds
+            sort = sort or _SORT_FOR[column]
+
+    price = _MAX_PRICE.search(text)
+    if price:
+        ranges["price"] = (None, float((price.group(1) or price.group(2)).replace(",", ".")))
+        sort = sort or "price"
+
+    excluded = set()
+    for pattern in (_WITHOUT, _ALLERGIC):
+        for match in pattern.finditer(text):
+            excluded |= allergen_tags(match.group(1) or match.group(2))
+    for allergy in (profile or {}).get("allergies") or []:
+        excluded |= allergen_tags(str(allergy))
+
+    return {"ranges": ranges, "exclude": [f"allergen:{tag}" for tag in sorted(excluded)], "sort": sort}
+
+
+def find_products(index, question, profile=None, limit=PRODUCT_LIMIT):
+    """Catalog products that fit the question and the dossier; none when the question names no filter."""
+    filters = question_filters(question, profile)
+    if not filters["ranges"]:
+        return []
+    return index.search(**filters, limit=limit)
+
+
+def _amount(value, unit):
+    return f"{value:g}{unit}" if value is not None else "?"
+
+
+def format_products(products, token_budget=PRODUCT_TOKEN_BUDGET):
+    """One `name | €price | kcal, protein, sugar, fat per 100 g` line per product, within `token_budget`."""
+    lines = []
+    used = 0
+    for product in products:
+        line = (f"- {product['name']} | €{product['price']:.2f}" if product["price"] is not None
+                else f"- {product['name']} | price unknown")
+        line += (f" | per 100 g: {_amount(product['kcal'], ' kcal')}, protein {_amount(product['protein'], 'g')}, "
+                 f"sugar {_amount(product['sugar'], 'g')}, fat {_amount(product['fat'], 'g')}")
+        cost = count_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
@@ -5,6 +5,9 @@ import time
 from dotenv import load_dotenv
 import openai
 import os
+from prompts import MODEL, FALLBACK_ANSWER, build_messages
+from catalog import find_products, format_products, open_index
+from response_cache import CACHE_PATH, CACHE_TTL_SECONDS, ResponseCache
 
 # Load environment variables from .env file for OPENAI_API_KEY
 load_dotenv()
@@ -16,6 +19,8 @@ BACKEND_RESPONSE_URL = 'https://localhost:7160/internal/agent-response'
 
 # Initialize the OpenAI client
 client = openai.OpenAI()
+# Answers to repeated questions from an unchanged dossier
+cache = ResponseCache(CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS)
 
 
 def generate_food_recommendation(payload):
@@ -31,57 +36,38 @@ def generate_food_recommendation(payload):
     print(f" [✅] Received job for user: {user_id}")
     print(f" [💬] User Query: {user_message}")
 
+    # Answers are cached per index generation, they quote catalog prices
+    index = open_index()
+    generation = index.generation if index is not None else ""
+    cached = cache.get(user_id, user_profile, user_message, context=generation)
+    if cached is not None:
+        print(f" [♻️] Answered from cache. Stats: {cache.stats.as_dict()}")
+        return { "userId": user_id, "message": cached }
+
     try:
-        # --- THIS IS THE NEW LOGIC ---
         # Check if the user profile exists and is not empty
         if user_profile:
             print(f" [👤] User Profile Loaded. Goal: {user_profile.get('summary', {}).get('goal', 'N/A')}")
-            
-            # 1. System Prompt for a PERSONALIZED response
-            system_prompt = """
-            You are an expert nutritionist and encouraging fitness coach. Your role is to provide personalized,
-            practical, and safe food recommendations. You will be given a user's detailed profile as a JSON object
-            and their specific question.
-            **Your Rules:**
-            1.  **Strictly Adhere to the Profile:** All recommendations MUST be based on the user's provided profile.
-            2.  **Safety First:** Explicitly mention and respect all allergies listed.
-            3.  **Keep it Concise:** Provide clear, direct answers.
-            """
-
-            # 2. User Prompt with the full profile context
-            user_prompt = f"""
-            Here is the user's profile:
-            ```json
-            {json.dumps(user_profile, indent=2)}
-            ```
-            Based strictly on the profile above, please answer the following question: "{user_message}"
-            """
         else:
             # Fallback logic if the profile is missing
             print(" [⚠️] User profile is missing. Providing a generic response.")
-            
-            # 1. System Prompt for a GENERIC response
-            system_prompt = """
-            You are a helpful nutritionist and food assistant. Answer the user's question about food or recipes
-            in a general, helpful way. The user's specific profile was not available.
-            """
-            
-            # 2. User Prompt is just their direct question
-            user_prompt = user_message
-        
-        # 3. Call the OpenAI API with the chosen prompts
+
+        # Ground the answer in the catalog index the ETL keeps up to date
+        products = ""
+        if index is not None:
+            products = format_products(find_products(index, user_message, user_profile))
+
+        # Call the OpenAI API with the chosen prompts
         completion = client.chat.completions.create(
-          model="gpt-4-turbo-preview",
-          messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-          ]
+          model=MODEL,
+          messages=build_messages(user_message, user_profile, products=products)
         )
         agent_answer = completion.choices[0].message.content
+        cache.put(user_id, user_profile, user_message, agent_answer, context=generation)
 
     except Exception as e:
         print(f" [!] Error calling OpenAI API: {e}")
-        agent_answer = "Sorry, my AI brain is a bit scrambled right now. Please try again."
+        agent_answer = FALLBACK_ANSWER
 
     return { "userId": user_id, "message": agent_answer }
 
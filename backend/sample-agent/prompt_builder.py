@@ -0,0 +1,92 @@
+import math
+import os
+import re
+
+try:
+    import tiktoken
+except ImportError:  # the heuristic counter is close enough for budgeting
+    tiktoken = None
+
+# --- Configuration ---
+# Upper bound for the serialized dossier; allergies are always included
+PROFILE_TOKEN_BUDGET = int(os.getenv("AGENT_PROFILE_TOKEN_BUDGET", "300"))
+
+# Dossier sections in the order they are written and, when over budget, kept
+SECTION_ORDER = ("allergies", "food", "summary", "goals", "preferences")
+# Fields that never help answer a food question
+SKIP_FIELDS = {"summary.avatar", "summary.name"}
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+_encoding = None
+
+
+def count_tokens(text):
+    """
+    Prompt tokens of `text`: exact with tiktoken installed, otherwise an
+    estimate of one token per punctuation mark and per four word characters.
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECES.findall(text))
+
+
+def _fields(value, path=""):
+    """Yield (path, text) for every field worth sending; false flags and empty values are dropped."""
+    if isinstance(value, dict):
+        if value and all(isinstance(flag, bool) for flag in value.values()):
+            # Boolean maps like equipment or cookingMethods become the list of enabled options
+            enabled = [name for name, flag in value.items() if flag]
+            if enabled:
+                yield path, ", ".join(enabled)
+            return
+        for name, child in value.items():
+            yield from _fields(child, f"{path}.{name}" if path else name)
+    elif isinstance(value, list):
+        items = [str(item) for item in value if item not in (None, "")]
+        if items:
+            yield path, ", ".join(items)
+    elif value is not None and value is not False and value != "":
+        yield path, str(value)
+
+
+def _sections(profile):
+    names = [name for name in SECTION_ORDER if name in profile]
+    names += [name for name in profile if name not in SECTION_ORDER]
+    for name in names:
+        fields = [(path, text) for path, text in _fields(profile[name], name) if path not in SKIP_FIELDS]
+        if fields:
+            yield name, fields
+
+
+def compact_profile(profile, token_budget=PROFILE_TOKEN_BUDGET):
+    """
+    Serialize a UserDossier as one `section: key=value; ...` line per section,
+    allergies first. Fields are added in section order and those that no
+    longer fit in `token_budget` are left out; the allergies line is kept
+    whatever its size.
+    """
+    lines = []
+    used = 0
+    for name, fields in _sections(profile):
+        if name == "allergies":
+            line = "allergies: " + "; ".join(text for _, text in fields)
+            lines.append(line)
+            used += count_tokens(line) + 1
+            continue
+
+        parts = []
+        for path, text in fields:
+            key = path.removeprefix(f"{name}.")
+            part = text if key == name else f"{key}={text}"
+            # "section: " costs about 2 tokens, each separator 1
+            cost = count_tokens(part) + (3 if not parts else 1)
+            if used + cost > token_budget:
+                continue
+            parts.append(part)
+            used += cost
+        if parts:
+            lines.append(f"{name}: " + "; ".join(parts))
+    return "\n".join(lines)
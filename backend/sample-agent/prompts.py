@@ -0,0 +1,78 @@
+import json
+import os
+from prompt_builder import PROFILE_TOKEN_BUDGET, compact_profile
+
+MODEL = "gpt-4-turbo-preview"
+FALLBACK_ANSWER = "Sorry, my AI brain is a bit scrambled right now. Please try again."
+# "compact" sends the dossier as terse key=value lines, "json" as the full indented JSON
+PROMPT_FORMAT = os.getenv("AGENT_PROMPT_FORMAT", "compact")
+
+# System prompt for a PERSONALIZED response
+PROFILE_SYSTEM_PROMPT = """
+            You are an expert nutritionist and encouraging fitness coach. Your role is to provide personalized,
+            practical, and safe food recommendations. You will be given a user's detailed profile as a JSON object
+            and their specific question.
+            **Your Rules:**
+            1.  **Strictly Adhere to the Profile:** All recommendations MUST be based on the user's provided profile.
+            2.  **Safety First:** Explicitly mention and respect all allergies listed.
+            3.  **Keep it Concise:** Provide clear, direct answers.
+            """
+
+# System prompt for a PERSONALIZED response with the compact dossier
+COMPACT_PROFILE_SYSTEM_PROMPT = (
+    "You are an expert nutritionist and encouraging fitness coach giving personalized, practical and safe food "
+    "recommendations. You get the user's profile as `section: key=value; ...` lines and their question. "
+    "Equipment and cooking methods list only what the user has or accepts.\n"
+    "Rules:\n"
+    "1. Base all recommendations strictly on the profile.\n"
+    "2. Safety first: explicitly mention and respect every allergy listed.\n"
+    "3. Keep it concise: clear, direct answers."
+)
+
+# Introduces the catalog lookup appended to the user prompt. Allergens in the
+# index are guessed from product names and descriptions, so the model must
+# not present the list as allergen-safe.
+PRODUCTS_HEADER = ("Jumbo products that may fit the question (current price; nutrition per 100 g). "
+                   "Prefer these when recommending products. Allergen filtering of this list is not "
+                   "guaranteed: whenever allergies are involved, tell the user to check the product "
+                   "label before buying:")
+
+# System prompt for a GENERIC response
+GENERIC_SYSTEM_PROMPT = """
+            You are a helpful nutritionist and food assistant. Answer the user's question about food or recipes
+            in a general, helpful way. The user's specific profile was not available.
+            """
+
+
+def build_messages(user_message, user_profile, prompt_format=PROMPT_FORMAT, token_budget=PROFILE_TOKEN_BUDGET,
+                   products=""):
+    """
+    Chat messages for one job. Falls back to a generic prompt when the
+    dossier is missing or empty. `products` are catalog lines (see
+    catalog.format_products) the answer should draw from.
+    """
+    if user_profile and prompt_format == "compact":
+        system_prompt = COMPACT_PROFILE_SYSTEM_PROMPT
+        user_prompt = f"Profile:\n{compact_profile(user_profile, token_budget)}\n\nQuestion: {user_message}"
+    elif user_profile:
+        # User prompt with the full profile context
+        system_prompt = PROFILE_SYSTEM_PROMPT
+        user_prompt = f"""
+            Here is the user's profile:
+            ```json
+            {json.dumps(user_profile, indent=2)}
+            ```
+            Based strictly on the profile above, please answer the following question: "{user_message}"
+            """
+    else:
+        # User prompt is just their direct question
+        system_prompt = GENERIC_SYSTEM_PROMPT
+        user_prompt = user_message
+
+    if products:
+        user_prompt += f"\n\n{PRODUCTS_HEADER}\n{products}"
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
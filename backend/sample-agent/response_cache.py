@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+# --- Configuration ---
+CACHE_PATH = os.getenv("AGENT_CACHE_PATH", "agent_cache.sqlite")
+CACHE_TTL_SECONDS = int(os.getenv("AGENT_CACHE_TTL", str(24 * 3600)))
+
+# Questions mentioning allergies or allergens (Dutch and English) are always
+# answered fresh, never from the cache. Short words must match whole, so
+# "eiwit" (protein) does not count as "ei" (egg); nut compounds like
+# "hazelnoten" do count.
+ALLERGY_TERMS = re.compile(
+    r"\b(allerg|intoleran|pinda|peanut|gluten|lactose|schaaldier|shellfish|selderij|celery|sesam"
+    r"|mosterd|mustard|lupine|weekdier|sulfiet)"
+    r"|\w*(noot|noten|nuts?)\b"
+    r"|\b(ei|eieren|eggs?|vis|fish|soja|soy|melk|milk|tarwe|wheat)\b"
+)
+
+_PUNCTUATION = re.compile(r"[^\w\s€%]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def profile_fingerprint(profile):
+    """Hash of the dossier that does not depend on key order or formatting."""
+    canonical = json.dumps(profile, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_question(question):
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(user_id, profile, question, context=""):
+    text = f"{user_id}\n{profile_fingerprint(profile)}\n{normalize_question(question)}"
+    if context:
+        # E.g. the catalog index generation the answer was grounded in
+        text += f"\n{context}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    stores: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def as_dict(self):
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 3)}
+
+
+class ResponseCache:
+    """
+    Two-tier cache of agent answers keyed on (user, dossier hash, normalized
+    question, context). The optional context names what else the answer was
+    built from, such as the catalog index generation, so an ETL run that
+    changes prices also retires the answers quoting the old ones.
+
+    An in-memory LRU sits in front of an SQLite table with TTL and LRU size
+    eviction. Allergy safety:
+      * the key contains the full dossier hash, so an edited profile never
+        matches an answer generated for the old one;
+      * when a user's dossier changes, every entry stored for that user is
+        dropped from both tiers;
+      * questions that mention allergies or allergens, in general or from the
+        user's own list, bypass the cache entirely.
+
+    Args:
+        path: SQLite file for the disk tier, None keeps the cache in memory only.
+        ttl_seconds: Age after which an answer is regenerated.
+        max_memory_entries: Size of the in-memory LRU.
+        max_disk_entries: Rows kept in SQLite; least recently used go first.
+    """
+
+    def __init__(self, path=None, ttl_seconds=24 * 3600, max_memory_entries=256, max_disk_entries=10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.stats = CacheStats()
+        self._memory = OrderedDict()    # key -> (answer, created_at, user_id)
+        self._profiles = {}             # user_id -> last seen dossier hash
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS answers (
+                    key          TEXT PRIMARY KEY,
+                    user_id      TEXT,
+                    profile_hash TEXT,
+                    answer       TEXT NOT NULL,
+                    created_at   REAL NOT NULL,
+                    last_access  REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_answers_user ON answers (user_id)")
+            self._db.commit()
+
+    def should_bypass(self, profile, question):
+        text = normalize_question(question)
+        if ALLERGY_TERMS.search(text):
+            return True
+        allergies = (profile or {}).get("allergies") or []
+        terms = [normalize_question(str(allergy)) for allergy in allergies]
+        return any(re.search(rf"\b{re.escape(term)}", text) for term in terms if term)
+
+    def _track_profile(self, user_id, profile):
+        fingerprint = profile_fingerprint(profile)
+        previous = self._profiles.get(user_id)
+        if previous is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT profile_hash FROM answers WHERE user_id = ? ORDER BY last_access DESC LIMIT 1", (user_id,)
+            ).fetchone()
+            previous = row[0] if row else None
+        if previous is not None and previous != fingerprint:
+            self.invalidate_user(user_id)
+        self._profiles[user_id] = fingerprint
+        return fingerprint
+
+    def invalidate_user(self, user_id):
+        self.stats.invalidations += 1
+        for key in [key for key, (_, _, owner) in self._memory.items() if owner == user_id]:
+            del self._memory[key]
+        if self._db is not None:
+            self._db.execute("DELETE FROM answers WHERE user_id = ?", (user_id,))
+            self._db.commit()
+
+    def get(self, user_id, profile, question, context=""):
+        """Cached answer or None. Returns None without counting a miss for bypassed questions."""
+        if self.should_bypass(profile, question):
+            self.stats.bypassed += 1
+            return None
+        self._track_profile(user_id, profile)
+        key = cache_key(user_id, profile, question, context)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            answer, created_at, _ = entry
+            if now - created_at < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return answer
+            del self._memory[key]
+
+        if self._db is not None:
+            row = self._db.execute("SELECT answer, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                answer, created_at = row
+                if now - created_at < self.ttl_seconds:
+                    self._db.execute("UPDATE answers SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, answer, created_at, user_id)
+                    self.stats.disk_hits += 1
+                    return answer
+                self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._db.commit()
+
+        self.stats.misses += 1
+        return None
+
+    def put(self, user_id, profile, question, answer, context=""):
+        if self.should_bypass(profile, question):
+            return
+        fingerprint = self._track_profile(user_id, profile)
+        key = cache_key(user_id, profile, question, context)
+        now = time.time()
+        self._remember(key, answer, now, user_id)
+        self.stats.stores += 1
+
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (key, user_id, profile_hash, answer, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, user_id, fingerprint, answer, now, now),
+            )
+            self._db.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
+            evicted = self._db.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY last_access DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_disk_entries,)
+            ).rowcount
+            self.stats.evictions += evicted
+            self._db.commit()
+
+    def _remember(self, key, answer, created_at, user_id):
+        self._memory[key] = (answer, created_at, user_id)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
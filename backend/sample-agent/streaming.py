@@ -0,0 +1,67 @@
+import os
+import time
+import httpx
+
+# --- Configuration ---
+BACKEND_CHUNK_URL = os.getenv("BACKEND_CHUNK_URL", 'https://localhost:7160/internal/agent-response-chunk')
+# A partial post is sent once this much text is pending or this long has passed since the last one
+FLUSH_CHARS = int(os.getenv("AGENT_FLUSH_CHARS", "160"))
+FLUSH_INTERVAL = float(os.getenv("AGENT_FLUSH_INTERVAL", "0.25"))
+
+
+class ChunkBatcher:
+    """
+    Forwards streamed LLM text to the web API as numbered partial posts.
+
+    The first delta is sent on its own so the user sees something as soon as
+    the model starts; after that deltas are batched by size and age to keep
+    the number of requests low. Partial posts are best effort: the complete
+    answer is still delivered to /internal/agent-response afterwards.
+
+    Args:
+        http: httpx.AsyncClient used for the posts.
+        url: Endpoint receiving {"userId", "jobId", "sequence", "delta", "done"}.
+        user_id: Recipient of the answer.
+        job_id: Lets the client stitch chunks of one answer together.
+        flush_chars: Pending characters that trigger a post.
+        flush_interval: Seconds after which pending text is posted anyway.
+    """
+
+    def __init__(self, http, url, user_id, job_id, flush_chars=FLUSH_CHARS, flush_interval=FLUSH_INTERVAL):
+        self.http = http
+        self.url = url
+        self.user_id = user_id
+        self.job_id = job_id
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self.sequence = 0
+        self.posts = 0
+        self.errors = 0
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.perf_counter()
+
+    async def add(self, delta):
+        if not delta:
+            return
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+        if (self.sequence == 0 or self._pending_chars >= self.flush_chars
+                or time.perf_counter() - self._last_flush >= self.flush_interval):
+            await self.flush()
+
+    async def flush(self, done=False):
+        if not self._pending and not done:
+            return
+        chunk = {"userId": self.user_id, "jobId": self.job_id, "sequence": self.sequence,
+                 "delta": "".join(self._pending), "done": done}
+        self._pending, self._pending_chars = [], 0
+        self._last_flush = time.perf_counter()
+        self.sequence += 1
+        try:
+            resp = await self.http.post(self.url, json=chunk)
+            resp.raise_for_status()
+            self.posts += 1
+        except httpx.HTTPError as e:
+            self.errors += 1
+            print(f" [!] Could not deliver chunk {chunk['sequence']} for user {self.user_id}: {e}")
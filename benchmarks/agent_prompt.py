@@ -0,0 +1,101 @@
+"""
+Compare the compact dossier prompt with the indented-JSON one: size and end-to-end latency.
+
+The fake LLM server charges a fixed delay plus a per-prompt-token prefill cost,
+so latency follows prompt size the way a hosted model's does. Run from the
+repository root:
+    python -m benchmarks.agent_prompt --requests 50 --ms-per-token 0.2
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend" / "sample-agent"))
+import openai  # noqa: E402
+from prompt_builder import count_tokens, tiktoken  # noqa: E402
+from prompts import build_messages  # noqa: E402
+
+# The sample dossier from the Angular app
+DOSSIER = {
+    "summary": {"name": "Leha", "avatar": "assets/kaban.png", "goal": "Muscle Gain", "calorieTarget": 2800,
+                "macros": {"protein": 180, "carbs": 250, "fats": 70}},
+    "goals": {"age": 45, "sex": "Skuf", "description": "Focusing on lean muscle development while minimizing fat gain.",
+              "activity": "Moderately Active (3-5 workouts/week)", "maintenanceCalories": 2500,
+              "estimatedWeeklyChange": "+0.3kg"},
+    "preferences": {"mealsPerDay": 3, "budget": {"perDay": 15, "perWeek": 100},
+                    "equipment": {"oven": True, "stove": True, "microwave": True, "airFryer": False,
+                                  "blender": True, "slowCooker": False},
+                    "cookingMethods": {"raw": True, "boiled": True, "fried": False, "baked": True, "steamed": True},
+                    "portionSize": "Medium", "mealPrep": {"difficulty": "Medium", "cookingTime": "30-45 minutes"}},
+    "food": {"favorites": ["Pasta", "Grilled Chicken", "Avocado", "Dark Chocolate", "Berries", "Salmon"],
+             "dislikes": ["Liver", "Brussels Sprouts", "Black Licorice", "Cottage Cheese", "Tofu"]},
+    "allergies": ["Peanuts", "Shellfish"],
+}
+QUESTION = "Wat kan ik vanavond eten met veel eiwit?"
+
+
+def prompt_tokens(messages):
+    return sum(count_tokens(m["content"]) for m in messages)
+
+
+def make_handler(base_delay: float, seconds_per_token: float):
+    class PrefillLLM(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(base_delay + seconds_per_token * prompt_tokens(request["messages"]))
+            body = json.dumps({"id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": "bench",
+                               "choices": [{"index": 0, "finish_reason": "stop",
+                                            "message": {"role": "assistant", "content": "Kip met rijst."}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return PrefillLLM
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--requests", type=int, default=50)
+    arg_parser.add_argument("--base-delay", type=float, default=0.05, help="Fixed LLM delay per request (s)")
+    arg_parser.add_argument("--ms-per-token", type=float, default=0.2, help="Prefill cost per prompt token (ms)")
+    args = arg_parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.base_delay, args.ms_per_token / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = openai.OpenAI(api_key="bench", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+                           max_retries=0)
+
+    print(f"Token counter: {'tiktoken' if tiktoken is not None else 'heuristic'}")
+    for prompt_format in ("json", "compact"):
+        messages = build_messages(QUESTION, DOSSIER, prompt_format=prompt_format)
+        chars = sum(len(m["content"]) for m in messages)
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            build_messages(QUESTION, DOSSIER, prompt_format=prompt_format)
+        build_us = (time.perf_counter() - start) * 1000
+
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            client.chat.completions.create(model="bench",
+                                           messages=build_messages(QUESTION, DOSSIER, prompt_format=prompt_format))
+            latencies.append(time.perf_counter() - start)
+        print(f"{prompt_format:<8} {chars:5d} chars {prompt_tokens(messages):5d} tokens   "
+              f"build {build_us:6.1f} us   latency p50 {statistics.median(latencies) * 1000:6.1f} ms")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
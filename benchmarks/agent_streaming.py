@@ -0,0 +1,160 @@
+"""
+Compare time-to-first-chunk and total latency of the agent with and without streaming.
+
+Runs a fake OpenAI-compatible server that streams tokens at a fixed pace and a
+fake web API that timestamps every post. Run from the repository root:
+    python -m benchmarks.agent_streaming --jobs 20 --tokens 120 --token-delay 0.02
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend" / "sample-agent"))
+import httpx  # noqa: E402
+import openai  # noqa: E402
+from async_worker import AgentWorker  # noqa: E402
+
+
+def make_llm_handler(tokens: int, first_token_delay: float, token_delay: float):
+    words = [" woord"] * tokens
+
+    def chunk(content):
+        return {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 0, "model": "bench",
+                "choices": [{"index": 0, "finish_reason": None, "delta": {"content": content}}]}
+
+    class StreamingLLM(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(first_token_delay)
+            if not request.get("stream"):
+                time.sleep(token_delay * tokens)
+                body = json.dumps({"id": "chatcmpl-bench", "object": "chat.completion", "created": 0,
+                                   "model": "bench", "choices": [{"index": 0, "finish_reason": "stop",
+                                   "message": {"role": "assistant", "content": "".join(words)}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in words:
+                self._write_chunk(f"data: {json.dumps(chunk(word))}\n\n".encode())
+                time.sleep(token_delay)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return StreamingLLM
+
+
+def make_backend_handler(arrivals: dict, lock: threading.Lock):
+    class WebApi(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            now = time.perf_counter()
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            kind = "chunk" if self.path.endswith("-chunk") else "final"
+            with lock:
+                arrivals.setdefault(body["userId"], []).append((kind, now))
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return WebApi
+
+
+class Message:
+    def __init__(self, body):
+        self.body = body
+
+    async def ack(self):
+        pass
+
+    async def nack(self, requeue=True):
+        pass
+
+    async def reject(self, requeue=False):
+        pass
+
+
+async def run_jobs(llm_url, backend_url, jobs, stream, flush_chars, flush_interval):
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=jobs * 2)) as http:
+        llm = openai.AsyncOpenAI(api_key="bench", base_url=llm_url, max_retries=0)
+        worker = AgentWorker(llm, http, f"{backend_url}/internal/agent-response", jobs,
+                             chunk_url=f"{backend_url}/internal/agent-response-chunk" if stream else None,
+                             flush_chars=flush_chars, flush_interval=flush_interval)
+        bodies = [json.dumps({"message": {"jobId": f"job-{n}", "userId": f"user-{n}",
+                                          "newMessage": "Wat eet ik vanavond?", "userProfile": None}}).encode()
+                  for n in range(jobs)]
+        start = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            await asyncio.gather(*(worker.handle(Message(body)) for body in bodies))
+        await llm.close()
+        return start
+
+
+def summarize(label, start, arrivals):
+    first = [min(t for _, t in posts) - start for posts in arrivals.values()]
+    total = [max(t for kind, t in posts if kind == "final") - start for posts in arrivals.values()]
+    posts = sum(len(p) for p in arrivals.values()) / len(arrivals)
+    print(f"{label:<10} first chunk p50 {statistics.median(first) * 1000:7.0f} ms   "
+          f"total p50 {statistics.median(total) * 1000:7.0f} ms   posts/answer {posts:5.1f}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--jobs", type=int, default=20, help="Chat jobs handled concurrently")
+    arg_parser.add_argument("--tokens", type=int, default=120, help="Tokens per answer")
+    arg_parser.add_argument("--first-token-delay", type=float, default=0.3, help="Time to first token (s)")
+    arg_parser.add_argument("--token-delay", type=float, default=0.02, help="Time between tokens (s)")
+    arg_parser.add_argument("--flush-chars", type=int, default=160)
+    arg_parser.add_argument("--flush-interval", type=float, default=0.25)
+    args = arg_parser.parse_args(argv)
+
+    llm_server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_llm_handler(args.tokens, args.first_token_delay, args.token_delay))
+    arrivals, lock = {}, threading.Lock()
+    backend_server = ThreadingHTTPServer(("127.0.0.1", 0), make_backend_handler(arrivals, lock))
+    for server in (llm_server, backend_server):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm_url = f"http://127.0.0.1:{llm_server.server_address[1]}/v1"
+    backend_url = f"http://127.0.0.1:{backend_server.server_address[1]}"
+
+    print(f"{args.jobs} jobs, {args.tokens} tokens, first token after {args.first_token_delay * 1000:.0f} ms, "
+          f"then one every {args.token_delay * 1000:.0f} ms")
+    for label, stream in (("blocking", False), ("streaming", True)):
+        arrivals.clear()
+        start = asyncio.run(run_jobs(llm_url, backend_url, args.jobs, stream, args.flush_chars, args.flush_interval))
+        summarize(label, start, arrivals)
+
+    llm_server.shutdown()
+    backend_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Time filtered catalog lookups on the memory-mapped index against a scan over the records.
+
+Builds an index of synthetic products in a temporary directory, then runs
+the filters the agent derives from questions such as "high protein under €3
+without nuts". Run from the repository root:
+    python -m benchmarks.catalog_query --products 20000
+"""
+import argparse
+import random
+import tempfile
+import time
+from benchmarks.synthetic_catalog import BRANDS, CATEGORIES, WORDS
+from shared.catalog_index import CatalogIndex, CatalogRecord, update_index
+
+QUERIES = {
+    "high protein under €3 without nuts": dict(ranges={"protein": (10.0, None), "price": (None, 3.0)},
+                                               exclude=["allergen:nuts", "allergen:peanuts"], sort="-protein"),
+    "low sugar, no dairy": dict(ranges={"sugar": (None, 5.0)}, exclude=["allergen:milk"], sort="sugar"),
+    "cheap kaas": dict(terms=["kaas"], ranges={"price": (None, 2.0)}, sort="price"),
+}
+
+
+def make_records(count: int, seed: int = 0) -> list[CatalogRecord]:
+    rng = random.Random(seed)
+    records = []
+    for n in range(count):
+        name = " ".join([rng.choice(BRANDS)] + rng.sample(WORDS, 2))
+        records.append(CatalogRecord(
+            sku=f"{n:06d}POT", name=name, category=rng.choice(CATEGORIES),
+            price=round(rng.uniform(0.5, 12.0), 2), kcal=rng.uniform(5, 700), protein=rng.uniform(0, 30),
+            fat=rng.uniform(0, 40), carbs=rng.uniform(0, 80), sugar=rng.choice([None, rng.uniform(0, 50)]),
+        ))
+    return records
+
+
+def scan(records: list[tuple[CatalogRecord, set[str]]], terms=(), exclude=(), ranges=None, sort=None, limit=10):
+    # What a lookup costs without the index: test every record (terms precomputed), then sort
+    hits = []
+    for record, record_terms in records:
+        if any(term not in record_terms for term in terms) or any(term in record_terms for term in exclude):
+            continue
+        values = {column: getattr(record, column) for column in (ranges or {})}
+        if all(values[column] is not None and (low is None or values[column] >= low)
+               and (high is None or values[column] <= high) for column, (low, high) in (ranges or {}).items()):
+            hits.append(record)
+    if sort:
+        column = sort.lstrip("-")
+        hits.sort(key=lambda record: getattr(record, column) or 0.0, reverse=sort.startswith("-"))
+    return hits[:limit]
+
+
+def per_query(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--products", type=int, default=20_000)
+    arg_parser.add_argument("--repeat", type=int, default=200)
+    args = arg_parser.parse_args(argv)
+
+    records = make_records(args.products)
+    with_terms = [(record, set(record.terms())) for record in records]
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        update_index(root, records)
+        print(f"Indexed {args.products:,} products in {time.perf_counter() - start:.2f} s")
+        index = CatalogIndex(root)
+        try:
+            for question, filters in QUERIES.items():
+                indexed = per_query(lambda: index.search(**filters), args.repeat)
+                scanned = per_query(lambda: scan(with_terms, **filters), max(1, args.repeat // 10))
+                print(f"{question:>36}: {indexed * 1e6:8.0f} µs indexed, {scanned * 1e6:9.0f} µs scanned "
+                      f"({scanned / indexed:5.1f}x)")
+        finally:
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
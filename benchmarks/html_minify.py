@@ -0,0 +1,45 @@
+"""
+Report the size and parse-time reduction of shared.html_minify on the test fixture.
+
+Run from the repository root:
+    python -m benchmarks.html_minify --pages 30
+"""
+import argparse
+import logging
+import time
+from benchmarks.parser_engines import FIXTURE, KEY
+from data_processing.ETL.Jumbo.extractors import ENGINES
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from shared.html_minify import minify_html
+
+
+def seconds_per_page(parser, content: bytes, pages: int) -> float:
+    start = time.perf_counter()
+    for _ in range(pages):
+        parser.parse_html(content, KEY)
+    return (time.perf_counter() - start) / pages
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=30)
+    args = arg_parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    content = FIXTURE.read_bytes()
+    start = time.perf_counter()
+    minified = minify_html(content)
+    minify_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Size: {len(content) / 1024:.0f} KB -> {len(minified) / 1024:.0f} KB "
+          f"({100 * (1 - len(minified) / len(content)):.0f}% smaller), minify took {minify_ms:.0f} ms")
+    for engine in ENGINES:
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", engine=engine)
+        raw = seconds_per_page(parser, content, args.pages)
+        small = seconds_per_page(parser, minified, args.pages)
+        print(f"{engine:>5}: {raw * 1000:6.1f} ms -> {small * 1000:6.1f} ms per page "
+              f"({100 * (1 - small / raw):.0f}% faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the async link collector against a local server with canned category pages.
+
+Run from the repository root:
+    python -m benchmarks.link_collector --categories 20 --pages 10 --latency 0.05
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "data_processing" / "scraping" / "Jumbo"))
+from async_link_collector import collect_all  # noqa: E402
+from link_collector import PAGE_SIZE  # noqa: E402
+
+
+def make_handler(pages_per_category: int, latency: float):
+    class CategoryPage(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            url = urlsplit(self.path)
+            category = url.path.strip("/").split("/")[-1]
+            offset = int(parse_qs(url.query).get("offSet", ["0"])[0])
+            # Past the last page Jumbo keeps serving the final page, so no new links appear
+            page = min(offset // PAGE_SIZE, pages_per_category - 1)
+            links = "".join(f'<a href="/producten/{category}/product-{page}-{n}">x</a>'
+                            for n in range(PAGE_SIZE))
+            body = f"<html><body>{links}</body></html>".encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return CategoryPage
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--categories", type=int, default=20)
+    arg_parser.add_argument("--pages", type=int, default=10, help="Pages with new links per category")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Server delay per request (s)")
+    arg_parser.add_argument("--rate", type=float, default=50.0, help="Requests per second per host")
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    args = arg_parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.pages, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/producten"
+    categories = [{"name": f"cat-{n}", "url": f"{base}/cat-{n}/"} for n in range(args.categories)]
+
+    with tempfile.TemporaryDirectory() as out:
+        start = time.perf_counter()
+        links = asyncio.run(collect_all(categories, rate=args.rate, burst=args.concurrency,
+                                        concurrency=args.concurrency, folder=out))
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    requests = args.categories * (args.pages + 1)
+    total = sum(len(cat_links) for cat_links in links.values())
+    # The sequential collector pays latency plus a fixed 3 s sleep per page
+    sequential = requests * (args.latency + 3)
+    print(f"{total} links from {requests} pages in {elapsed:.2f}s ({requests / elapsed:.1f} pages/sec)")
+    print(f"Sequential collector estimate: {sequential:.0f}s ({sequential / elapsed:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
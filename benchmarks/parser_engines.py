@@ -0,0 +1,44 @@
+"""
+Compare pages/sec of the parse_html engines on the test fixture.
+
+Run from the repository root:
+    python -m benchmarks.parser_engines --pages 200
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+from data_processing.ETL.Jumbo.extractors import ENGINES
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+
+FIXTURE = (Path(__file__).resolve().parents[1] / "tests" / "data_processing" / "ETL" / "Jumbo"
+           / "amorelli-pistache-creme-190-g-666821POT.html")
+KEY = "Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-666821POT.html"
+
+
+def bench_engine(engine: str, content: bytes, pages: int) -> float:
+    parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", engine=engine)
+    parser.parse_html(content, KEY)  # warm up
+    start = time.perf_counter()
+    for _ in range(pages):
+        parser.parse_html(content, KEY)
+    return pages / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=100)
+    args = arg_parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    content = FIXTURE.read_bytes()
+    print(f"Fixture: {FIXTURE.name} ({len(content) / 1024:.0f} KB), {args.pages} pages per engine")
+
+    results = {engine: bench_engine(engine, content, args.pages) for engine in ENGINES}
+    baseline = results["bs4"]
+    for engine, pages_per_sec in results.items():
+        print(f"{engine:>5}: {pages_per_sec:8.1f} pages/sec  ({pages_per_sec / baseline:4.1f}x bs4)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Parse a synthetic catalog with every engine and fail when it got slower or bigger than the stored baseline.
+
+Each engine runs in a fresh process over the same seeded catalog (see
+benchmarks/synthetic_catalog.py) and reports parse throughput, peak RSS and
+the cost of building the document and of every field step in
+extractors.ENGINE_STEPS. The timings are absolute and only comparable on
+the same hardware, so the baseline is not committed: record it with
+--update-baseline on the machine that runs the check, before the change
+under test (benchmarks/baselines/ is ignored by git).
+
+Run from the repository root:
+    python -m benchmarks.parser_suite --pages 1000
+    python -m benchmarks.parser_suite --pages 1000 --update-baseline
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+from benchmarks.synthetic_catalog import generate
+from data_processing.ETL.Jumbo.extractors import ENGINE_STEPS, ENGINES, PageFields
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from shared.metrics import Histogram
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "parser_suite.json"
+TOLERANCE = 0.25     # relative slack before a change counts as a regression
+FIELD_SLACK_MS = 0.05    # field steps this cheap are timer noise, never a regression on their own
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(engine: str, pages: int, seed: int, field_every: int) -> dict:
+    """Parse the catalog with `engine`; meant to run in its own process so peak RSS is its own."""
+    logging.disable(logging.CRITICAL)
+    parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", engine=engine)
+    build, steps = ENGINE_STEPS[engine]
+    parse = Histogram()
+    fields = {"document": Histogram(), **{name: Histogram() for name in steps}}
+    rss_before = _peak_rss_mb()
+    parsed_bytes = 0
+
+    for n, page in enumerate(generate(pages, seed)):
+        start = time.perf_counter()
+        parser.parse_html(page.content, page.key)
+        parse.observe(time.perf_counter() - start)
+        parsed_bytes += len(page.content)
+
+        if n % field_every == 0:
+            start = time.perf_counter()
+            document = build(page.content)
+            fields["document"].observe(time.perf_counter() - start)
+            page_fields = PageFields()
+            for name, step in steps.items():
+                start = time.perf_counter()
+                step(document, page_fields)
+                fields[name].observe(time.perf_counter() - start)
+            del document
+
+    return {
+        "pages_per_sec": round(parse.count / parse.sum, 2),
+        "mb_per_sec": round(parsed_bytes / 1024 / 1024 / parse.sum, 2),
+        "parse_ms": {q: round(parse.percentile(int(q[1:])) * 1000, 3) for q in ("p50", "p95", "p99")},
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        "fields_ms": {name: round(histogram.sum / histogram.count * 1000, 4)
+                      for name, histogram in fields.items()},
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[str]:
+    """Human readable list of everything that got worse than `baseline` by more than `tolerance`."""
+    found = []
+    for engine, result in results.items():
+        expected = baseline["engines"].get(engine)
+        if expected is None:
+            continue
+        if result["pages_per_sec"] < expected["pages_per_sec"] * (1 - tolerance):
+            found.append(f"{engine}: {result['pages_per_sec']} pages/sec, baseline {expected['pages_per_sec']}")
+        if result["peak_rss_mb"] > expected["peak_rss_mb"] * (1 + tolerance):
+            found.append(f"{engine}: peak RSS {result['peak_rss_mb']} MB, baseline {expected['peak_rss_mb']}")
+        for name, cost in result["fields_ms"].items():
+            allowed = expected["fields_ms"].get(name)
+            if allowed is not None and cost > allowed * (1 + tolerance) + FIELD_SLACK_MS:
+                found.append(f"{engine}: field {name} {cost} ms/page, baseline {allowed}")
+    return found
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=1000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    arg_parser.add_argument("--field-every", type=int, default=10,
+                            help="Time the field steps on every Nth page")
+    arg_parser.add_argument("--baseline", type=Path, default=BASELINE)
+    arg_parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    args = arg_parser.parse_args(argv)
+
+    print(f"Synthetic catalog: {args.pages} pages, seed {args.seed}")
+    results = {}
+    # A fresh interpreter per engine, so one engine's peak RSS does not hide the other's
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for engine in args.engines:
+            result = results[engine] = pool.apply(measure, (engine, args.pages, args.seed, args.field_every))
+            fields = ", ".join(f"{name} {cost:.2f}" for name, cost in result["fields_ms"].items())
+            print(f"{engine:>5}: {result['pages_per_sec']:7.1f} pages/sec  {result['mb_per_sec']:6.1f} MB/s  "
+                  f"p95 {result['parse_ms']['p95']:6.1f} ms  peak RSS {result['peak_rss_mb']:6.1f} MB")
+            print(f"       ms/page: {fields}")
+
+    if args.update_baseline:
+        baseline = {"pages": args.pages, "seed": args.seed, "engines": results}
+        if args.baseline.exists():
+            # Keep engines that were not part of this run
+            previous = json.loads(args.baseline.read_text())
+            if (previous["pages"], previous["seed"]) == (args.pages, args.seed):
+                baseline["engines"] = {**previous["engines"], **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, record one with --update-baseline")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if (baseline["pages"], baseline["seed"]) != (args.pages, args.seed):
+        print(f"Baseline was recorded with --pages {baseline['pages']} --seed {baseline['seed']}, "
+              f"run with the same catalog or --update-baseline")
+        sys.exit(2)
+    found = regressions(results, baseline, args.tolerance)
+    for message in found:
+        print(f"REGRESSION {message}")
+    if found:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the memory of holding many price rows as plain dataclasses, slotted rows and a columnar RowBatch.
+
+"dataclass" is PriceRow, "slotted" its FrozenPriceRow variant and
+"RowBatch" the columnar container in shared.models.
+Memory is what tracemalloc sees allocated while the rows are held.
+
+Run from the repository root:
+    python -m benchmarks.row_memory --rows 1000000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import fields
+from datetime import datetime, timedelta
+from shared.models import FrozenPriceRow, PriceRow, RowBatch
+
+
+def price_values(rows: int):
+    """Values of a realistic snapshot: one scrape timestamp per thousand rows, half the rows on promotion."""
+    scraped = [datetime(2025, 9, 1) + timedelta(minutes=n) for n in range(rows // 1000 + 1)]
+    for n in range(rows):
+        regular = (n % 2000) / 100 + 0.49
+        on_promotion = n % 2 == 0
+        yield (n, scraped[n // 1000], regular, regular * 0.8 if on_promotion else None,
+               on_promotion, "korting" if on_promotion else None, None, regular * 4)
+
+
+def build(kind: str, rows: int):
+    if kind == "dataclass":
+        return [PriceRow(*values) for values in price_values(rows)]
+    if kind == "slotted":
+        return [FrozenPriceRow(*values) for values in price_values(rows)]
+    batch = RowBatch(PriceRow)
+    for values in price_values(rows):
+        batch.append_values(*values)
+    return batch
+
+
+def measure(kind: str, rows: int) -> tuple[float, float, float]:
+    """(MB held, seconds to build, seconds to turn every row into a COPY tuple)"""
+    gc.collect()
+    start = time.perf_counter()
+    held = build(kind, rows)
+    built = time.perf_counter() - start
+    del held
+
+    # Built again for the size, tracemalloc slows allocation down too much to time it at the same time
+    gc.collect()
+    tracemalloc.start()
+    held = build(kind, rows)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    columns = [f.name for f in fields(PriceRow)]
+    start = time.perf_counter()
+    if isinstance(held, RowBatch):
+        for _ in held.to_tuples(columns):
+            pass
+    else:
+        for row in held:
+            tuple(getattr(row, col) for col in columns)
+    return size / 1024 / 1024, built, time.perf_counter() - start
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    args = arg_parser.parse_args(argv)
+
+    print(f"{args.rows:,} PriceRow rows")
+    results = {kind: measure(kind, args.rows) for kind in ("dataclass", "slotted", "RowBatch")}
+    baseline = results["dataclass"][0]
+    for kind, (megabytes, built, copied) in results.items():
+        print(f"{kind:>9}: {megabytes:7.1f} MB ({megabytes / baseline:4.0%} of dataclass), "
+              f"build {built:5.2f} s, to tuples {copied:5.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Generate varied synthetic Jumbo product pages from the test fixture.
+
+Every page is the fixture with a new SKU, title, price-per-unit unit text and
+description, some sections removed and the markup shrunk or grown, so a
+benchmark sees the spread of a real catalog instead of one page repeated.
+
+Run from the repository root to write pages to a directory:
+    python -m benchmarks.synthetic_catalog --pages 1000 --out /tmp/catalog
+"""
+import argparse
+import random
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+from benchmarks.parser_engines import FIXTURE
+
+PREFIX = "Jumbo/"
+CATEGORIES = ["ontbijt,-broodbeleg-en-bakproducten", "zuivel,-eieren,-boter", "aardappelen,-groente-en-fruit",
+              "vlees,-vis-en-vega", "frisdrank-en-sappen", "diepvries"]
+# Every branch of units.normalize_unit, in the spellings the site uses
+UNIT_TEXTS = ["kilo", "kg", "Kilo", "gram", "100 gram", "grams", "liter", "Liter", "l", "ml", "100 ml",
+              "stuk", "stuks", "stukken", "per doos", "rol", "wasbeurt"]
+BRANDS = ["Jumbo", "Amorelli", "Campina", "Calvé", "Unox", "Hak", "Lay's", "Alpro", "Verkade", "Zwan"]
+WORDS = ["Pistache", "Crème", "Halfvolle", "Melk", "Pindakaas", "Tomaten", "Soep", "Chips", "Paprika",
+         "Havermelk", "Kaas", "Jong", "Belegen", "Rookworst", "Appelsap", "Volkoren", "Pasta", "Saus"]
+SECTIONS = ("title", "price_per_unit", "description", "origin")
+SIZES = ("small", "normal", "large")
+
+# Removing a section renames its marker everywhere, so no engine finds a later copy instead
+_SECTION_MARKERS = {
+    "title": ('data-testid="product-title"', 'data-testid="product-title-removed"'),
+    "price_per_unit": ('class="price-per-unit"', 'class="price-per-unit-removed"'),
+    "description": ('data-testid="product-description-text-body"', 'data-testid="product-description-removed"'),
+    "origin": ('data-testid="origin-collapsible"', 'data-testid="origin-removed"'),
+}
+_TITLE = re.compile(r'(data-testid="product-title"[^>]*>)(.*?)(</h1>)', re.S)
+_UNIT_SPANS = re.compile(r'(class="price-per-unit"[^>]*>.*?<span[^>]*aria-hidden="true"[^>]*>)([^<]*)'
+                         r'(</span>.*?<span[^>]*aria-hidden="true"[^>]*>/</span>'
+                         r'<span[^>]*aria-hidden="true"[^>]*>)([^<]*)(</span>)', re.S)
+_DESCRIPTION = re.compile(r'(data-testid="product-description-text-body"[^>]*>)(.*?)(</div>)', re.S)
+# Inline sprites, stylesheets and scripts make up most of a page; dropping or doubling them sets its size
+_BULK = re.compile(r"<svg\b.*?</svg>|<style\b[^>]*>.*?</style>|<script\b[^>]*>.*?</script>", re.S)
+
+
+@dataclass
+class SyntheticPage:
+    key: str
+    content: bytes
+    title: str | None
+    unit_text: str | None
+    description: list[str] = field(default_factory=list)
+    removed: tuple[str, ...] = ()
+    size: str = "normal"
+
+
+def _sku(rng: random.Random) -> str:
+    return f"{rng.randrange(100_000, 999_999)}{rng.choice(['POT', 'PAK', 'ZAK', 'FLS', 'STK'])}"
+
+
+def _title(rng: random.Random) -> str:
+    words = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+    return f"{rng.choice(BRANDS)} {words} {rng.choice([100, 190, 250, 500, 750, 1000])} g"
+
+
+def make_page(template: str, rng: random.Random) -> SyntheticPage:
+    """One page: `template` is the fixture as text, `rng` decides every variation."""
+    html = template
+    title = _title(rng)
+    unit_text = rng.choice(UNIT_TEXTS)
+    price = f"{rng.randint(0, 40)},{rng.randint(0, 99):02d}"
+    description = [" ".join(rng.choices(WORDS, k=rng.randint(2, 12))).lower()
+                   for _ in range(rng.randint(1, 4))]
+    # Most pages are complete, like the real catalog
+    removed = tuple(section for section in SECTIONS if rng.random() < 0.15)
+    size = rng.choices(SIZES, weights=(2, 5, 1))[0]
+
+    html = _TITLE.sub(lambda m: m.group(1) + title + m.group(3), html, count=1)
+    html = _UNIT_SPANS.sub(lambda m: m.group(1) + price + m.group(3) + unit_text + m.group(5), html, count=1)
+    paragraphs = "".join(f'<p class="block">{text}</p>' for text in description[:-1])
+    paragraphs += f"<ul><li>{description[-1]}</li></ul>"
+    html = _DESCRIPTION.sub(lambda m: m.group(1) + paragraphs + m.group(3), html, count=1)
+
+    for section in removed:
+        marker, renamed = _SECTION_MARKERS[section]
+        html = html.replace(marker, renamed)
+    if size == "small":
+        html = _BULK.sub("", html)
+    elif size == "large":
+        bulk = "".join(m.group(0) for m in _BULK.finditer(html))
+        html = html.replace("</body>", f"<div hidden>{bulk}</div></body>", 1)
+
+    slug = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+    sku = _sku(rng)
+    return SyntheticPage(
+        key=f"{PREFIX}{rng.choice(CATEGORIES)}/{slug}-{sku}.html",
+        content=html.encode("utf-8"),
+        title=None if "title" in removed else title,
+        unit_text=None if "price_per_unit" in removed else unit_text,
+        description=[] if "description" in removed else description,
+        removed=removed,
+        size=size,
+    )
+
+
+def generate(pages: int, seed: int = 0, template: str | None = None) -> Iterator[SyntheticPage]:
+    """Yield `pages` pages; the same seed always gives the same catalog. Pages are built lazily."""
+    template = template if template is not None else FIXTURE.read_text(encoding="utf-8")
+    rng = random.Random(seed)
+    for _ in range(pages):
+        yield make_page(template, rng)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", type=int, default=1000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--out", type=Path, required=True)
+    args = arg_parser.parse_args(argv)
+
+    total = 0
+    for page in generate(args.pages, args.seed):
+        path = args.out / page.key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(page.content)
+        total += len(page.content)
+    print(f"Wrote {args.pages} pages ({total / 1024 / 1024:.0f} MB) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
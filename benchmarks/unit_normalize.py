@@ -0,0 +1,62 @@
+"""
+Compare the old if/elif unit classification with units.normalize_unit, cold and cached, and the batch API.
+
+Run from the repository root:
+    python -m benchmarks.unit_normalize --texts 200000
+"""
+import argparse
+import random
+import time
+from benchmarks.synthetic_catalog import UNIT_TEXTS
+from data_processing.ETL.Jumbo.units import normalize_unit, normalize_units
+
+
+def legacy_classify(unit_text: str):
+    # The chain parse_html used before the units module
+    unit_text = unit_text.lower()
+    if "kilo" in unit_text or "kg" in unit_text:
+        return "weight", 1000, "1 kilogram"
+    elif "gram" in unit_text or "grams" in unit_text:
+        return "weight", 1, f"1 {unit_text.upper()}"
+    elif "liter" in unit_text or "l" == unit_text:
+        return "volume", 1000, "1 liter"
+    elif "ml" in unit_text:
+        return "volume", int(''.join(filter(str.isdigit, unit_text)) or 1), unit_text.upper()
+    elif "stuk" in unit_text or "stuks" in unit_text or "stukken" in unit_text:
+        return "piece", 1, "per stuk"
+    return "package", 1, unit_text
+
+
+def per_text(func, texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--texts", type=int, default=200_000)
+    args = arg_parser.parse_args(argv)
+
+    vocabulary = UNIT_TEXTS + ["6 x 330 ml", "4 x 1,5 l", "1,5 kg", "per 10 stuks", "75 cl"]
+    texts = random.Random(0).choices(vocabulary, k=args.texts)
+    print(f"{args.texts:,} unit texts drawn from {len(vocabulary)} spellings")
+
+    normalize_unit.cache_clear()
+    results = {
+        "if/elif chain": per_text(legacy_classify, texts),
+        "grammar, uncached": per_text(normalize_unit.__wrapped__, texts),
+        "grammar, cached": per_text(normalize_unit, texts),
+    }
+    start = time.perf_counter()
+    normalize_units(texts)
+    results["normalize_units batch"] = (time.perf_counter() - start) / len(texts)
+
+    baseline = results["if/elif chain"]
+    for name, seconds in results.items():
+        print(f"{name:>22}: {seconds * 1e9:7.0f} ns/text  ({baseline / seconds:4.1f}x the chain)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+import argparse
+import logging
+import os
+from shared.catalog_index import CatalogIndex, CatalogRecord, update_index
+from data_processing.ETL.Jumbo.loader import connect
+from data_processing.ETL.Jumbo.snapshots import nutrition_at, prices_at
+
+logger = logging.getLogger(__name__)
+
+SELECT_PRODUCTS = "SELECT product_id, external_sku, name, category, description FROM food.products"
+# Products per query when the ids of one run are exported
+ID_BATCH = 500
+
+
+def _products(conn, dialect, product_ids: list[int] | None):
+    cur = conn.cursor()
+    try:
+        if product_ids is None:
+            cur.execute(SELECT_PRODUCTS)
+            yield from cur.fetchall()
+            return
+        for start in range(0, len(product_ids), ID_BATCH):
+            batch = product_ids[start:start + ID_BATCH]
+            cur.execute(f"{SELECT_PRODUCTS} WHERE product_id IN ({', '.join(dialect.placeholder for _ in batch)})",
+                        batch)
+            yield from cur.fetchall()
+    finally:
+        cur.close()
+
+
+def catalog_records(conn, dialect, product_ids: Iterable[int] | None = None,
+                    at: datetime | None = None) -> list[CatalogRecord]:
+    """
+    One CatalogRecord per product (or per `product_ids`) with its price and
+    nutrition as of `at` (default: now), read from the sparse snapshot history.
+    """
+    at = at or datetime.utcnow()
+    product_ids = sorted(set(product_ids)) if product_ids is not None else None
+    # One pass over the snapshot tables beats an IN list of every id of a run
+    prices = prices_at(conn, dialect, at)
+    nutrition = nutrition_at(conn, dialect, at)
+
+    records = []
+    for product_id, sku, name, category, description in _products(conn, dialect, product_ids):
+        price = prices.get(product_id)
+        facts = nutrition.get(product_id)
+        current = None
+        if price is not None:
+            current = price.promo_price if price.on_promotion and price.promo_price is not None else price.regular_price
+        records.append(CatalogRecord(
+            sku=sku, name=name, category=category, description=description,
+            on_promotion=bool(price and price.on_promotion),
+            price=current,
+            regular_price=price.regular_price if price else None,
+            price_per_kg=price.price_per_kg if price else None,
+            kcal=facts.kcal_per_100g if facts else None,
+            protein=facts.protein_per_100g if facts else None,
+            fat=facts.fat_per_100g if facts else None,
+            carbs=facts.carbs_per_100g if facts else None,
+            sugar=facts.sugar_per_100g if facts else None,
+            fiber=facts.fiber_per_100g if facts else None,
+            sodium=facts.sodium_per_100g if facts else None,
+        ))
+    return records
+
+
+def export_index(db_url: str, index_path: str | Path, product_ids: Iterable[int] | None = None) -> bool:
+    """
+    Refresh the catalog index at `index_path` from the database: only
+    `product_ids` when given (the products of one ETL run), otherwise a full
+    rebuild. Returns whether a new index generation was written.
+    """
+    conn, dialect = connect(db_url)
+    try:
+        records = catalog_records(conn, dialect, product_ids)
+    finally:
+        conn.close()
+    written = update_index(index_path, records, full=product_ids is None)
+    if written:
+        index = CatalogIndex(index_path)
+        logger.info("Catalog index %s updated from %d products, %d in total", index_path, len(records), len(index))
+        index.close()
+    return written
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Rebuild the catalog index the agent queries")
+    arg_parser.add_argument("--db-url", default=os.getenv("DB_URL"),
+                            help="postgresql://... or sqlite:///path, defaults to DB_URL")
+    arg_parser.add_argument("--out", type=Path, required=True, help="Index directory")
+    args = arg_parser.parse_args(argv)
+    if not args.db_url:
+        arg_parser.error("--db-url or DB_URL is required")
+    written = export_index(args.db_url, args.out)
+    print(f"Catalog index {'written' if written else 'unchanged'}: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Spread the ETL over several containers through a shared work queue.
+
+The coordinator splits the bucket prefix into one unit per category prefix
+(plus the archive prefix); every worker leases a unit and runs the normal
+JumboHTMLParser pipeline over just that prefix. Start one coordinator and
+any number of workers against the same queue file:
+    python -m data_processing.ETL.Jumbo.distributed submit --queue /queue/etl.sqlite
+    python -m data_processing.ETL.Jumbo.distributed work --queue /queue/etl.sqlite --manifest-dir /state
+"""
+from pathlib import Path
+from urllib.parse import quote
+import argparse
+import logging
+import boto3
+from shared.work_queue import LEASE_SECONDS, MAX_ATTEMPTS, WorkQueue, run_worker, worker_name
+from data_processing.ETL.Jumbo.html_parser import (Bucket, Prefix, db_url, ENGINE, PARSE_WORKERS,
+                                                   JumboHTMLParser)
+
+logger = logging.getLogger(__name__)
+
+KIND = "etl"
+
+
+def split_prefix(s3, bucket: str, prefix: str) -> list[str]:
+    """The sub-prefixes one level below `prefix`, e.g. "Jumbo/zuivel,-eieren,-boter/"; `prefix` itself if none."""
+    prefixes = []
+    loose = False
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        prefixes.extend(common["Prefix"] for common in page.get("CommonPrefixes", []))
+        loose = loose or bool(page.get("Contents"))
+    if loose or not prefixes:
+        # Pages directly below the prefix would belong to no unit, so the prefix stays whole
+        return [prefix]
+    return prefixes
+
+
+def etl_units(s3, bucket: str, prefix: str) -> list[tuple[str, dict]]:
+    return [(sub_prefix, {"bucket": bucket, "prefix": sub_prefix}) for sub_prefix in split_prefix(s3, bucket, prefix)]
+
+
+class PrefixHandler:
+    """
+    Runs JumboHTMLParser over the prefix of one unit. With `manifest_dir`
+    each prefix keeps its own manifest there, so a retried unit only parses
+    the pages that failed; failed pages then fail the unit.
+    """
+
+    def __init__(self, db_url: str, engine: str = ENGINE, manifest_dir: str | Path | None = None,
+                 pipelined: bool = True, parse_workers: int = PARSE_WORKERS, s3=None):
+        self.db_url = db_url
+        self.engine = engine
+        self.manifest_dir = Path(manifest_dir) if manifest_dir else None
+        self.pipelined = pipelined
+        self.parse_workers = parse_workers
+        self.s3 = s3
+
+    def __call__(self, payload: dict) -> dict:
+        manifest_path = None
+        if self.manifest_dir is not None:
+            manifest_path = self.manifest_dir / f"{quote(payload['prefix'], safe='')}.sqlite"
+        parser = JumboHTMLParser(payload["bucket"], payload["prefix"], self.db_url, engine=self.engine,
+                                 manifest_path=manifest_path)
+        if self.s3 is not None:
+            parser._s3 = self.s3
+        stats = parser.run(pipelined=self.pipelined, parse_workers=self.parse_workers)
+        if parser.manifest is not None:
+            parser.manifest.close()
+            if stats.failed:
+                raise RuntimeError(f"{stats.failed} pages below {payload['prefix']} failed")
+        return stats.as_dict()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("role", choices=["submit", "work", "status"])
+    arg_parser.add_argument("--queue", type=Path, required=True, help="SQLite queue file shared by all containers")
+    arg_parser.add_argument("--bucket", default=Bucket)
+    arg_parser.add_argument("--prefix", default=Prefix)
+    arg_parser.add_argument("--reset", action="store_true", help="Queue finished and failed prefixes again")
+    arg_parser.add_argument("--db-url", default=db_url)
+    arg_parser.add_argument("--engine", default=ENGINE)
+    arg_parser.add_argument("--manifest-dir", type=Path, default=None,
+                            help="Per-prefix parse manifests, makes retries incremental")
+    arg_parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    arg_parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    arg_parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    args = arg_parser.parse_args(argv)
+
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    try:
+        if args.role == "submit":
+            units = etl_units(boto3.client("s3"), args.bucket, args.prefix)
+            added = queue.submit(KIND, units, reset=args.reset)
+            print(f"Queued {added} of {len(units)} prefixes below s3://{args.bucket}/{args.prefix}")
+        elif args.role == "work":
+            handler = PrefixHandler(args.db_url, args.engine, args.manifest_dir, parse_workers=args.parse_workers)
+            stats = run_worker(queue, KIND, handler, owner=worker_name())
+            print(f"{stats.done} prefixes done, {stats.failed} failed, {stats.lost} leases lost")
+        else:
+            for unit in queue.units(KIND):
+                print(f"{unit['status']:>8} {unit['attempts']} {unit['key']} {unit['last_error'] or ''}")
+            print(queue.counts(KIND))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from bs4 import BeautifulSoup
+from lxml import etree
+
+
+# ─────────── Raw page fields ─────────── #
+@dataclass
+class PageFields:
+    # Raw values `JumboHTMLParser.parse_html` turns into rows.
+    # Every engine must fill these identically for the same page.
+    title: Optional[str] = None
+    has_price_per_unit: bool = False
+    unit_spans: list[str] = field(default_factory=list)     # stripped texts of the aria-hidden spans
+    description_parts: list[str] = field(default_factory=list)
+    origin_text: Optional[str] = None
+    price_spans: list[str] = field(default_factory=list)        # current price, e.g. ["4", "99"]
+    old_price_spans: list[str] = field(default_factory=list)    # struck-through price during a promotion
+    promo_tags: list[str] = field(default_factory=list)         # e.g. ["2e halve prijs"]
+    nutrition_header: list[str] = field(default_factory=list)   # e.g. ["Voedingswaarden", "per 100 g"]
+    nutrition_rows: list[list[str]] = field(default_factory=list)   # cell texts of every row with <td>s
+
+
+# ─────────── BeautifulSoup engine ─────────── #
+# One step per field, run in order on the parsed document. Kept separate so
+# benchmarks/parser_suite.py can time each field on its own.
+def _bs4_title(soup: BeautifulSoup, fields: PageFields):
+    title_tag = soup.find("h1", attrs={"data-testid": "product-title"})
+    if title_tag:
+        fields.title = title_tag.get_text(strip=True)
+
+
+def _bs4_price_per_unit(soup: BeautifulSoup, fields: PageFields):
+    ppu_div = soup.find("div", class_="price-per-unit")
+    if ppu_div:
+        fields.has_price_per_unit = True
+        fields.unit_spans = [span.get_text(strip=True)
+                             for span in ppu_div.find_all("span", attrs={"aria-hidden": "true"})]
+
+
+def _bs4_description(soup: BeautifulSoup, fields: PageFields):
+    desc_div = soup.find("div", attrs={"data-testid": "product-description-text-body"})
+    if desc_div:
+        for el in desc_div.find_all(["p", "li"]):
+            text = el.get_text(separator=" ", strip=True)
+            if text:
+                fields.description_parts.append(text)
+
+
+def _bs4_origin(soup: BeautifulSoup, fields: PageFields):
+    origin_div = soup.find("div", attrs={"data-testid": "origin-collapsible"})
+    if origin_div:
+        inner_div = origin_div.find("div")
+        if inner_div:
+            content_div = inner_div.find("div", class_="content")
+            if content_div:
+                p_tag = content_div.find("p")
+                if p_tag:
+                    fields.origin_text = p_tag.get_text(strip=True)
+
+
+def _bs4_price(soup: BeautifulSoup, fields: PageFields):
+    price_div = soup.find("div", attrs={"data-testid": "product-price"})
+    if price_div:
+        current = price_div.find("div", class_="current-price")
+        if current:
+            fields.price_spans = [span.get_text(strip=True)
+                                  for span in current.find_all("span", attrs={"aria-hidden": "true"})]
+        old = price_div.find(class_="old-price")
+        if old:
+            fields.old_price_spans = [span.get_text(strip=True)
+                                      for span in old.find_all("span", attrs={"aria-hidden": "true"})]
+    # Only the product panel, recommendation cards carry promotion tags of their own
+    panel = soup.find("div", class_="product-panel-info")
+    if panel:
+        for tag in panel.select(".promotion-tags .tag-line"):
+            text = tag.get_text(strip=True)
+            if text:
+                fields.promo_tags.append(text)
+
+
+def _bs4_nutrition(soup: BeautifulSoup, fields: PageFields):
+    table = soup.find("table", attrs={"data-testid": "nutritional-values-table-content"})
+    if table:
+        fields.nutrition_header = [th.get_text(strip=True) for th in table.find_all("th")]
+        for tr in table.find_all("tr"):
+            cells = [td.get_text(strip=True) for td in tr.find_all("td")]
+            if cells:
+                fields.nutrition_rows.append(cells)
+
+
+def _bs4_document(content: bytes) -> BeautifulSoup:
+    return BeautifulSoup(content, "lxml")
+
+
+BS4_FIELDS = {
+    "title": _bs4_title,
+    "price_per_unit": _bs4_price_per_unit,
+    "description": _bs4_description,
+    "origin": _bs4_origin,
+    "price": _bs4_price,
+    "nutrition": _bs4_nutrition,
+}
+
+
+def extract_bs4(content: bytes) -> PageFields:
+    soup = _bs4_document(content)
+    fields = PageFields()
+    for step in BS4_FIELDS.values():
+        step(soup, fields)
+    return fields
+
+
+# ─────────── lxml engine ─────────── #
+# Scraped pages are always stored as UTF-8 (see scraper.py)
+_HTML_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Selectors are compiled once and mirror the `find`/`find_all` calls of `extract_bs4`
+_TITLE = etree.XPath('(//h1[@data-testid="product-title"])[1]')
+_PRICE_PER_UNIT = etree.XPath(f"(//div[{_has_class('price-per-unit')}])[1]")
+_HIDDEN_SPANS = etree.XPath('.//span[@aria-hidden="true"]')
+_DESCRIPTION = etree.XPath('(//div[@data-testid="product-description-text-body"])[1]')
+_DESCRIPTION_PARTS = etree.XPath(".//*[self::p or self::li]")
+_ORIGIN = etree.XPath('(//div[@data-testid="origin-collapsible"])[1]')
+_FIRST_DIV = etree.XPath("(.//div)[1]")
+_CONTENT_DIV = etree.XPath(f"(.//div[{_has_class('content')}])[1]")
+_FIRST_P = etree.XPath("(.//p)[1]")
+_PRICE = etree.XPath('(//div[@data-testid="product-price"])[1]')
+_CURRENT_PRICE = etree.XPath(f"(.//div[{_has_class('current-price')}])[1]")
+_OLD_PRICE = etree.XPath(f"(.//*[{_has_class('old-price')}])[1]")
+_PRODUCT_PANEL = etree.XPath(f"(//div[{_has_class('product-panel-info')}])[1]")
+_PROMO_TAGS = etree.XPath(f".//*[{_has_class('promotion-tags')}]//*[{_has_class('tag-line')}]")
+_NUTRITION_TABLE = etree.XPath('(//table[@data-testid="nutritional-values-table-content"])[1]')
+_TH = etree.XPath(".//th")
+_TR = etree.XPath(".//tr")
+_TD = etree.XPath(".//td")
+# BeautifulSoup's get_text skips comments and script/style/template strings
+_TEXTS = etree.XPath(".//text()[not(parent::script or parent::style or parent::template)]")
+
+
+def _get_text(el, separator: str = "") -> str:
+    return separator.join(text.strip() for text in _TEXTS(el) if text.strip())
+
+
+def _first(xpath: etree.XPath, el):
+    found = xpath(el)
+    return found[0] if found else None
+
+
+def _lxml_title(root, fields: PageFields):
+    title_tag = _first(_TITLE, root)
+    if title_tag is not None:
+        fields.title = _get_text(title_tag)
+
+
+def _lxml_price_per_unit(root, fields: PageFields):
+    ppu_div = _first(_PRICE_PER_UNIT, root)
+    if ppu_div is not None:
+        fields.has_price_per_unit = True
+        fields.unit_spans = [_get_text(span) for span in _HIDDEN_SPANS(ppu_div)]
+
+
+def _lxml_description(root, fields: PageFields):
+    desc_div = _first(_DESCRIPTION, root)
+    if desc_div is not None:
+        for el in _DESCRIPTION_PARTS(desc_div):
+            text = _get_text(el, separator=" ")
+            if text:
+                fields.description_parts.append(text)
+
+
+def _lxml_origin(root, fields: PageFields):
+    origin_div = _first(_ORIGIN, root)
+    if origin_div is not None:
+        inner_div = _first(_FIRST_DIV, origin_div)
+        if inner_div is not None:
+            content_div = _first(_CONTENT_DIV, inner_div)
+            if content_div is not None:
+                p_tag = _first(_FIRST_P, content_div)
+                if p_tag is not None:
+                    fields.origin_text = _get_text(p_tag)
+
+
+def _lxml_price(root, fields: PageFields):
+    price_div = _first(_PRICE, root)
+    if price_div is not None:
+        current = _first(_CURRENT_PRICE, price_div)
+        if current is not None:
+            fields.price_spans = [_get_text(span) for span in _HIDDEN_SPANS(current)]
+        old = _first(_OLD_PRICE, price_div)
+        if old is not None:
+            fields.old_price_spans = [_get_text(span) for span in _HIDDEN_SPANS(old)]
+    panel = _first(_PRODUCT_PANEL, root)
+    if panel is not None:
+        for tag in _PROMO_TAGS(panel):
+            text = _get_text(tag)
+            if text:
+                fields.promo_tags.append(text)
+
+
+def _lxml_nutrition(root, fields: PageFields):
+    table = _first(_NUTRITION_TABLE, root)
+    if table is not None:
+        fields.nutrition_header = [_get_text(th) for th in _TH(table)]
+        for tr in _TR(table):
+            cells = [_get_text(td) for td in _TD(tr)]
+            if cells:
+                fields.nutrition_rows.append(cells)
+
+
+def _lxml_document(content: bytes):
+    return etree.fromstring(content, _HTML_PARSER)
+
+
+LXML_FIELDS = {
+    "title": _lxml_title,
+    "price_per_unit": _lxml_price_per_unit,
+    "description": _lxml_description,
+    "origin": _lxml_origin,
+    "price": _lxml_price,
+    "nutrition": _lxml_nutrition,
+}
+
+
+def extract_lxml(content: bytes) -> PageFields:
+    root = _lxml_document(content)
+    fields = PageFields()
+    if root is None:
+        return fields
+    for step in LXML_FIELDS.values():
+        step(root, fields)
+    return fields
+
+
+ENGINES: dict[str, Callable[[bytes], PageFields]] = {
+    "bs4": extract_bs4,
+    "lxml": extract_lxml,
+}
+
+
+# engine -> (build the document, field steps run on it)
+ENGINE_STEPS: dict[str, tuple[Callable[[bytes], object], dict[str, Callable]]] = {
+    "bs4": (_bs4_document, BS4_FIELDS),
+    "lxml": (_lxml_document, LXML_FIELDS),
+}
@@ -1,12 +1,25 @@
 from pathlib import Path
 from typing import Iterable, Iterator
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import argparse
+import re
+import threading
 import boto3
-from bs4 import BeautifulSoup
 import logging
-from shared.log import auto_setup_logger 
+from shared.html_minify import minify_html
+from shared.log import auto_setup_logger, configure_worker_logging, log_queue
+from shared.metrics import METRICS, inc, timed, timer
 from shared.models import ProductRow, PriceRow, NutritionRow
+from shared.object_cache import CacheMiss, ObjectCache
+from shared.page_archive import INDEX_SUFFIX, LocalShard, ShardIndex, ensure_local_copy, s3_read
+from data_processing.ETL.Jumbo.extractors import ENGINES
+from data_processing.ETL.Jumbo.units import normalize_unit
+from data_processing.ETL.Jumbo.manifest import ParseManifest, ManifestStats, content_hash
+from data_processing.ETL.Jumbo.loader import CatalogLoader, is_database_url
+from data_processing.ETL.Jumbo.snapshots import SnapshotIndex, DiffStats
+from data_processing.ETL.Jumbo.catalog_export import export_index
 
 
 import os 
@@ -19,17 +32,199 @@ logger = logging.getLogger(__name__)
 # ─────────── S3 connection ─────────── #
 Bucket = "foodv-scraper-module"
 Prefix = "Jumbo/"
-db_url = "dummy_url"
+db_url = os.getenv("DB_URL", "dummy_url")   # postgresql://... or sqlite:///path
+ENGINE = "bs4"   # see extractors.ENGINES
+
+# ─────────── Pipeline defaults ─────────── #
+FETCH_WORKERS = 8
+PARSE_WORKERS = os.cpu_count() or 1
+MAX_IN_FLIGHT = 64
+
+# ─────────── Loader defaults ─────────── #
+BATCH_SIZE = 1000
+COMMIT_EVERY = 10
+
+# ─────────── Local object cache ─────────── #
+CACHE_DIR = os.getenv("ETL_CACHE_DIR")    # unset: no cache, every run reads S3
+CACHE_MAX_MB = int(os.getenv("ETL_CACHE_MAX_MB", "5000"))
+
+
+# ─────────── Prices and nutrition ─────────── #
+# Promotion tag texts on the product panel -> food.prices.promo_type, first match wins
+PROMO_TYPES = [
+    ("x_plus_y_free", re.compile(r"\d+\s*\+\s*\d+\s*gratis", re.I)),
+    ("second_half_price", re.compile(r"2e\s+halve\s+prijs", re.I)),
+    ("second_free", re.compile(r"2e\s+gratis", re.I)),
+    ("multi_buy", re.compile(r"\d+\s+voor\s+€?\s*\d", re.I)),
+    ("percent_off", re.compile(r"\d+\s*%\s*korting", re.I)),
+    ("price_off", re.compile(r"€\s*\d+(?:[.,]\d+)?\s*korting", re.I)),
+]
+
+# Row labels of the nutrition table (lower case) -> NutritionRow field
+NUTRIENTS = {
+    "energie": "kcal_per_100g",
+    "vet": "fat_per_100g",
+    "vetten": "fat_per_100g",
+    "koolhydraten": "carbs_per_100g",
+    "waarvan suikers": "sugar_per_100g",
+    "suikers": "sugar_per_100g",
+    "vezels": "fiber_per_100g",
+    "voedingsvezel": "fiber_per_100g",
+    "voedingsvezels": "fiber_per_100g",
+    "eiwitten": "protein_per_100g",
+    "eiwit": "protein_per_100g",
+    "natrium": "sodium_per_100g",
+    "zout": "sodium_per_100g",     # salt is 2.5x its sodium; a natrium row wins over it
+}
+SALT_PER_SODIUM = 2.5
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_PER_AMOUNT = re.compile(rf"per\s+{_NUMBER}\s*(?:g|gram|ml)\b", re.I)
+_KCAL = re.compile(rf"{_NUMBER}\s*kcal", re.I)
+_KJ = re.compile(rf"{_NUMBER}\s*kj", re.I)
+_AMOUNT = re.compile(rf"{_NUMBER}\s*(mg|g)?", re.I)
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def _price(spans: list[str]) -> float | None:
+    """Price from its spans: ["4", "99"] (whole, fractional) or ["4,99"]."""
+    parts = [span.strip("€ \xa0.,") for span in spans]
+    parts = [part for part in parts if part]
+    try:
+        if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+            return float(f"{parts[0]}.{parts[1]}")
+        if len(parts) == 1:
+            return _number(parts[0])
+    except ValueError:
+        pass
+    return None
+
+
+def _price_per_kg(unit_spans: list[str]) -> float | None:
+    """Price per kilo from price-per-unit spans like ["26,26", "/", "kilo"] or ["2,63", "/", "100 gram"]."""
+    if len(unit_spans) < 3:
+        return None
+    price = _price(unit_spans[:1])
+    unit = normalize_unit(unit_spans[-1])
+    if price is None or unit.unit_type != "weight":
+        return None
+    return round(price * 1000 / unit.unit_value, 2)
+
+
+def _promo_type(promo_tags: list[str]) -> str | None:
+    for text in promo_tags:
+        for promo_type, pattern in PROMO_TYPES:
+            if pattern.search(text):
+                return promo_type
+    return "other" if promo_tags else None
+
+
+def _nutrient_amount(text: str, energy: bool) -> float | None:
+    if energy:
+        kcal = _KCAL.search(text)
+        if kcal:
+            return _number(kcal.group(1))
+        kj = _KJ.search(text)
+        return _number(kj.group(1)) / 4.184 if kj else None
+    amount = _AMOUNT.search(text)
+    if amount is None:
+        return None
+    value = _number(amount.group(1))
+    return value / 1000 if (amount.group(2) or "").lower() == "mg" else value
+
+
+def _nutrition_values(header: list[str], rows: list[list[str]]) -> dict[str, float]:
+    """
+    NutritionRow fields from the nutrition table, normalized to 100 g/ml.
+    Uses the first "per <amount> g/ml" column; a table with only per-portion
+    values gives nothing.
+    """
+    column = factor = None
+    for index, text in enumerate(header):
+        per = _PER_AMOUNT.search(text)
+        if per and _number(per.group(1)):
+            column, factor = index, 100 / _number(per.group(1))
+            break
+    if column is None:
+        return {}
+
+    values = {}
+    for cells in rows:
+        label = cells[0].lower()
+        name = NUTRIENTS.get(label)
+        if name is None or len(cells) <= column or (label == "zout" and name in values):
+            continue
+        amount = _nutrient_amount(cells[column], energy=name == "kcal_per_100g")
+        if amount is None:
+            continue
+        if label == "zout":
+            amount /= SALT_PER_SODIUM
+        values[name] = round(amount * factor, 2)
+    return values
+
+
+# Parser instance owned by each parse worker process (see _init_parse_worker)
+_worker_parser: "JumboHTMLParser | None" = None
+
+
+def _init_parse_worker(bucket: str, prefix: str, engine: str, logging_queue=None, minify: bool = False):
+    global _worker_parser
+    if logging_queue is not None:
+        # Log through the parent's listener instead of writing the file from every process
+        configure_worker_logging(logging_queue)
+    # A forked worker starts with a copy of the parent's metrics; only ship back its own
+    METRICS.reset()
+    _worker_parser = JumboHTMLParser(bucket, prefix, None, engine=engine, minify=minify)
+
+
+def _parse_in_worker(content: bytes, key: str, scraped_at: datetime | None = None):
+    result = _worker_parser.parse_html(content, key, scraped_at)
+    # Timings recorded in this process travel back with the result
+    return result, METRICS.drain()
 
 
 class JumboHTMLParser:
-    def __init__(self, bucket: str, prefix: str, db_url: str, ):
+    def __init__(self, bucket: str, prefix: str, db_url: str, engine: str = ENGINE,
+                 manifest_path: str | Path | None = None, archive_dir: str | Path | None = None,
+                 cache_dir: str | Path | None = None, cache_max_bytes: int = CACHE_MAX_MB * 1024 * 1024,
+                 offline: bool = False, snapshot_index_path: str | Path | None = None,
+                 catalog_index_path: str | Path | None = None, minify: bool = False):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown parser engine {engine!r}, expected one of {sorted(ENGINES)}")
+        if offline and cache_dir is None:
+            raise ValueError("Offline mode reads from the local cache, a cache_dir is required")
         self.bucket = bucket
         self.prefix = prefix
         self.db_link = db_url
+        self.engine = engine
         self._s3: boto3.client | None = None
+        # Incremental mode: skip objects already parsed by a previous run
+        self.manifest = ParseManifest(manifest_path) if manifest_path else None
+        self.stats = ManifestStats()
+        self._full = False
+        self._listed: dict[str, dict] = {}
+        # Pages stored in archive shards: logical key -> (shard key, entry, codec).
+        # With archive_dir, shards are downloaded once and memory-mapped; otherwise
+        # each page is a ranged GET.
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self._archived = {}
+        self._local_shards: dict[str, LocalShard] = {}
+        self._shard_lock = threading.Lock()
+        # Read-through copy of the bucket on local disk for re-runs; offline never calls S3
+        self.cache = ObjectCache(cache_dir, cache_max_bytes, offline) if cache_dir else None
+        # Change detection: only prices/nutrition that differ from the last snapshot are loaded
+        self.snapshots = SnapshotIndex(snapshot_index_path) if snapshot_index_path else None
+        # Memory-mapped index the agent queries, refreshed with the products of every run
+        self.catalog_index = Path(catalog_index_path) if catalog_index_path else None
+        # Pages uploaded before the scraper minified them are stripped the same way before parsing
+        self.minify = minify
 
     def s3_connect(self):
+        if self.cache is not None and self.cache.offline:
+            raise CacheMiss(f"Offline mode, not connecting to S3 (bucket {self.bucket})")
         if self._s3 is None: 
             logging.info("Creating boto3 client")
             self._s3 = boto3.client("s3")
@@ -37,36 +232,158 @@ class JumboHTMLParser:
             logging.info("Connection to S3 successfull -> bucket %s", self.bucket)
         return self._s3
     
-    def iterate_html_keys(self):
+    def iterate_html_objects(self):
+        if self.cache is not None and self.cache.offline:
+            yield from self._iterate_cached_objects()
+            return
         s3 = self.s3_connect()
         paginator = s3.get_paginator("list_objects_v2")
 
-        for page in paginator.paginate(Bucket = self.bucket, 
-                                       Prefix = self.prefix, 
-                                       PaginationConfig={"PageSize": 1000}
-                                       ):
+        pages = iter(paginator.paginate(Bucket = self.bucket, 
+                                        Prefix = self.prefix, 
+                                        PaginationConfig={"PageSize": 1000}
+                                        ))
+        while True:
+            with timer("s3.list"):
+                page = next(pages, None)
+            if page is None:
+                break
+            inc("s3.list.objects", len(page.get("Contents", [])))
             for obj in page.get("Contents", []):
                 key = obj["Key"]
                 if key.lower().endswith(".html"):
-                    yield key
+                    yield obj
+                elif key.endswith(INDEX_SUFFIX):
+                    yield from self._iterate_archive_objects(obj)
+
+    def _iterate_cached_objects(self):
+        """Offline stand-in for the bucket listing: whatever the local cache holds below the prefix."""
+        for obj in self.cache.list_objects(self.bucket, self.prefix):
+            if obj["Key"].lower().endswith(".html"):
+                yield obj
+            elif obj["Key"].endswith(INDEX_SUFFIX):
+                yield from self._iterate_archive_objects(obj)
+
+    def _iterate_archive_objects(self, index_obj: dict):
+        """Expand an archive index into per-page entries shaped like list_objects_v2 results."""
+        raw_index = self._get_object(index_obj["Key"], index_obj.get("ETag"))
+        index = ShardIndex.from_json(raw_index)
+        shard_key = index_obj["Key"].rsplit("/", 1)[0] + "/" + index.shard
+        for entry in index.entries:
+            self._archived[entry.key] = (shard_key, entry, index.codec)
+            yield {"Key": entry.key, "ETag": entry.sha256, "Size": entry.size,
+                   "LastModified": index_obj.get("LastModified")}
+
+    def iterate_html_keys(self):
+        for obj in self.iterate_html_objects():
+            yield obj["Key"]
+
+    def iterate_pending_keys(self, full: bool = False):
+        """
+        Yield the keys that need parsing. Without a manifest, or with
+        `full=True`, that is every key; otherwise objects whose listing
+        metadata matches the manifest are skipped before any download.
+        """
+        self._full = full
+        for obj in self.iterate_html_objects():
+            self.stats.listed += 1
+            if self.manifest is not None and not full and self.manifest.is_unchanged(obj):
+                self.stats.skipped += 1
+                continue
+            self._listed[obj["Key"]] = obj
+            yield obj["Key"]
+
+    def _check_content(self, key: str, content: bytes):
+        """
+        Return the content hash to record once `key` is parsed, or None when the
+        body is identical to the last parsed version and parsing can be skipped.
+        """
+        if self.manifest is None:
+            return ""
+        digest = content_hash(content)
+        if not self._full and self.manifest.has_content(key, digest):
+            self.manifest.record(self._listed.pop(key, {"Key": key}), digest)
+            self.stats.skipped += 1
+            return None
+        return digest
+
+    def _mark_parsed(self, key: str, digest: str):
+        self.stats.processed += 1
+        inc("etl.pages")
+        if self.manifest is not None:
+            self.manifest.record(self._listed.pop(key, {"Key": key}), digest)
+
+    def scraped_at(self, key: str) -> datetime | None:
+        """
+        When the page was stored: the object's S3 LastModified (for archived
+        pages, that of the shard index), as naive UTC like the rest of the
+        rows. None when the listing did not say, e.g. for offline runs.
+        """
+        modified = self._listed.get(key, {}).get("LastModified")
+        if modified is None:
+            return None
+        if modified.tzinfo is not None:
+            modified = modified.astimezone(timezone.utc).replace(tzinfo=None)
+        return modified
 
     def load_html(self, key: str):
+        if key in self._archived:
+            return self._load_archived(key)
+        return self._get_object(key, self._listed.get(key, {}).get("ETag"))
+
+    def _get_object(self, key: str, etag: str | None = None) -> bytes:
+        if self.cache is not None:
+            return self.cache.get(None if self.cache.offline else self.s3_connect(), self.bucket, key, etag)
         s3 = self.s3_connect()
-        body = s3.get_object(Bucket = self.bucket, Key=key)["Body"].read()
+        with timer("s3.get"):
+            body = s3.get_object(Bucket = self.bucket, Key=key)["Body"].read()
+        inc("s3.get.bytes", len(body))
         return body
 
-    def parse_html(self, content: bytes, key:str):
+    def _load_archived(self, key: str) -> bytes:
+        shard_key, entry, codec = self._archived[key]
+        if self.archive_dir is None:
+            if self.cache is not None and self.cache.offline:
+                raise CacheMiss(f"{key} is in archive shard {shard_key}; offline runs read shards from "
+                                f"the archive directory (--archive-dir), ranged reads need S3")
+            with timer("s3.get_range"):
+                content = s3_read(self.s3_connect(), self.bucket, shard_key, entry, codec)
+            inc("s3.get.bytes", entry.length)
+            return content
+        with self._shard_lock:
+            shard = self._local_shards.get(shard_key)
+            if shard is None:
+                path = self.archive_dir / shard_key.rsplit("/", 1)[-1]
+                # S3 (and so offline mode) only comes into it for a shard that is not on disk yet
+                if not path.exists():
+                    with timer("s3.download"):
+                        ensure_local_copy(self.s3_connect(), self.bucket, shard_key, path)
+                    inc("s3.get.bytes", path.stat().st_size)
+                shard = self._local_shards[shard_key] = LocalShard(path, codec)
+        with timer("archive.read"):
+            return shard.read(entry)
 
-        soup = BeautifulSoup(content, "lxml")
+    @timed("etl.parse")
+    def parse_html(self, content: bytes, key:str, scraped_at: datetime | None = None):
+        """
+        Turn one product page into {"product": ProductRow, "price": PriceRow | None,
+        "nutrition": NutritionRow | None}. All three come from the same parsed
+        document. `scraped_at` stamps the price and nutrition snapshots; runs
+        pass the object's LastModified (see `scraped_at`), now (UTC) is only
+        the fallback. Their product_id is resolved from external_sku when loading.
+        """
+        scraped_at = scraped_at or datetime.utcnow()
+        if self.minify:
+            with timer("etl.minify"):
+                content = minify_html(content)
+
+        page = ENGINES[self.engine](content)
 
         ### ─────────── Products table ─────────── ###
 
         # 1. Find title
-        title_tag = soup.find("h1", attrs={"data-testid": "product-title"})
-        if title_tag:
-            title = title_tag.get_text(strip=True)
-            #logger.info("%s", title) 
-        else:
+        title = page.title
+        if title is None:
             logger.warning("No title found in %s", key)
 
         # 2. Get SKU from filename
@@ -77,37 +394,12 @@ class JumboHTMLParser:
         category_path = without_prefix.split("/")[0]
 
         # 4. Find unit type
-        ppu_div = soup.find("div", class_="price-per-unit")
-        if ppu_div:
-            # Get all spans inside the price-per-unit div
-            spans = ppu_div.find_all("span", attrs={"aria-hidden": "true"})
+        if page.has_price_per_unit:
+            spans = page.unit_spans
             if len(spans) >= 3:
                 # Typically: [price, "/", unit] - we want the last one
-                unit_text = spans[-1].get_text(strip=True).lower()
-                if "kilo" in unit_text or "kg" in unit_text:
-                    unit_type = "weight"
-                    unit_value = 1000  # grams
-                    unit_desc = "1 kilogram"
-                elif "gram" in unit_text or "grams" in unit_text:
-                    unit_type = "weight" 
-                    unit_value = 1  # grams
-                    unit_desc = f"1 {unit_text.upper()}"
-                elif "liter" in unit_text or "l" == unit_text:
-                    unit_type = "volume"
-                    unit_value = 1000  # ml
-                    unit_desc = "1 liter"
-                elif "ml" in unit_text:
-                    unit_type = "volume"
-                    unit_value = int(''.join(filter(str.isdigit, unit_text)) or 1)
-                    unit_desc = unit_text.upper()
-                elif "stuk" in unit_text or "stuks" in unit_text or "stukken" in unit_text:
-                    unit_type = "piece"
-                    unit_value = 1
-                    unit_desc = "per stuk"
-                else:
-                    unit_type = "package"
-                    unit_value = 1
-                    unit_desc = unit_text
+                unit = normalize_unit(spans[-1])
+                unit_type, unit_value, unit_desc = unit.unit_type, unit.unit_value, unit.unit_description
             else:
                 logger.warning("Expected 3 spans in price-per-unit for %s, found %d", key, len(spans))
                 unit_type = unit_value = unit_desc = None
@@ -117,29 +409,14 @@ class JumboHTMLParser:
 
         # 5. Find product description (if any)
         description = None
-        desc_div = soup.find("div", attrs={"data-testid": "product-description-text-body"})
-        if desc_div:
-            parts = []
-            for el in desc_div.find_all(["p", "li"]):
-                text = el.get_text(separator=" ", strip=True)
-                if text:
-                    parts.append(text)
-            if parts:
-                description = "\n".join(parts)
+        if page.description_parts:
+            description = "\n".join(page.description_parts)
         
         # 6. Find land of origin of a specific product
-        origin_div = soup.find("div", attrs={"data-testid":"origin-collapsible"})
         country_of_origin = None
-        if origin_div:
-            inner_div = origin_div.find("div")
-            if inner_div:
-                content_div = inner_div.find("div", class_="content")
-                if content_div:
-                    p_tag = content_div.find("p")
-                    if p_tag:
-                        origin_text = p_tag.get_text(strip=True)
-                        if origin_text and len(origin_text) < 30:
-                            country_of_origin = origin_text
+        origin_text = page.origin_text
+        if origin_text and len(origin_text) < 30:
+            country_of_origin = origin_text
         
 
         # Putting it all together into a data structure and yielding as a dictionary
@@ -156,24 +433,267 @@ class JumboHTMLParser:
         )
 
         ### ─────────── Nutrition table ─────────── ###
+        nutrition_row = None
+        if page.nutrition_rows:
+            nutrition_row = NutritionRow(
+                product_id = 0,
+                scraped_at = scraped_at,
+                **_nutrition_values(page.nutrition_header, page.nutrition_rows),
+                raw_json = {"header": page.nutrition_header, "rows": page.nutrition_rows}
+            )
 
         ### ─────────── Prices table ─────────── ###
-        
+        price_row = None
+        current_price = _price(page.price_spans)
+        if current_price is None:
+            logger.warning("No price found in %s", key)
+        else:
+            old_price = _price(page.old_price_spans)
+            price_row = PriceRow(
+                product_id = 0,
+                scraped_at = scraped_at,
+                # During a promotion the struck-through price is the regular one
+                regular_price = old_price if old_price is not None else current_price,
+                promo_price = current_price if old_price is not None else None,
+                on_promotion = old_price is not None or bool(page.promo_tags),
+                promo_type = _promo_type(page.promo_tags) or ("discount" if old_price is not None else None),
+                promo_text = "; ".join(page.promo_tags) or None,
+                price_per_kg = _price_per_kg(page.unit_spans) if page.has_price_per_unit else None
+            )
+
         return {
-            "product": prod_row
+            "product": prod_row,
+            "price": price_row,
+            "nutrition": nutrition_row
         }
 
-    def run(self):
-        logger.info("Initializing S3 parser...")
+    def iter_parsed(self, keys: Iterable[str] | None = None,
+                    fetch_workers: int = FETCH_WORKERS,
+                    parse_workers: int = PARSE_WORKERS,
+                    max_in_flight: int = MAX_IN_FLIGHT,
+                    full: bool = False) -> Iterator[tuple[str, dict]]:
+        """
+        Stream (key, result) pairs using a fetch/parse pipeline.
+
+        A thread pool prefetches object bodies with `load_html` and hands them
+        to a process pool running `parse_html`. At most `max_in_flight` keys are
+        fetched or parsed at any time, so memory stays flat no matter how
+        large the prefix is. Results are yielded in completion order.
+
+        Args:
+            keys: Keys to process, defaults to `iterate_pending_keys(full)`.
+            fetch_workers: Number of threads downloading objects.
+            parse_workers: Number of parse processes; 0 parses in this process.
+            max_in_flight: Upper bound on bodies held in memory.
+            full: Ignore the manifest and parse every key.
+        """
+        if keys is None:
+            keys = self.iterate_pending_keys(full)
+        keys = iter(keys)
+        max_in_flight = max(1, max_in_flight)
+
+        # Connect once up front, boto3 clients are thread-safe but creating them is not
+        if self.cache is None or not self.cache.offline:
+            self.s3_connect()
 
-        for key in self.iterate_html_keys():
+        fetch_pool = ThreadPoolExecutor(max_workers=max(1, fetch_workers))
+        parse_pool = None
+        if parse_workers > 0:
+            parse_pool = ProcessPoolExecutor(max_workers=parse_workers,
+                                             initializer=_init_parse_worker,
+                                             initargs=(self.bucket, self.prefix, self.engine, log_queue(), self.minify))
+        fetching = {}
+        parsing = {}
+
+        def fill():
+            while len(fetching) + len(parsing) < max_in_flight:
+                key = next(keys, None)
+                if key is None:
+                    return
+                fetching[fetch_pool.submit(self.load_html, key)] = key
+
+        try:
+            fill()
+            while fetching or parsing:
+                done, _ = wait([*fetching, *parsing], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetching:
+                        key = fetching.pop(future)
+                        try:
+                            body = future.result()
+                        except CacheMiss:
+                            # Offline and not cached: stop instead of skipping the page
+                            raise
+                        except Exception:
+                            logger.exception("Failed to fetch %s", key)
+                            self.stats.failed += 1
+                            continue
+                        digest = self._check_content(key, body)
+                        if digest is None:
+                            continue
+                        # Stamped with the scrape, so re-parsing a page adds no new snapshot
+                        scraped_at = self.scraped_at(key)
+                        if parse_pool is None:
+                            try:
+                                result = self.parse_html(body, key, scraped_at)
+                            except Exception:
+                                logger.exception("Failed to parse %s", key)
+                                self.stats.failed += 1
+                                continue
+                            self._mark_parsed(key, digest)
+                            yield key, result
+                        else:
+                            parsing[parse_pool.submit(_parse_in_worker, body, key, scraped_at)] = (key, digest)
+                    else:
+                        key, digest = parsing.pop(future)
+                        try:
+                            result, worker_metrics = future.result()
+                            METRICS.merge(worker_metrics)
+                        except Exception:
+                            logger.exception("Failed to parse %s", key)
+                            self.stats.failed += 1
+                            continue
+                        self._mark_parsed(key, digest)
+                        yield key, result
+                fill()
+        finally:
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            if parse_pool is not None:
+                parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_parsed_sequential(self, full: bool = False) -> Iterator[tuple[str, dict]]:
+        for key in self.iterate_pending_keys(full):
             html = self.load_html(key)
-            result = self.parse_html(html, key)
-        
-        logger.info("S3 fully parsed.")
+            digest = self._check_content(key, html)
+            if digest is None:
+                continue
+            result = self.parse_html(html, key, self.scraped_at(key))
+            self._mark_parsed(key, digest)
+            yield key, result
+
+    def run(self, pipelined: bool = False,
+            fetch_workers: int = FETCH_WORKERS,
+            parse_workers: int = PARSE_WORKERS,
+            max_in_flight: int = MAX_IN_FLIGHT,
+            full: bool = False,
+            batch_size: int = BATCH_SIZE,
+            commit_every: int = COMMIT_EVERY,
+            metrics_path: str | Path | None = None,
+            prometheus_path: str | Path | None = None) -> ManifestStats:
+        logger.info("Initializing S3 parser...")
+        self.stats = ManifestStats()
+        if self.snapshots is not None:
+            self.snapshots.stats = DiffStats()
+        METRICS.reset()
+
+        loader = None
+        if is_database_url(self.db_link):
+            loader = CatalogLoader.from_url(self.db_link, batch_size=batch_size, commit_every=commit_every)
+            if self.manifest is not None:
+                self.manifest.commit_every = None
+            # Only mark objects as parsed, and snapshots as known, once their rows are committed
+            loader.on_commit = self._on_commit
+        else:
+            logger.warning("No database configured (%s), parse results are not stored", self.db_link)
+
+        try:
+            if pipelined:
+                logger.info("Pipelined mode: %d fetch workers, %d parse workers, %d in flight",
+                            fetch_workers, parse_workers, max_in_flight)
+                results = self.iter_parsed(fetch_workers=fetch_workers,
+                                           parse_workers=parse_workers,
+                                           max_in_flight=max_in_flight,
+                                           full=full)
+            else:
+                results = self._iter_parsed_sequential(full)
+
+            for key, result in results:
+                if loader is not None:
+                    if self.snapshots is not None:
+                        result = self.snapshots.diff(result)
+                    loader.add(result)
+            if loader is not None:
+                loader.close()
+                logger.info("Loaded %d products in %d batches", loader.stats.products, loader.stats.batches)
+                if self.snapshots is not None:
+                    logger.info("Snapshots: %d changed, %d unchanged and not written",
+                                self.snapshots.stats.changed, self.snapshots.stats.unchanged)
+                if self.catalog_index is not None and loader.product_ids:
+                    with timer("etl.catalog_index"):
+                        export_index(self.db_link, self.catalog_index, loader.product_ids.values())
+        finally:
+            if self.manifest is not None and loader is None:
+                self.manifest.flush()
+
+        logger.info("S3 fully parsed: %d listed, %d processed, %d skipped, %d failed",
+                    self.stats.listed, self.stats.processed, self.stats.skipped, self.stats.failed)
+        if metrics_path is not None:
+            METRICS.write_summary(metrics_path)
+            logger.info("Run metrics written to %s", metrics_path)
+        if prometheus_path is not None:
+            Path(prometheus_path).write_text(METRICS.to_prometheus())
+        return self.stats
+
+    def _on_commit(self):
+        if self.manifest is not None:
+            self.manifest.flush()
+        if self.snapshots is not None:
+            self.snapshots.flush()
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Parse Jumbo product pages stored in S3")
+    arg_parser.add_argument("--pipelined", action="store_true",
+                            help="Fetch and parse pages concurrently")
+    arg_parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    arg_parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS)
+    arg_parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    arg_parser.add_argument("--engine", choices=sorted(ENGINES), default=ENGINE,
+                            help="HTML extraction engine")
+    arg_parser.add_argument("--manifest", type=Path, default=None,
+                            help="SQLite manifest enabling incremental runs")
+    arg_parser.add_argument("--full", action="store_true",
+                            help="Re-parse every object even if the manifest says it is unchanged")
+    arg_parser.add_argument("--archive-dir", type=Path, default=None,
+                            help="Local folder for archive shards; without it pages are read with ranged GETs")
+    arg_parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR,
+                            help="Local read-through cache of S3 objects, defaults to ETL_CACHE_DIR")
+    arg_parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_MB,
+                            help="Size cap of the cache; least recently read objects are evicted")
+    arg_parser.add_argument("--offline", action="store_true",
+                            help="Only read the cache, fail on the first object that is not in it")
+    arg_parser.add_argument("--snapshot-index", type=Path, default=None,
+                            help="SQLite index of the last price/nutrition per product; unchanged ones are not loaded")
+    arg_parser.add_argument("--catalog-index", type=Path, default=None,
+                            help="Directory of the agent's catalog index, updated after the load")
+    arg_parser.add_argument("--minify", action="store_true",
+                            help="Strip scripts, styles and SVGs before parsing (see shared/html_minify.py)")
+    arg_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help="Parse results per COPY/upsert batch")
+    arg_parser.add_argument("--commit-every", type=int, default=COMMIT_EVERY,
+                            help="Batches per database transaction")
+    arg_parser.add_argument("--metrics", type=Path, default=None,
+                            help="Write a JSON summary of stage timings, bytes and rates to this file")
+    arg_parser.add_argument("--prometheus", type=Path, default=None,
+                            help="Also write the metrics in Prometheus text format to this file")
+    return arg_parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    parser = JumboHTMLParser(Bucket, Prefix, db_url)
-    parser.run()
+    args = parse_args()
+    parser = JumboHTMLParser(Bucket, Prefix, db_url, engine=args.engine, manifest_path=args.manifest,
+                             archive_dir=args.archive_dir, cache_dir=args.cache_dir,
+                             cache_max_bytes=args.cache_max_mb * 1024 * 1024, offline=args.offline,
+                             snapshot_index_path=args.snapshot_index, catalog_index_path=args.catalog_index,
+                             minify=args.minify)
+    stats = parser.run(pipelined=args.pipelined,
+                       fetch_workers=args.fetch_workers,
+                       parse_workers=args.parse_workers,
+                       max_in_flight=args.max_in_flight,
+                       full=args.full,
+                       batch_size=args.batch_size,
+                       commit_every=args.commit_every,
+                       metrics_path=args.metrics,
+                       prometheus_path=args.prometheus)
+    print(f"Processed {stats.processed}, skipped {stats.skipped} unchanged, failed {stats.failed}")
 
@@ -0,0 +1,298 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable
+import json
+import logging
+import sqlite3
+from shared.metrics import inc, timer
+from shared.models import ProductRow, PriceRow, NutritionRow
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────── Column layout ─────────── #
+# Staging tables carry external_sku instead of product_id; the id is resolved
+# with a join against food.products when the batch is merged.
+PRODUCT_COLUMNS = ["store_id", "external_sku", "name", "category", "unit_type", "unit_value",
+                   "unit_description", "description", "country_of_origin"]
+PRICE_COLUMNS = ["scraped_at", "regular_price", "promo_price", "on_promotion", "promo_type",
+                 "promo_text", "price_per_kg"]
+NUTRITION_COLUMNS = ["scraped_at", "kcal_per_100g", "protein_per_100g", "fat_per_100g", "carbs_per_100g",
+                     "sodium_per_100g", "fiber_per_100g", "sugar_per_100g", "raw_json"]
+
+STAGING_DDL = {
+    "stage_products": """
+        store_id int, external_sku text, name text, category text, unit_type text, unit_value numeric,
+        unit_description text, description text, country_of_origin text
+    """,
+    "stage_prices": """
+        external_sku text, scraped_at timestamp, regular_price numeric, promo_price numeric,
+        on_promotion boolean, promo_type text, promo_text text, price_per_kg numeric
+    """,
+    "stage_nutrition": """
+        external_sku text, scraped_at timestamp, kcal_per_100g numeric, protein_per_100g numeric,
+        fat_per_100g numeric, carbs_per_100g numeric, sodium_per_100g numeric, fiber_per_100g numeric,
+        sugar_per_100g numeric, raw_json text
+    """,
+}
+
+# `WHERE true` keeps SQLite from reading ON CONFLICT as part of the SELECT
+UPSERT_PRODUCTS = f"""
+    INSERT INTO food.products ({", ".join(PRODUCT_COLUMNS)})
+    SELECT {", ".join(PRODUCT_COLUMNS)} FROM stage_products WHERE true
+    ON CONFLICT (external_sku) DO UPDATE SET
+        {", ".join(f"{col} = excluded.{col}" for col in PRODUCT_COLUMNS if col != "external_sku")}
+"""
+
+LOOKUP_PRODUCT_IDS = """
+    SELECT s.external_sku, p.product_id
+    FROM stage_products s JOIN food.products p ON p.external_sku = s.external_sku
+"""
+
+INSERT_PRICES = f"""
+    INSERT INTO food.prices (product_id, {", ".join(PRICE_COLUMNS)})
+    SELECT p.product_id, {", ".join(f"s.{col}" for col in PRICE_COLUMNS)}
+    FROM stage_prices s JOIN food.products p ON p.external_sku = s.external_sku WHERE true
+    ON CONFLICT (product_id, scraped_at) DO NOTHING
+"""
+
+INSERT_NUTRITION = """
+    INSERT INTO food.nutrition (product_id, {columns})
+    SELECT p.product_id, {selected}
+    FROM stage_nutrition s JOIN food.products p ON p.external_sku = s.external_sku WHERE true
+    ON CONFLICT (product_id, scraped_at) DO NOTHING
+"""
+
+
+# ─────────── Dialects ─────────── #
+class PostgresDialect:
+    name = "postgres"
+    json_cast = "::jsonb"
+    placeholder = "%s"
+
+    def adapt(self, value):
+        return value
+
+    def create_staging(self, cur, table: str, ddl: str):
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} ({ddl})")
+        cur.execute(f"TRUNCATE {table}")
+
+    def stage(self, cur, table: str, columns: list[str], rows: list[tuple]):
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+class SQLiteDialect:
+    """Stand-in for tests and local runs; SQLite has no COPY so staging uses executemany."""
+    name = "sqlite"
+    json_cast = ""
+    placeholder = "?"
+
+    def adapt(self, value):
+        return _sqlite_value(value)
+
+    def create_staging(self, cur, table: str, ddl: str):
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {table} ({ddl})")
+        cur.execute(f"DELETE FROM {table}")
+
+    def stage(self, cur, table: str, columns: list[str], rows: list[tuple]):
+        placeholders = ", ".join("?" for _ in columns)
+        cur.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                        [tuple(self.adapt(value) for value in row) for row in rows])
+
+
+def _sqlite_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+# SQLite version of backend/database/create_tables.sql, attached as schema "food"
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS food.products (
+        product_id INTEGER PRIMARY KEY AUTOINCREMENT, store_id int NOT NULL,
+        external_sku varchar(120) NOT NULL UNIQUE, name text, category text, unit_type varchar(20),
+        unit_value numeric(10,2), unit_description varchar(50), description text,
+        created_at timestamp DEFAULT CURRENT_TIMESTAMP, country_of_origin text
+    );
+    CREATE TABLE IF NOT EXISTS food.prices (
+        price_id INTEGER PRIMARY KEY AUTOINCREMENT, product_id int NOT NULL REFERENCES products(product_id),
+        scraped_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP, regular_price numeric(10,2),
+        promo_price numeric(10,2), on_promotion boolean NOT NULL, promo_type varchar(40), promo_text text,
+        price_per_kg numeric(10,2), UNIQUE (product_id, scraped_at)
+    );
+    CREATE TABLE IF NOT EXISTS food.nutrition (
+        nutrition_id INTEGER PRIMARY KEY AUTOINCREMENT, product_id int NOT NULL REFERENCES products(product_id),
+        scraped_at timestamp DEFAULT CURRENT_TIMESTAMP, kcal_per_100g numeric(10,2),
+        protein_per_100g numeric(10,2), fat_per_100g numeric(10,2), carbs_per_100g numeric(10,2),
+        sodium_per_100g numeric(10,2), fiber_per_100g numeric(10,2), sugar_per_100g numeric(10,2),
+        raw_json text, UNIQUE (product_id, scraped_at)
+    );
+"""
+
+
+def connect(db_url: str):
+    """
+    Open a connection for `db_url` and return (connection, dialect).
+
+    postgresql://... uses psycopg (v3), sqlite:///path (or sqlite:// for an
+    in-memory database) uses the SQLite stand-in with the food schema attached.
+    """
+    if db_url.startswith(("postgres://", "postgresql://")):
+        import psycopg  # only needed when loading into Postgres
+        return psycopg.connect(db_url), PostgresDialect()
+    if db_url.startswith("sqlite://"):
+        path = db_url.removeprefix("sqlite://").removeprefix("/") or ":memory:"
+        conn = sqlite3.connect(":memory:")
+        conn.execute("ATTACH DATABASE ? AS food", (path,))
+        conn.executescript(SQLITE_SCHEMA)
+        return conn, SQLiteDialect()
+    raise ValueError(f"Unsupported database url {db_url!r}")
+
+
+def is_database_url(db_url: str | None) -> bool:
+    return bool(db_url) and db_url.startswith(("postgres://", "postgresql://", "sqlite://"))
+
+
+# ─────────── Loader ─────────── #
+@dataclass
+class LoaderStats:
+    batches: int = 0
+    commits: int = 0
+    products: int = 0
+    prices: int = 0
+    nutrition: int = 0
+
+
+class CatalogLoader:
+    """
+    Batches parse results and upserts them into food.products/prices/nutrition.
+
+    Each batch is staged in temp tables (COPY on Postgres) and merged with one
+    INSERT ... SELECT per table, so the number of statements does not grow
+    with the number of rows. Prices and nutrition find their product_id by
+    joining the staged external_sku against food.products.
+
+    Args:
+        conn: DB-API connection (see `connect`).
+        dialect: PostgresDialect or SQLiteDialect matching `conn`.
+        batch_size: Parse results per staged batch.
+        commit_every: Batches per transaction.
+        on_commit: Called after every commit, e.g. to flush the parse manifest.
+    """
+
+    def __init__(self, conn, dialect, batch_size: int = 1000, commit_every: int = 10,
+                 on_commit: Callable[[], None] | None = None):
+        self.conn = conn
+        self.dialect = dialect
+        self.batch_size = max(1, batch_size)
+        self.commit_every = max(1, commit_every)
+        self.on_commit = on_commit
+        self.stats = LoaderStats()
+        self.product_ids: dict[str, int] = {}
+        self._products: dict[str, ProductRow] = {}
+        self._prices: dict[tuple, tuple] = {}
+        self._nutrition: dict[tuple, tuple] = {}
+        self._uncommitted = 0
+        self._owns_conn = False
+
+    @classmethod
+    def from_url(cls, db_url: str, **kwargs) -> "CatalogLoader":
+        conn, dialect = connect(db_url)
+        loader = cls(conn, dialect, **kwargs)
+        loader._owns_conn = True
+        return loader
+
+    def add(self, result: dict):
+        """Queue one `parse_html` result ({"product": ..., "price": ..., "nutrition": ...})."""
+        product: ProductRow = result["product"]
+        sku = product.external_sku
+        # Later results for the same SKU win, ON CONFLICT may not touch a row twice per statement
+        self._products[sku] = product
+
+        price: PriceRow | None = result.get("price")
+        if price is not None:
+            self._prices[(sku, price.scraped_at)] = (
+                sku, *(getattr(price, col) for col in PRICE_COLUMNS)
+            )
+
+        nutrition: NutritionRow | None = result.get("nutrition")
+        if nutrition is not None:
+            raw_json = nutrition.raw_json
+            if raw_json is not None and not isinstance(raw_json, str):
+                raw_json = json.dumps(raw_json, ensure_ascii=False)
+            self._nutrition[(sku, nutrition.scraped_at)] = (
+                sku, *(getattr(nutrition, col) for col in NUTRITION_COLUMNS[:-1]), raw_json
+            )
+
+        if len(self._products) >= self.batch_size:
+            self.flush()
+
+    def add_all(self, results: Iterable[dict]):
+        for result in results:
+            self.add(result)
+
+    def flush(self):
+        """Write the queued batch; commits once `commit_every` batches are pending."""
+        if not self._products:
+            return
+        products = [tuple(getattr(row, col) for col in PRODUCT_COLUMNS) for row in self._products.values()]
+        prices = list(self._prices.values())
+        nutrition = list(self._nutrition.values())
+        self._products.clear()
+        self._prices.clear()
+        self._nutrition.clear()
+
+        cur = self.conn.cursor()
+        try:
+            with timer("db.flush"):
+                for table, ddl in STAGING_DDL.items():
+                    self.dialect.create_staging(cur, table, ddl)
+
+                self.dialect.stage(cur, "stage_products", PRODUCT_COLUMNS, products)
+                cur.execute(UPSERT_PRODUCTS)
+                cur.execute(LOOKUP_PRODUCT_IDS)
+                self.product_ids.update(cur.fetchall())
+
+                if prices:
+                    self.dialect.stage(cur, "stage_prices", ["external_sku", *PRICE_COLUMNS], prices)
+                    cur.execute(INSERT_PRICES)
+                if nutrition:
+                    self.dialect.stage(cur, "stage_nutrition", ["external_sku", *NUTRITION_COLUMNS], nutrition)
+                    selected = [f"s.{col}" for col in NUTRITION_COLUMNS[:-1]]
+                    selected.append(f"s.raw_json{self.dialect.json_cast}")
+                    cur.execute(INSERT_NUTRITION.format(columns=", ".join(NUTRITION_COLUMNS),
+                                                        selected=", ".join(selected)))
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+        inc("db.rows", len(products) + len(prices) + len(nutrition))
+        self.stats.batches += 1
+        self.stats.products += len(products)
+        self.stats.prices += len(prices)
+        self.stats.nutrition += len(nutrition)
+        logger.info("Staged batch of %d products, %d prices, %d nutrition rows",
+                    len(products), len(prices), len(nutrition))
+
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        with timer("db.commit"):
+            self.conn.commit()
+        self._uncommitted = 0
+        self.stats.commits += 1
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def close(self):
+        """Write and commit what is left; closes the connection if `from_url` opened it."""
+        self.flush()
+        self.commit()
+        if self._owns_conn:
+            self.conn.close()
@@ -0,0 +1,108 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import sqlite3
+
+
+# ─────────── Run statistics ─────────── #
+@dataclass
+class ManifestStats:
+    listed: int = 0       # .html objects returned by list_objects_v2
+    skipped: int = 0      # unchanged since the last run, not parsed
+    processed: int = 0    # parsed successfully
+    failed: int = 0       # fetch or parse raised
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+# ─────────── Manifest ─────────── #
+class ParseManifest:
+    """
+    SQLite record of every S3 object that was parsed successfully.
+
+    Objects whose ETag and size still match the listing are skipped without
+    being downloaded. The content hash catches re-uploads of identical pages,
+    which get a new ETag/LastModified but need no re-parse.
+    """
+
+    def __init__(self, path: str | Path, commit_every: int | None = 500):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS objects (
+                key           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                size          INTEGER,
+                content_hash  TEXT,
+                parsed_at     TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def _lookup(self, key: str):
+        return self._conn.execute(
+            "SELECT etag, last_modified, size, content_hash FROM objects WHERE key = ?", (key,)
+        ).fetchone()
+
+    def is_unchanged(self, obj: dict) -> bool:
+        """True if `obj` (a list_objects_v2 entry) matches what was parsed last time."""
+        row = self._lookup(obj["Key"])
+        if row is None:
+            return False
+        etag, last_modified, size, _ = row
+        if obj.get("Size") is not None and obj["Size"] != size:
+            return False
+        if obj.get("ETag"):
+            return obj["ETag"] == etag
+        return _timestamp(obj.get("LastModified")) == last_modified
+
+    def has_content(self, key: str, digest: str) -> bool:
+        row = self._lookup(key)
+        return row is not None and row[3] == digest
+
+    def record(self, obj: dict, digest: str | None):
+        self._conn.execute(
+            """
+            INSERT INTO objects (key, etag, last_modified, size, content_hash, parsed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                size = excluded.size,
+                content_hash = excluded.content_hash,
+                parsed_at = excluded.parsed_at
+            """,
+            (obj["Key"], obj.get("ETag"), _timestamp(obj.get("LastModified")), obj.get("Size"),
+             digest, datetime.utcnow().isoformat()),
+        )
+        self._pending += 1
+        # commit_every=None leaves commits to the caller (see CatalogLoader.on_commit)
+        if self.commit_every and self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+
+def _timestamp(value) -> str | None:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
@@ -0,0 +1,185 @@
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterable, Iterator
+import hashlib
+import json
+import sqlite3
+from shared.metrics import inc
+from shared.models import PriceRow, NutritionRow
+from data_processing.ETL.Jumbo.loader import PRICE_COLUMNS, NUTRITION_COLUMNS
+
+
+# ─────────── Fingerprints ─────────── #
+# Everything but product_id and scraped_at: two snapshots with the same fingerprint are the same row
+PRICE_VALUES = PRICE_COLUMNS[1:]
+NUTRITION_VALUES = NUTRITION_COLUMNS[1:]
+KINDS = {"price": PRICE_VALUES, "nutrition": NUTRITION_VALUES}
+
+
+def fingerprint(row: PriceRow | NutritionRow, columns: list[str]) -> int:
+    """64-bit digest of the value columns of `row`, signed so it fits an SQLite INTEGER."""
+    values = []
+    for col in columns:
+        value = getattr(row, col)
+        if col == "raw_json" and value is not None and not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        values.append(value)
+    digest = hashlib.blake2b(repr(values).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# ─────────── Run statistics ─────────── #
+@dataclass
+class DiffStats:
+    changed: int = 0      # price/nutrition rows passed on to the loader
+    unchanged: int = 0    # same values as the last snapshot, dropped
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# ─────────── Snapshot index ─────────── #
+class SnapshotIndex:
+    """
+    Last-known price and nutrition fingerprint of every product, by external_sku.
+
+    Sits between parsing and CatalogLoader: `diff` drops the price and
+    nutrition rows of a parse result when they equal the last snapshot, so
+    food.prices and food.nutrition only grow when something changes. The
+    fingerprints live in a dict and are persisted to SQLite (`path`; None
+    keeps them in memory). Flush only after the loader committed the rows,
+    or a crash could remember snapshots that never reached the database.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.stats = DiffStats()
+        self._conn = sqlite3.connect(self.path or ":memory:")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                kind         TEXT NOT NULL,
+                external_sku TEXT NOT NULL,
+                fingerprint  INTEGER NOT NULL,
+                scraped_at   TEXT,
+                PRIMARY KEY (kind, external_sku)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+        self._last: dict[str, dict[str, int]] = {kind: {} for kind in KINDS}
+        for kind, sku, value in self._conn.execute("SELECT kind, external_sku, fingerprint FROM snapshots"):
+            self._last[kind][sku] = value
+        self._pending: dict[tuple[str, str], tuple[int, str]] = {}
+
+    def diff(self, result: dict) -> dict:
+        """
+        `result` (a parse_html result) without the rows that did not change.
+        Changed rows are recorded as the new last snapshot.
+        """
+        sku = result["product"].external_sku
+        diffed = dict(result)
+        for kind, columns in KINDS.items():
+            row = result.get(kind)
+            if row is None:
+                continue
+            value = fingerprint(row, columns)
+            if self._last[kind].get(sku) == value:
+                diffed[kind] = None
+                self.stats.unchanged += 1
+                inc(f"diff.{kind}.unchanged")
+            else:
+                self._last[kind][sku] = value
+                self._pending[(kind, sku)] = (value, row.scraped_at.isoformat())
+                self.stats.changed += 1
+                inc(f"diff.{kind}.changed")
+        return diffed
+
+    def diff_all(self, results: Iterable[dict]) -> Iterator[dict]:
+        for result in results:
+            yield self.diff(result)
+
+    def flush(self):
+        if self._pending:
+            self._conn.executemany(
+                """
+                INSERT INTO snapshots (kind, external_sku, fingerprint, scraped_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (kind, external_sku) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    scraped_at = excluded.scraped_at
+                """,
+                [(kind, sku, value, scraped_at) for (kind, sku), (value, scraped_at) in self._pending.items()],
+            )
+            self._pending.clear()
+        self._conn.commit()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return len(set(self._last["price"]) | set(self._last["nutrition"]))
+
+
+# ─────────── Point-in-time queries ─────────── #
+SNAPSHOT_AT = """
+    SELECT t.product_id, {columns} FROM food.{table} t
+    JOIN (
+        SELECT product_id, MAX(scraped_at) AS scraped_at FROM food.{table}
+        WHERE scraped_at <= {p}{products} GROUP BY product_id
+    ) latest ON latest.product_id = t.product_id AND latest.scraped_at = t.scraped_at
+"""
+
+
+def _from_db(row_type: type, values: tuple):
+    # SQLite returns timestamps as text and booleans as ints, Postgres numerics as Decimal
+    converted = {}
+    for f, value in zip(fields(row_type), values):
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif f.name == "scraped_at" and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif f.name == "on_promotion" and value is not None:
+            value = bool(value)
+        elif f.name == "raw_json" and isinstance(value, str):
+            value = json.loads(value)
+        converted[f.name] = value
+    return row_type(**converted)
+
+
+def _snapshot_at(conn, dialect, table: str, row_type: type, at: datetime,
+                 product_ids: Iterable[int] | None) -> dict[int, object]:
+    columns = [f.name for f in fields(row_type)][1:]
+    params = [dialect.adapt(at)]
+    products = ""
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        products = f" AND product_id IN ({', '.join(dialect.placeholder for _ in product_ids)})"
+        params.extend(product_ids)
+    sql = SNAPSHOT_AT.format(columns=", ".join(f"t.{col}" for col in columns), table=table,
+                             p=dialect.placeholder, products=products)
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        return {row[0]: _from_db(row_type, row) for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def prices_at(conn, dialect, at: datetime, product_ids: Iterable[int] | None = None) -> dict[int, PriceRow]:
+    """
+    The price of every product (or of `product_ids`) as it was at `at`: the
+    latest snapshot scraped at or before that moment. Products first seen
+    after `at` are missing from the result.
+    """
+    return _snapshot_at(conn, dialect, "prices", PriceRow, at, product_ids)
+
+
+def nutrition_at(conn, dialect, at: datetime,
+                 product_ids: Iterable[int] | None = None) -> dict[int, NutritionRow]:
+    """Like `prices_at`, for food.nutrition."""
+    return _snapshot_at(conn, dialect, "nutrition", NutritionRow, at, product_ids)
@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
+import argparse
+import logging
+import os
+import re
+from data_processing.ETL.Jumbo.loader import connect
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────── Unit vocabulary ─────────── #
+@dataclass(slots=True, frozen=True)
+class Unit:
+    # products.unit_type / unit_value / unit_description
+    unit_type: str               # 'weight' (grams), 'volume' (ml), 'piece' or 'package'
+    unit_value: int | float
+    unit_description: str
+
+
+# token -> (unit_type, grams/ml/pieces per unit)
+UNITS = {
+    "kilo": ("weight", 1000), "kilogram": ("weight", 1000), "kg": ("weight", 1000),
+    "gram": ("weight", 1), "grams": ("weight", 1), "gr": ("weight", 1), "g": ("weight", 1),
+    "liter": ("volume", 1000), "litre": ("volume", 1000), "ltr": ("volume", 1000), "l": ("volume", 1000),
+    "dl": ("volume", 100), "cl": ("volume", 10),
+    "ml": ("volume", 1), "milliliter": ("volume", 1),
+    "stuk": ("piece", 1), "stuks": ("piece", 1), "stukken": ("piece", 1), "st": ("piece", 1),
+}
+
+# "[per] [6 x] [330] ml", e.g. "kilo", "per stuk", "100 gram", "6 x 330 ml", "1,5 l"
+_GRAMMAR = re.compile(r"""
+    ^(?:per\s+)?
+    (?:(?P<count>\d+)\s*[x×]\s*)?
+    (?P<amount>\d+(?:[.,]\d+)?)?\s*
+    (?P<unit>[a-z]+)\.?$
+""", re.X)
+# Texts outside the grammar, e.g. "kilo (uitgelekt)", fall back to the first unit word in them
+_UNIT_WORD = re.compile(r"\b(" + "|".join(sorted(UNITS, key=len, reverse=True)) + r")\b")
+# unit_description written by earlier versions for amounts, e.g. "1 100 GRAM"
+_LEGACY_PREFIX = re.compile(r"^1 (?=\d)")
+
+CACHE_SIZE = 4096
+
+
+def _whole(value: float) -> int | float:
+    return int(value) if float(value).is_integer() else round(value, 2)
+
+
+def _describe(text: str, unit: str, unit_type: str, factor: int, count: int | None, amount: float | None) -> str:
+    if count is not None:
+        return f"{count} x {_whole(amount or 1)} {unit}"
+    if unit_type == "piece":
+        return "per stuk" if amount in (None, 1) else f"{_whole(amount)} stuks"
+    if factor == 1000:
+        name = "kilogram" if unit_type == "weight" else "liter"
+        return f"{_whole(amount or 1)} {name}"
+    if unit_type == "weight" and amount is None:
+        return f"1 {text.upper()}"
+    return text.upper()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_unit(unit_text: str) -> Unit:
+    """
+    Classify the unit of a price-per-unit block, e.g. "kilo" -> weight, 1000
+    grams, "1 kilogram". Weight is in grams, volume in ml; multipacks such as
+    "6 x 330 ml" count every item. Anything unknown is a 'package' of one.
+    Results are cached, the site uses a handful of spellings.
+    """
+    text = " ".join(unit_text.lower().split())
+    match = _GRAMMAR.match(text)
+    if match is None or match["unit"] not in UNITS:
+        word = _UNIT_WORD.search(text)
+        if word is None:
+            return Unit("package", 1, text)
+        match = _GRAMMAR.match(word.group(1))
+
+    unit = match["unit"]
+    unit_type, factor = UNITS[unit]
+    count = int(match["count"]) if match["count"] else None
+    amount = float(match["amount"].replace(",", ".")) if match["amount"] else None
+    value = (count or 1) * (amount if amount is not None else 1) * factor
+    return Unit(unit_type, _whole(value), _describe(text, unit, unit_type, factor, count, amount))
+
+
+def normalize_units(unit_texts: Iterable[str]) -> list[Unit]:
+    """`normalize_unit` for many texts at once; each distinct text is classified once."""
+    unit_texts = list(unit_texts)
+    distinct = {text: normalize_unit(text) for text in set(unit_texts)}
+    return [distinct[text] for text in unit_texts]
+
+
+# ─────────── Bulk re-normalization ─────────── #
+SELECT_UNITS = """
+    SELECT product_id, unit_type, unit_value, unit_description FROM food.products
+    WHERE unit_description IS NOT NULL AND product_id > {placeholder}
+    ORDER BY product_id LIMIT {batch_size}
+"""
+UPDATE_UNITS = """
+    UPDATE food.products SET unit_type = {p}, unit_value = {p}, unit_description = {p} WHERE product_id = {p}
+"""
+
+
+def _changed(row: tuple, unit: Unit) -> bool:
+    _, unit_type, unit_value, description = row
+    # numeric columns come back as Decimal from Postgres
+    stored_value = float(unit_value) if unit_value is not None else None
+    return (unit_type, stored_value, description) != (unit.unit_type, float(unit.unit_value), unit.unit_description)
+
+
+def renormalize_products(conn, dialect, batch_size: int = 10_000) -> int:
+    """
+    Re-classify unit_type/unit_value/unit_description of every food.products
+    row from its stored unit_description, in batches of `batch_size` rows.
+    Only rows whose values change are written. Returns the number of rows updated.
+
+    Args:
+        conn: DB-API connection (see loader.connect).
+        dialect: PostgresDialect or SQLiteDialect matching `conn`.
+    """
+    select = SELECT_UNITS.format(placeholder=dialect.placeholder, batch_size=int(batch_size))
+    update = UPDATE_UNITS.format(p=dialect.placeholder)
+    updated = 0
+    last_id = 0
+    cur = conn.cursor()
+    try:
+        while True:
+            cur.execute(select, (last_id,))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            units = normalize_units(_LEGACY_PREFIX.sub("", description) for _, _, _, description in rows)
+            changes = [(unit.unit_type, unit.unit_value, unit.unit_description, row[0])
+                       for row, unit in zip(rows, units) if _changed(row, unit)]
+            if changes:
+                cur.executemany(update, changes)
+            updated += len(changes)
+            conn.commit()
+            logger.info("Re-normalized units up to product_id %s, %d rows changed so far", last_id, updated)
+    finally:
+        cur.close()
+    return updated
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Re-normalize the units of every row in food.products")
+    arg_parser.add_argument("--db-url", default=os.getenv("DB_URL"),
+                            help="postgresql://... or sqlite:///path, defaults to DB_URL")
+    arg_parser.add_argument("--batch-size", type=int, default=10_000)
+    args = arg_parser.parse_args(argv)
+    if not args.db_url:
+        arg_parser.error("--db-url or DB_URL is required")
+
+    conn, dialect = connect(args.db_url)
+    try:
+        print(f"Updated {renormalize_products(conn, dialect, args.batch_size)} products")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
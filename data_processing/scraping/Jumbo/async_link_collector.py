@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import httpx
+import yaml
+
+# shared/ lives at the repository root (or next to Jumbo/ in the scraping image)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from link_collector import (CONFIG_PATH, HEADERS, LINKS_FOLDER, MAX_OFFSET, PAGE_SIZE,
+                            extract_links, write_links)
+from rate_limiter import HostRateLimiter
+from shared.metrics import METRICS, inc, timer
+
+# Requests per second per host; the sequential collector sleeps 3 s between pages
+RATE_PER_HOST = 2.0
+BURST = 4
+CONCURRENCY = 16
+RETRY_WAIT = 5     # seconds between tries of a page
+
+
+async def fetch(client, limiter, semaphore, url, tries=3, wait=RETRY_WAIT):
+    for _ in range(tries):
+        await limiter.acquire(url)
+        async with semaphore:
+            try:
+                with timer("http.fetch"):
+                    resp = await client.get(url)
+                inc("http.fetch.bytes", len(resp.content))
+                return resp
+            except httpx.HTTPError:
+                # Timeouts, refused or reset connections: retried like the sequential collector's timeouts
+                inc("http.fetch.errors")
+        await asyncio.sleep(wait)
+    return None
+
+
+async def collect_category(client, limiter, semaphore, cat_name, cat_url, retry_wait=RETRY_WAIT):
+    """Walk the ?offSet= pages of one category until a page brings no new links."""
+    all_links = set()
+    offset = 0
+
+    while offset < MAX_OFFSET:
+        url = f"{cat_url}?offSet={offset}"
+        resp = await fetch(client, limiter, semaphore, url, wait=retry_wait)
+        print(f"🔎 Fetched {url}")
+
+        if resp is None or resp.status_code != 200:
+            print(f"HTTP {getattr(resp, 'status_code', 'timeout')}. Stopping {cat_name}")
+            break
+
+        new_links = extract_links(resp.text)
+
+        if not new_links.difference(all_links):
+            print(f"✅No new links found at offset={offset}. Stopping the search for {url}")
+            break
+
+        all_links |= new_links
+        offset += PAGE_SIZE
+
+    return all_links
+
+
+async def collect_all(categories, rate=RATE_PER_HOST, burst=BURST, concurrency=CONCURRENCY,
+                      folder=LINKS_FOLDER, retry_wait=RETRY_WAIT):
+    """
+    Crawl every category at once over one pooled HTTP client.
+
+    Categories run concurrently; pages within a category stay sequential so the
+    "stop when no new links" rule still applies per category. Total requests
+    are capped by `concurrency` and each host by a token bucket of `rate`/s.
+    Each category's CSV is written as soon as that category is done, so one
+    that fails does not cost the others their links.
+    Returns {category name: set of links}.
+    """
+    limiter = HostRateLimiter(rate, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    links = {}
+
+    async def collect(client, cat):
+        cat_links = await collect_category(client, limiter, semaphore, cat["name"], cat["url"], retry_wait)
+        links[cat["name"]] = cat_links
+        if folder is not None:
+            write_links(cat["name"], cat_links, folder)
+
+    async with httpx.AsyncClient(headers=HEADERS, timeout=30, limits=limits,
+                                 follow_redirects=True) as client:
+        await asyncio.gather(*(collect(client, cat) for cat in categories))
+    return {cat["name"]: links[cat["name"]] for cat in categories}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Collect Jumbo product links for all categories concurrently")
+    arg_parser.add_argument("--config", default=CONFIG_PATH)
+    arg_parser.add_argument("--out", default=LINKS_FOLDER)
+    arg_parser.add_argument("--rate", type=float, default=RATE_PER_HOST, help="Requests per second per host")
+    arg_parser.add_argument("--burst", type=int, default=BURST)
+    arg_parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    arg_parser.add_argument("--metrics", default=None, help="Write a JSON summary of fetch timings to this file")
+    args = arg_parser.parse_args()
+
+    with open(args.config, "r", encoding='utf-8') as f:
+        categories = yaml.safe_load(f).get("categories", [])
+
+    os.makedirs(args.out, exist_ok=True)
+    start = time.perf_counter()
+    links = asyncio.run(collect_all(categories, args.rate, args.burst, args.concurrency, args.out))
+    total = sum(len(cat_links) for cat_links in links.values())
+    print(f"Collected {total} links from {len(links)} categories in {time.perf_counter() - start:.1f}s")
+    if args.metrics:
+        METRICS.write_summary(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Spread link collection and scraping over several containers through a shared work queue.
+
+Each category of the config is one unit: the worker that leases it collects
+the category's links and scrapes them, so adding scraping containers adds
+throughput. Start one coordinator and any number of workers against the
+same queue file (from the Jumbo folder, like run_all.py):
+    python distributed.py submit --queue /queue/scrape.sqlite
+    python distributed.py work --queue /queue/scrape.sqlite --strategy http
+"""
+import argparse
+import os
+import sys
+import yaml
+import boto3
+
+# shared/ lives at the repository root (or next to Jumbo/ in the scraping image)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from link_collector import CONFIG_PATH, LINKS_FOLDER, collect_links
+from scraper import (CHECKPOINT_FILE, PAGE_TIMEOUT, SCRAPE_LIMIT, STRATEGY, WORKERS, ArchiveStore, Checkpoint,
+                     ObjectStore, ScrapeStats, load_jobs, scrape_jobs)
+from shared.work_queue import LEASE_SECONDS, MAX_ATTEMPTS, WorkQueue, run_worker, worker_name
+
+KIND = "scrape"
+
+
+def category_units(config_path=CONFIG_PATH):
+    with open(config_path, "r", encoding="utf-8") as f:
+        categories = yaml.safe_load(f).get("categories", [])
+    return [(cat["name"], {"name": cat["name"], "url": cat["url"]}) for cat in categories]
+
+
+class CategoryHandler:
+    """
+    Collects the links of one category and scrapes the ones the checkpoint
+    does not list yet. A link walk that is blocked or finds nothing, and
+    pages that fail, fail the unit, so its retry picks up only what is
+    missing.
+    """
+
+    def __init__(self, s3, checkpoint, workers=WORKERS, limit=SCRAPE_LIMIT, headless=True,
+                 timeout=PAGE_TIMEOUT, strategy=STRATEGY, minify=False, archive=None, shard_mb=64):
+        self.s3 = s3
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.limit = limit
+        self.headless = headless
+        self.timeout = timeout
+        self.strategy = strategy
+        self.minify = minify
+        self.archive = archive
+        self.shard_mb = shard_mb
+
+    def __call__(self, payload):
+        # A blocked or timed-out walk must not complete the unit with the links found so far
+        stopped = collect_links(payload["name"], payload["url"])
+        if stopped:
+            raise RuntimeError(f"Collecting the links of {payload['name']} stopped: {stopped}")
+        links = [(cat_name, link) for cat_name, link in load_jobs(LINKS_FOLDER, self.limit)
+                 if cat_name == payload["name"]]
+        if not links:
+            raise RuntimeError(f"No product links found for {payload['name']}")
+        pending = [(cat_name, link) for cat_name, link in links if link not in self.checkpoint.done]
+
+        # A store per unit: archive shards are uploaded before the unit counts as done
+        if self.archive:
+            store = ArchiveStore(self.s3, self.checkpoint, self.archive, self.shard_mb)
+        else:
+            store = ObjectStore(self.s3, self.checkpoint)
+        stats = ScrapeStats()
+        try:
+            scrape_jobs(pending, store, stats, self.workers, self.headless, self.timeout, self.strategy, self.minify)
+        finally:
+            store.close()
+        print(stats.report())
+        if stats.failed:
+            raise RuntimeError(f"{stats.failed} of {len(pending)} pages of {payload['name']} failed")
+        return {"pages": stats.pages, "via_http": stats.via_http, "via_browser": stats.via_browser}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("role", choices=["submit", "work", "status"])
+    arg_parser.add_argument("--queue", required=True, help="SQLite queue file shared by all containers")
+    arg_parser.add_argument("--config", default=CONFIG_PATH)
+    arg_parser.add_argument("--reset", action="store_true", help="Queue finished and failed categories again")
+    arg_parser.add_argument("--workers", type=int, default=WORKERS, help="Parallel sessions per container")
+    arg_parser.add_argument("--limit", type=int, default=SCRAPE_LIMIT, help="Links per category")
+    arg_parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    arg_parser.add_argument("--timeout", type=float, default=PAGE_TIMEOUT)
+    arg_parser.add_argument("--strategy", choices=["auto", "http", "browser"], default=STRATEGY)
+    arg_parser.add_argument("--archive", metavar="DIR", default=None)
+    arg_parser.add_argument("--shard-mb", type=int, default=64)
+    arg_parser.add_argument("--minify", action="store_true")
+    arg_parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    arg_parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    args = arg_parser.parse_args()
+
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    try:
+        if args.role == "submit":
+            units = category_units(args.config)
+            print(f"🗂️ Queued {queue.submit(KIND, units, reset=args.reset)} of {len(units)} categories")
+        elif args.role == "work":
+            os.makedirs(LINKS_FOLDER, exist_ok=True)
+            checkpoint = Checkpoint(args.checkpoint)
+            handler = CategoryHandler(boto3.client("s3"), checkpoint, args.workers, args.limit,
+                                      timeout=args.timeout, strategy=args.strategy, minify=args.minify,
+                                      archive=args.archive, shard_mb=args.shard_mb)
+            try:
+                stats = run_worker(queue, KIND, handler, owner=worker_name())
+            finally:
+                checkpoint.close()
+            print(f"✅ {stats.done} categories done, {stats.failed} failed, {stats.lost} leases lost")
+        else:
+            for unit in queue.units(KIND):
+                print(f"{unit['status']:>8} {unit['attempts']} {unit['key']} {unit['last_error'] or ''}")
+            print(queue.counts(KIND))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
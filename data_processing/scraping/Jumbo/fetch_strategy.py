@@ -0,0 +1,73 @@
+import os
+import re
+import sys
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# shared/ lives at the repository root (or next to Jumbo/ in the scraping image)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from link_collector import HEADERS
+from shared.metrics import inc, timer
+
+# Markers for the fields JumboHTMLParser.parse_html cannot do without
+TITLE_RE = re.compile(r'<h1[^>]*data-testid="product-title"[^>]*>(.*?)</h1>', re.S)
+PRICE_PER_UNIT_RE = re.compile(r'<div[^>]*class="[^"]*\bprice-per-unit\b')
+TAG_RE = re.compile(r"<!--.*?-->|<[^>]+>", re.S)
+
+
+def has_required_fields(html):
+    """True if the page has a non-empty product title and a price-per-unit block."""
+    title = TITLE_RE.search(html)
+    if title is None or not TAG_RE.sub("", title.group(1)).strip():
+        return False
+    return PRICE_PER_UNIT_RE.search(html) is not None
+
+
+class HttpFetcher:
+    """
+    Plain-HTTP first attempt for product pages.
+
+    Each thread gets its own pooled requests.Session. `fetch` returns the page
+    only when it is server-rendered with the fields the ETL needs, otherwise
+    None so the caller can fall back to the browser.
+    """
+
+    def __init__(self, pool_size=8, timeout=15):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def fetch(self, link):
+        try:
+            with timer("http.fetch"):
+                resp = self._session().get(link, timeout=self.timeout)
+        except requests.RequestException:
+            self._count("errors")
+            return None
+        inc("http.fetch.bytes", len(resp.content))
+        if resp.status_code != 200 or not has_required_fields(resp.text):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return resp.text
@@ -1,11 +1,17 @@
 import requests
 import re
+import sys
 import time
 import os
 import yaml
 import csv
 from requests.exceptions import ReadTimeout
 
+# shared/ lives at the repository root (or next to Jumbo/ in the scraping image)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from shared.metrics import inc, timer
+
 CONFIG_PATH = "config/extended_categories.yml"
 BUCKET_NAME = "foodv-scraper-module"
 HEADERS = {
@@ -15,52 +21,72 @@ HEADERS = {
     "Connection": "keep-alive"
 }
 REGEX = r'<a href="/producten/[^"]+'
+PAGE_SIZE = 24
+MAX_OFFSET = 2400
+LINKS_FOLDER = "product_links"
 
 def safe_get(url, tries=3, wait=5):
     for _ in range(tries):
         try:
-            return requests.get(url, headers=HEADERS, timeout=30)
+            with timer("http.fetch"):
+                resp = requests.get(url, headers=HEADERS, timeout=30)
+            inc("http.fetch.bytes", len(resp.content))
+            return resp
         except ReadTimeout:
             time.sleep(wait)
     return None
 
 
+def extract_links(html):
+    matches = re.findall(REGEX, html)
+    new_links = set()
+    for link in matches:
+        full_link = "https://www.jumbo.com" + link.replace('<a href="', '')
+        if not full_link.endswith("/"):
+            new_links.add(full_link)
+    return new_links
+
+
+def write_links(cat_name, links, folder=LINKS_FOLDER):
+    csv_name = os.path.join(folder, f"links_{cat_name}.csv")
+    with open(csv_name, mode="w", encoding='utf-8', newline="") as f:
+        writer = csv.writer(f)
+        for link in sorted(links):
+            writer.writerow([link])
+
+
 def collect_links(cat_name, cat_url):
+    """
+    Walk the category pages and write its links CSV. Returns why the walk
+    stopped early ("HTTP 403", "timeout"), None when it ran to the end.
+    What was collected before a stop is written all the same.
+    """
     all_links = set()
     offset = 0
-    max_offset = 2400
+    stopped = None
 
-    while offset < max_offset:
+    while offset < MAX_OFFSET:
         url = f"{cat_url}?offSet={offset}"
         resp = safe_get(url)
         print(f"🔎 Fetching {url}")
 
-        if resp.status_code != 200:
-            print(f"HTTP {resp.status_code}. Stopping {cat_name}")
+        if resp is None or resp.status_code != 200:
+            stopped = "timeout" if resp is None else f"HTTP {resp.status_code}"
+            print(f"{stopped}. Stopping {cat_name}")
             break
 
-        html = resp.text
-        matches = re.findall(REGEX, html)
-        new_links = set()
-        for link in matches:
-            link.strip('"')
-            full_link = "https://www.jumbo.com" + link.replace('<a href="', '')
-            if not full_link.endswith("/"):
-                new_links.add(full_link)
+        new_links = extract_links(resp.text)
 
         if not new_links.difference(all_links):
             print(f"✅No new links found at offset={offset}. Stopping the search for {url}")
             break
 
         all_links |= new_links
-        offset += 24
+        offset += PAGE_SIZE
         time.sleep(3)
 
-    csv_name = f"product_links/links_{cat_name}.csv"
-    with open(csv_name, mode="w", encoding='utf-8', newline="") as f:
-        writer = csv.writer(f)
-        for link in sorted(all_links):
-            writer.writerow([link])
+    write_links(cat_name, all_links)
+    return stopped
 
 
 def main():
@@ -0,0 +1,46 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average with bursts of up to `burst`.
+    Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+
+    async def acquire(self, url):
+        host = urlsplit(url).netloc
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
@@ -1,8 +1,8 @@
 import subprocess
 
 def main():
-    print("Running link_collector.py...")
-    subprocess.run(["python", "link_collector.py"], check=True)
+    print("Running async_link_collector.py...")
+    subprocess.run(["python", "async_link_collector.py"], check=True)
 
     print("Running scraper.py...")
     subprocess.run(["python", "scraper.py"], check=True)
@@ -1,15 +1,43 @@
+import argparse
+import datetime
 import glob
+import sys
 import os
 import csv
+import queue
+import threading
 import time
 import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 import boto3
 
+# shared/ lives at the repository root (or next to Jumbo/ in the scraping image)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from fetch_strategy import HttpFetcher
+from shared.html_minify import minify_html
+from shared.metrics import METRICS, inc, timed, timer
+from shared.page_archive import ArchiveWriter
+
 PRODUCT_LINKS_FOLDER = "product_links"
 BUCKET_NAME = "foodv-scraper-module"
 S3_PREFIX = "Jumbo"
-SCRAPE_LIMIT = 3  # We'll only scrape first 3 links per CSV
+ARCHIVE_FOLDER = "_archive"   # shards go to <S3_PREFIX>/_archive/ when --archive is used
+SCRAPE_LIMIT = None   # links per CSV, None scrapes everything
+WORKERS = 4
+PAGE_TIMEOUT = 20     # seconds to wait for the product title to render
+MAX_ATTEMPTS = 3
+UPLOAD_ATTEMPTS = 3   # tries per shard upload, 2 s, 4 s ... apart
+CHECKPOINT_FILE = "scrape_checkpoint.txt"
+STRATEGY = "auto"     # auto: plain HTTP first, browser fallback; http / browser: one path only
+PRODUCT_TITLE = (By.CSS_SELECTOR, 'h1[data-testid="product-title"]')
+
+# undetected_chromedriver patches the driver binary on start, so starts must not overlap
+_driver_lock = threading.Lock()
+
 
 def expand_sections(driver):
     # If the text is already in HTML, this might be optional
@@ -17,38 +45,313 @@ def expand_sections(driver):
     for btn in toggle_buttons:
         try:
             btn.click()
-            time.sleep(1)
-        except:
+        except WebDriverException:
             pass
 
-def main():
-    s3 = boto3.client("s3")
-    driver = uc.Chrome(use_subprocess=True)
 
-    for csvfile in glob.glob(os.path.join(PRODUCT_LINKS_FOLDER, "*.csv")):
+def new_driver(headless=True):
+    options = uc.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    with _driver_lock:
+        return uc.Chrome(options=options, use_subprocess=True)
+
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def load_jobs(folder=PRODUCT_LINKS_FOLDER, limit=SCRAPE_LIMIT):
+    jobs = []
+    for csvfile in sorted(glob.glob(os.path.join(folder, "*.csv"))):
         cat_name = os.path.splitext(os.path.basename(csvfile))[0].replace("links_", "")
         with open(csvfile, "r", encoding="utf-8") as f:
             reader = csv.reader(f)
             links = [row[0] for row in reader if row]
+        jobs.extend((cat_name, link) for link in links[:limit])
+    return jobs
+
+
+def s3_key(cat_name, link):
+    file_part = link.split("/")[-1] + ".html"
+    return f"{S3_PREFIX}/{cat_name}/{file_part}"
+
+
+class Checkpoint:
+    """Append-only file of finished links, so an interrupted run can resume."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, link):
+        with self._lock:
+            self.done.add(link)
+            self._file.write(link + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ScrapeStats:
+    def __init__(self):
+        self.pages = 0
+        self.via_http = 0
+        self.via_browser = 0
+        self.failed = 0
+        self.restarts = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+        for name, value in counts.items():
+            inc(f"scrape.{name}", value)
+
+    def report(self):
+        minutes = (time.monotonic() - self.started) / 60
+        rate = self.pages / minutes if minutes else 0.0
+        return (f"📊 {self.pages} pages in {minutes:.1f} min ({rate:.1f} pages/min), "
+                f"{self.via_http} via HTTP, {self.via_browser} via browser, "
+                f"{self.failed} failed, {self.restarts} browser restarts")
+
+
+@timed("browser.page_load")
+def scrape_page(driver, link, timeout=PAGE_TIMEOUT):
+    driver.get(link)
+    WebDriverWait(driver, timeout).until(EC.presence_of_element_located(PRODUCT_TITLE))
+    expand_sections(driver)
+    return driver.page_source
+
+
+class ObjectStore:
+    """One S3 object per page (the layout the ETL has always read)."""
+
+    def __init__(self, s3, checkpoint):
+        self.s3 = s3
+        self.checkpoint = checkpoint
 
-        for link in links[:SCRAPE_LIMIT]:
-            driver.get(link)
-            time.sleep(5)
-            # If you want to expand sections (only if needed)
-            expand_sections(driver)
-            time.sleep(2)
-            html = driver.page_source
-            file_part = link.split("/")[-1] + ".html"
-            key = f"{S3_PREFIX}/{cat_name}/{file_part}"
-            s3.put_object(
+    def __call__(self, cat_name, link, html):
+        body = html.encode("utf-8")
+        with timer("s3.put"):
+            self.s3.put_object(
                 Bucket=BUCKET_NAME,
-                Key=key,
-                Body=html.encode("utf-8"),
+                Key=s3_key(cat_name, link),
+                Body=body,
                 ContentType="text/html"
             )
-            time.sleep(1)
+        inc("s3.put.bytes", len(body))
+        self.checkpoint.mark(link)
+
+    def close(self):
+        pass
+
+
+class ArchiveStore:
+    """
+    Appends pages to compressed local shards and uploads each shard with its
+    index once full. Links are checkpointed only after their shard is in S3.
+    A shard whose upload keeps failing stays on disk and is tried again on
+    close; close raises if it still cannot be uploaded.
+    """
+
+    def __init__(self, s3, checkpoint, directory, max_shard_mb=64):
+        self.s3 = s3
+        self.checkpoint = checkpoint
+        self._links = {}
+        self._failed = []
+        self._lock = threading.Lock()
+        name = f"{S3_PREFIX}-{datetime.datetime.utcnow():%Y%m%d%H%M%S}"
+        self.writer = ArchiveWriter(directory, name, max_shard_bytes=max_shard_mb * 1024 * 1024,
+                                    on_shard_closed=self._upload)
+
+    def __call__(self, cat_name, link, html):
+        key = s3_key(cat_name, link)
+        with self._lock:
+            self._links[key] = link
+        self.writer.add(key, html.encode("utf-8"))
+
+    def _put_shard(self, shard_path, index_path):
+        # Shard first: readers only discover a shard through its index
+        for path in (shard_path, index_path):
+            with timer("s3.put"):
+                self.s3.upload_file(str(path), BUCKET_NAME, f"{S3_PREFIX}/{ARCHIVE_FOLDER}/{path.name}")
+            inc("s3.put.bytes", path.stat().st_size)
+
+    def _upload(self, shard_path, index_path, index):
+        # Runs outside the archive writer's lock, other workers keep adding pages
+        for attempt in range(UPLOAD_ATTEMPTS):
+            try:
+                self._put_shard(shard_path, index_path)
+                break
+            except Exception as e:
+                inc("s3.put.errors")
+                print(f"⚠️ Upload of {shard_path.name} failed (try {attempt + 1}/{UPLOAD_ATTEMPTS}): {e!r}")
+                if attempt + 1 < UPLOAD_ATTEMPTS:
+                    time.sleep(2 ** (attempt + 1))
+        else:
+            with self._lock:
+                self._failed.append((shard_path, index_path, index))
+            return False
+        with self._lock:
+            links = [self._links.pop(entry.key) for entry in index.entries]
+        for link in links:
+            self.checkpoint.mark(link)
+        print(f"📦 Uploaded {shard_path.name} ({len(index.entries)} pages)")
+        return True
+
+    def close(self):
+        self.writer.close()
+        with self._lock:
+            failed, self._failed = self._failed, []
+        kept = [shard_path.name for shard_path, index_path, index in failed
+                if not self._upload(shard_path, index_path, index)]
+        if kept:
+            raise RuntimeError(f"Shards {', '.join(kept)} could not be uploaded, they are kept in "
+                               f"{self.writer.directory}; their pages are not checkpointed and get scraped again")
+
+
+def _retry(jobs, stats, cat_name, link, attempt):
+    if attempt + 1 < MAX_ATTEMPTS:
+        jobs.put((cat_name, link, attempt + 1))
+    else:
+        stats.add(failed=1)
+
+
+def worker(jobs, store, stats, headless=True, timeout=PAGE_TIMEOUT, http_fetcher=None,
+           use_browser=True, minify=False):
+    """
+    Pull (category, link, attempt) jobs off the shared queue and hand the
+    rendered HTML to `store` (ObjectStore or ArchiveStore). Pages are tried
+    with `http_fetcher` first when given; the browser session is only started
+    for pages that need it. With `minify`, markup the ETL ignores is stripped
+    before upload. A job whose browser session or upload fails goes back on
+    the queue until it has had MAX_ATTEMPTS tries.
+    """
+    if minify:
+        inner_store = store
+        store = lambda cat_name, link, html: inner_store(cat_name, link, minify_html(html))  # noqa: E731
+
+    driver = None
+    try:
+        while True:
+            try:
+                cat_name, link, attempt = jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                # http-only runs retry over HTTP, otherwise retries go to the browser
+                if http_fetcher is not None and (attempt == 0 or not use_browser):
+                    html = http_fetcher.fetch(link)
+                    if html is not None:
+                        store(cat_name, link, html)
+                        stats.add(pages=1, via_http=1)
+                        continue
+                if not use_browser:
+                    stats.add(failed=1)
+                    continue
+
+                try:
+                    if driver is None:
+                        driver = new_driver(headless)
+                    html = scrape_page(driver, link, timeout)
+                except TimeoutException:
+                    print(f"⏱️ Product title did not render for {link}")
+                    stats.add(failed=1)
+                    continue
+                except WebDriverException as e:
+                    # The browser crashed or hung: recycle it and give the link another go
+                    print(f"💥 Browser error on {link}: {e.msg}")
+                    quit_driver(driver)
+                    driver = None
+                    stats.add(restarts=1)
+                    _retry(jobs, stats, cat_name, link, attempt)
+                    continue
+                store(cat_name, link, html)
+                stats.add(pages=1, via_browser=1)
+            except Exception as e:
+                # An S3 put or shard upload failed: the page is not lost, the
+                # thread keeps going with the next job
+                print(f"⚠️ Storing {link} failed: {e!r}")
+                _retry(jobs, stats, cat_name, link, attempt)
+    finally:
+        if driver is not None:
+            quit_driver(driver)
+
+
+def scrape_jobs(pending, store, stats, workers=WORKERS, headless=True, timeout=PAGE_TIMEOUT,
+                strategy=STRATEGY, minify=False):
+    """Scrape (category, link) pairs with `workers` threads; returns the HttpFetcher used, if any."""
+    jobs = queue.Queue()
+    for cat_name, link in pending:
+        jobs.put((cat_name, link, 0))
+
+    http_fetcher = HttpFetcher(pool_size=workers) if strategy != "browser" else None
+    use_browser = strategy != "http"
+    threads = [
+        threading.Thread(target=worker, args=(jobs, store, stats, headless, timeout,
+                                              http_fetcher, use_browser, minify))
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return http_fetcher
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Scrape Jumbo product pages into S3")
+    arg_parser.add_argument("--workers", type=int, default=WORKERS, help="Parallel browser sessions")
+    arg_parser.add_argument("--limit", type=int, default=SCRAPE_LIMIT, help="Links per category CSV")
+    arg_parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    arg_parser.add_argument("--timeout", type=float, default=PAGE_TIMEOUT)
+    arg_parser.add_argument("--show-browser", action="store_true")
+    arg_parser.add_argument("--strategy", choices=["auto", "http", "browser"], default=STRATEGY,
+                            help="Fetch path: plain HTTP with browser fallback, or a single path")
+    arg_parser.add_argument("--archive", metavar="DIR", default=None,
+                            help="Write compressed archive shards via DIR instead of one S3 object per page")
+    arg_parser.add_argument("--shard-mb", type=int, default=64, help="Compressed shard size")
+    arg_parser.add_argument("--minify", action="store_true",
+                            help="Strip scripts, styles, SVGs and comments before upload")
+    arg_parser.add_argument("--metrics", default=None,
+                            help="Write a JSON summary of page-load, fetch and upload timings to this file")
+    args = arg_parser.parse_args()
+
+    s3 = boto3.client("s3")
+    checkpoint = Checkpoint(args.checkpoint)
+    stats = ScrapeStats()
+    if args.archive:
+        store = ArchiveStore(s3, checkpoint, args.archive, args.shard_mb)
+    else:
+        store = ObjectStore(s3, checkpoint)
+
+    pending = [job for job in load_jobs(limit=args.limit) if job[1] not in checkpoint.done]
+    print(f"🚀 {len(pending)} pages to scrape, {len(checkpoint.done)} already done, {args.workers} browsers")
+    http_fetcher = scrape_jobs(pending, store, stats, args.workers, not args.show_browser, args.timeout,
+                               args.strategy, args.minify)
 
-    driver.quit()
+    store.close()
+    checkpoint.close()
+    print(stats.report())
+    if http_fetcher is not None:
+        print(f"🌐 HTTP path: {http_fetcher.hits} usable, {http_fetcher.misses} missing fields, "
+              f"{http_fetcher.errors} errors")
+    if args.metrics:
+        METRICS.write_summary(args.metrics)
+        print(f"⏱️ Metrics written to {args.metrics}")
 
 if __name__ == "__main__":
     main()
@@ -5,7 +5,7 @@ import { ViewChild } from '@angular/core';
 import { ElementRef } from '@angular/core';
 import { AfterViewChecked } from '@angular/core';
 import { first } from 'rxjs';
-import { ChatService } from './chat';
+import { AgentMessage, ChatService } from './chat';
 
 @Component({
   selector: 'app-chat-window',
@@ -19,7 +19,7 @@ export class ChatWindow {
    initialMessageSent = false;
    @Output() firstMessage = new EventEmitter<void>();
 
-  chatHistory = [
+  chatHistory: { sender: string, text: string, jobId?: string | null }[] = [
     {
       sender: 'agent',
       text: 'Welcome to the chat bot'
@@ -32,11 +32,21 @@ export class ChatWindow {
     // Start the connection and subscribe to messages when the component loads
     ngOnInit(): void {
       this.chatService.startConnection();
-      this.chatService.agentMessage$.subscribe(agentMessage => {
-        this.chatHistory.push({
-          sender: 'agent',
-          text: agentMessage
-        });
+      this.chatService.agentMessage$.subscribe(agentMessage => this.showAgentMessage(agentMessage));
+    }
+
+
+    // A streamed answer grows in place; the first chunk of a job adds it to the history
+    private showAgentMessage({ jobId, text }: AgentMessage): void {
+      const shown = jobId ? this.chatHistory.find(message => message.jobId === jobId) : undefined;
+      if (shown) {
+        shown.text = text;
+        return;
+      }
+      this.chatHistory.push({
+        sender: 'agent',
+        text: text,
+        jobId: jobId
       });
     }
 
@@ -6,13 +6,29 @@ import * as signalR from '@microsoft/signalr';
 import { Subject } from 'rxjs';
 import { DossierService } from '../dossier/dossier-service'; // 👈 1. Import the DossierService
 
+// The text of one agent answer so far. Streamed answers are emitted again with
+// more text under the same jobId; the final text comes from ReceiveMessage.
+export interface AgentMessage {
+  jobId: string | null;
+  text: string;
+}
+
+// Chunks of one streamed answer, put back in sequence order
+interface AnswerStream {
+  next: number;
+  text: string;
+  early: Map<number, { delta: string, done: boolean }>;
+  done: boolean;
+}
+
 @Injectable({
   providedIn: 'root'
 })
 export class ChatService {
   private backendUrl = 'http://localhost:5065';
   private hubConnection!: signalR.HubConnection;
-  public agentMessage$ = new Subject<string>();
+  public agentMessage$ = new Subject<AgentMessage>();
+  private streams = new Map<string, AnswerStream>();
 
   // 👇 2. Inject the DossierService in the constructor
   constructor(private http: HttpClient, private dossierService: DossierService) { }
@@ -28,11 +44,45 @@ export class ChatService {
       .then(() => console.log('SignalR Connection started'))
       .catch(err => console.error('Error while starting connection: ' + err));
 
-    this.hubConnection.on('ReceiveMessage', (message: string) => {
-      this.agentMessage$.next(message);
+    this.hubConnection.on('ReceiveMessage', (message: string, jobId?: string | null) => {
+      if (jobId) {
+        // The complete answer replaces whatever was streamed, also if chunks were lost
+        const stream = this.getStream(jobId);
+        stream.text = message;
+        stream.done = true;
+      }
+      this.agentMessage$.next({ jobId: jobId ?? null, text: message });
+    });
+
+    this.hubConnection.on('ReceiveMessageChunk', (jobId: string, sequence: number, delta: string, done: boolean) => {
+      const stream = this.getStream(jobId);
+      if (stream.done) {
+        return;
+      }
+      stream.early.set(sequence, { delta, done });
+      const ready = stream.next;
+      let chunk: { delta: string, done: boolean } | undefined;
+      while ((chunk = stream.early.get(stream.next)) !== undefined) {
+        stream.early.delete(stream.next);
+        stream.next++;
+        stream.text += chunk.delta;
+        stream.done = chunk.done;
+      }
+      if (stream.next > ready) {
+        this.agentMessage$.next({ jobId, text: stream.text });
+      }
     });
   }
 
+  private getStream(jobId: string): AnswerStream {
+    let stream = this.streams.get(jobId);
+    if (!stream) {
+      stream = { next: 0, text: '', early: new Map(), done: false };
+      this.streams.set(jobId, stream);
+    }
+    return stream;
+  }
+
   // 👇 3. Update the sendMessage method to include the profile
   public sendMessage(userMessage: string) {
     // Get the current user profile from the DossierService
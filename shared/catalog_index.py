@@ -0,0 +1,371 @@
+import bisect
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import unicodedata
+from array import array
+from dataclasses import dataclass, astuple
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Optional
+
+VERSION = 1
+CURRENT = "CURRENT"
+KEEP_GENERATIONS = 2     # the previous one stays for readers that have not reloaded yet
+
+# Per-row float64 columns, NaN where unknown. Nutrition is per 100 g/ml.
+NUMERIC = ("price", "regular_price", "price_per_kg", "kcal", "protein", "fat", "carbs", "sugar", "fiber", "sodium")
+_TEXT_SEPARATOR = "\x1f"
+
+# Allergen tags from name and description (a category like "zuivel,-eieren,-boter" would tag
+# every yoghurt with egg). Substrings on purpose, Dutch compounds ("hazelnootpasta") must
+# count; a false tag only hides a product. The tags are a filter, not a guarantee.
+ALLERGENS = {
+    "nuts": r"noot|noten|nuts?\b|amandel|hazelno|walno|cashew|pistach|pecan|macadamia|paranoot",
+    "peanuts": r"pinda|peanut",
+    "gluten": r"gluten|tarwe|wheat|rogge|gerst|spelt|haver|couscous|bulgur",
+    "milk": r"melk|milk|lactose|zuivel|\broom|boter|butter|(?<!pinda)kaas|cheese|yoghurt|kwark|skyr|kefir|\bwei\b",
+    "egg": r"\bei\b|eieren|\beggs?\b|mayonaise",
+    "soy": r"soja|\bsoy",
+    "fish": r"\bvis\b|fish|zalm|tonijn|kabeljauw|makreel|haring|ansjovis",
+    "shellfish": r"garnal|schaaldier|kreeft|krab|mossel|oester|shrimp|shellfish",
+    "sesame": r"sesam",
+    "celery": r"selderij|celery",
+    "mustard": r"mosterd|mustard",
+    "lupin": r"lupine",
+    "sulphite": r"sulfiet|sulphite|zwaveldioxide",
+}
+_ALLERGEN_PATTERNS = {name: re.compile(pattern) for name, pattern in ALLERGENS.items()}
+_WORDS = re.compile(r"\w+")
+STOPWORDS = {"de", "het", "een", "en", "van", "met", "in", "op", "voor", "per", "the", "and", "with", "of"}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase without accents, "Crème" and "creme" are the same term."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [word for word in _WORDS.findall(normalize_text(text)) if len(word) > 1 and word not in STOPWORDS]
+
+
+def allergens(text: str) -> set[str]:
+    text = normalize_text(text)
+    return {name for name, pattern in _ALLERGEN_PATTERNS.items() if pattern.search(text)}
+
+
+@dataclass(slots=True, frozen=True)
+class CatalogRecord:
+    """One product as the index stores it: the ProductRow fields plus its latest price and nutrition."""
+    sku: str
+    name: Optional[str] = None
+    category: Optional[str] = None
+    description: Optional[str] = None
+    on_promotion: bool = False
+    price: Optional[float] = None            # what it costs now: the promo price while on promotion
+    regular_price: Optional[float] = None
+    price_per_kg: Optional[float] = None
+    kcal: Optional[float] = None
+    protein: Optional[float] = None
+    fat: Optional[float] = None
+    carbs: Optional[float] = None
+    sugar: Optional[float] = None
+    fiber: Optional[float] = None
+    sodium: Optional[float] = None
+
+    def terms(self) -> set[str]:
+        text = " ".join(part for part in (self.name, self.description) if part)
+        terms = set(tokenize(text))
+        terms.update(tokenize(self.category))
+        terms.update(f"allergen:{name}" for name in allergens(text))
+        if self.category:
+            terms.add(f"category:{normalize_text(self.category)}")
+        if self.on_promotion:
+            terms.add("flag:promotion")
+        return terms
+
+    def fingerprint(self) -> int:
+        digest = hashlib.blake2b(repr(astuple(self)).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+
+def _nan(value) -> float:
+    return math.nan if value is None else float(value)
+
+
+# ─────────── Reader ─────────── #
+class CatalogIndex:
+    """
+    Read-only, memory-mapped view of the newest index generation below `root`.
+
+    Numeric columns are float64 files mapped as memoryviews, each with a row
+    order sorted by value, so a range filter is two binary searches. Terms
+    (words of name, category and description, `category:<name>`,
+    `allergen:<name>`, `flag:promotion`) map to sorted row-id postings. A
+    query starts from its most selective term or range and checks the other
+    conditions per candidate row, which keeps filtered lookups on a
+    catalog-sized index well under a millisecond. Nothing is copied into
+    Python objects until rows are returned.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.generation = None
+        self._load()
+
+    def _load(self):
+        generation = (self.root / CURRENT).read_text().strip()
+        directory = self.root / generation
+        meta = json.loads((directory / "meta.json").read_text())
+        if meta["version"] != VERSION:
+            raise ValueError(f"Catalog index {directory} has version {meta['version']}, expected {VERSION}")
+        self._maps = []
+        self.rows = meta["rows"]
+        self.built_at = meta["built_at"]
+        self.columns = {name: self._map(directory / f"{name}.f64", "d") for name in NUMERIC}
+        self._sorted = {name: self._map(directory / f"{name}.sorted.f64", "d") for name in NUMERIC}
+        self._order = {name: self._map(directory / f"{name}.order.u32", "I") for name in NUMERIC}
+        self.fingerprints = self._map(directory / "fingerprint.i64", "q")
+        self._text_offsets = self._map(directory / "text.off", "q")
+        self._text = self._map(directory / "text.bin", "B")
+        self._postings = self._map(directory / "postings.u32", "I")
+        self.terms: dict[str, list[int]] = json.loads((directory / "terms.json").read_text())
+        self._term_sets: dict[str, frozenset[int]] = {}
+        self.generation = generation
+
+    def _map(self, path: Path, code: str) -> memoryview:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(array(code))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(code)
+
+    def reload_if_changed(self) -> bool:
+        """Switch to a newer generation written since this one was opened; cheap to call per request."""
+        if (self.root / CURRENT).read_text().strip() == self.generation:
+            return False
+        self._load()
+        return True
+
+    def __len__(self) -> int:
+        return self.rows
+
+    # ── rows ──
+    def text(self, row: int) -> tuple[str, str, str]:
+        start, end = self._text_offsets[row], self._text_offsets[row + 1]
+        sku, name, category = bytes(self._text[start:end]).decode("utf-8").split(_TEXT_SEPARATOR)
+        return sku, name, category
+
+    def row(self, row: int) -> dict:
+        sku, name, category = self.text(row)
+        result = {"sku": sku, "name": name or None, "category": category or None}
+        for column, values in self.columns.items():
+            value = values[row]
+            result[column] = None if math.isnan(value) else value
+        return result
+
+    # ── lookups ──
+    def postings(self, term: str) -> memoryview:
+        start, count = self.terms.get(term, (0, 0))
+        return self._postings[start:start + count]
+
+    def term_set(self, term: str) -> frozenset[int]:
+        rows = self._term_sets.get(term)
+        if rows is None:
+            rows = self._term_sets[term] = frozenset(self.postings(term))
+        return rows
+
+    def range_rows(self, column: str, low: float | None = None, high: float | None = None) -> memoryview:
+        """Row ids with `low` <= value <= `high`, in value order; unknown values never match."""
+        values = self._sorted[column]
+        first = 0 if low is None else bisect.bisect_left(values, low)
+        last = len(values) if high is None else bisect.bisect_right(values, high)
+        return self._order[column][first:max(first, last)]
+
+    def search(self, terms: Iterable[str] = (), exclude: Iterable[str] = (),
+               ranges: dict[str, tuple[float | None, float | None]] | None = None,
+               sort: str | None = None, limit: int = 10) -> list[dict]:
+        """
+        Products carrying every term in `terms`, none in `exclude`, and with
+        each `ranges` column within its (low, high) bounds (None: open).
+        `sort` is a column name, "-protein" for descending; unknown values
+        sort last. Query words are normalized like the index, so "Crème"
+        finds "creme"; prefixed terms are used as given.
+        """
+        terms = [term if ":" in term else normalize_text(term) for term in terms]
+        exclude = [term if ":" in term else normalize_text(term) for term in exclude]
+        ranges = {column: bounds for column, bounds in (ranges or {}).items() if bounds != (None, None)}
+        for column in ranges:
+            if column not in self.columns:
+                raise ValueError(f"Unknown column {column!r}, expected one of {NUMERIC}")
+
+        # Start from the smallest candidate set, check everything else per row
+        kind = start = None
+        sources = [(len(self.postings(term)), "term", term) for term in terms]
+        sources += [(len(self.range_rows(column, *bounds)), "range", column) for column, bounds in ranges.items()]
+        if sources:
+            smallest, kind, start = min(sources)
+            candidates = self.postings(start) if kind == "term" else self.range_rows(start, *ranges[start])
+        else:
+            smallest, candidates = self.rows, range(self.rows)
+        required = [self.term_set(term) for term in terms]
+        checks = [(self.columns[column], -math.inf if low is None else low, math.inf if high is None else high)
+                  for column, (low, high) in ranges.items()]
+        excluded = [self.term_set(term) for term in exclude]
+
+        def matching(rows, skip_kind=None, skip=None):
+            own_required = [rows_ for term, rows_ in zip(terms, required) if skip_kind != "term" or term != skip]
+            own_checks = [check for column, check in zip(ranges, checks) if skip_kind != "range" or column != skip]
+            for row in rows:
+                if (not any(row in rows_ for rows_ in excluded)
+                        and all(row in rows_ for rows_ in own_required)
+                        and all(low <= values[row] <= high for values, low, high in own_checks)):
+                    yield row
+
+        if sort:
+            column = sort.lstrip("-")
+            values = self.columns[column]
+            descending = sort.startswith("-")
+            # Walking the sort order and stopping at `limit` visits about
+            # limit * rows / smallest rows; with loose filters that beats
+            # checking and sorting every candidate.
+            if smallest and limit * self.rows < smallest * smallest:
+                order = self.range_rows(column)
+                walked = list(islice(matching(reversed(order) if descending else order), limit))
+                if len(walked) == limit:
+                    return [self.row(row) for row in walked]
+            key = (lambda row: (math.isnan(values[row]), -values[row] if descending else values[row]))
+            matches = sorted(matching(candidates, kind, start), key=key)
+        else:
+            matches = list(islice(matching(candidates, kind, start), limit))
+        return [self.row(row) for row in matches[:limit]]
+
+    def close(self):
+        for mapped in self._maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass   # a view still points into it, the mapping goes with the view
+        self._maps = []
+
+
+# ─────────── Writer ─────────── #
+def _write_array(path: Path, code: str, values: Iterable):
+    with open(path, "wb") as f:
+        array(code, values).tofile(f)
+
+
+def _write_generation(root: Path, generation: str, fingerprints: list[int], text: list[str],
+                      numeric: dict[str, list[float]], postings: dict[str, list[int]]):
+    directory = root / generation
+    directory.mkdir(parents=True)
+    _write_array(directory / "fingerprint.i64", "q", fingerprints)
+
+    blob = bytearray()
+    offsets = [0]
+    for line in text:
+        blob += line.encode("utf-8")
+        offsets.append(len(blob))
+    (directory / "text.bin").write_bytes(bytes(blob))
+    _write_array(directory / "text.off", "q", offsets)
+
+    for name, values in numeric.items():
+        _write_array(directory / f"{name}.f64", "d", values)
+        order = sorted((row for row, value in enumerate(values) if not math.isnan(value)), key=values.__getitem__)
+        _write_array(directory / f"{name}.order.u32", "I", order)
+        _write_array(directory / f"{name}.sorted.f64", "d", (values[row] for row in order))
+
+    flat = array("I")
+    terms = {}
+    for term in sorted(postings):
+        rows = sorted(postings[term])
+        terms[term] = [len(flat), len(rows)]
+        flat.extend(rows)
+    with open(directory / "postings.u32", "wb") as f:
+        flat.tofile(f)
+    (directory / "terms.json").write_text(json.dumps(terms, ensure_ascii=False, separators=(",", ":")))
+    (directory / "meta.json").write_text(json.dumps({
+        "version": VERSION, "rows": len(fingerprints), "built_at": datetime.utcnow().isoformat(),
+    }))
+
+
+def _current_generation(root: Path) -> str | None:
+    pointer = root / CURRENT
+    return pointer.read_text().strip() if pointer.exists() else None
+
+
+def update_index(root: str | Path, records: Iterable[CatalogRecord], full: bool = False) -> bool:
+    """
+    Merge `records` into the index at `root` and publish a new generation.
+
+    Records replace the product with the same SKU; products not among them
+    are carried over from the current generation without being re-read:
+    their columns are copied and their postings renumbered. With `full` the
+    index holds `records` alone: products not among them are dropped.
+    Returns False, and writes nothing, when the index would not change.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    records = {record.sku: record for record in records}
+    old = CatalogIndex(root) if _current_generation(root) is not None else None
+
+    fingerprints: list[int] = []
+    text: list[str] = []
+    numeric: dict[str, list[float]] = {name: [] for name in NUMERIC}
+    postings: dict[str, list[int]] = {}
+    try:
+        kept = {}    # old row -> new row
+        if old is not None:
+            for row in range(old.rows):
+                sku = old.text(row)[0]
+                record = records.get(sku)
+                if record is not None and record.fingerprint() == old.fingerprints[row]:
+                    del records[sku]     # unchanged, keep the stored row
+                elif record is not None or full:
+                    continue
+                kept[row] = len(fingerprints)
+                fingerprints.append(old.fingerprints[row])
+                start, end = old._text_offsets[row], old._text_offsets[row + 1]
+                text.append(bytes(old._text[start:end]).decode("utf-8"))
+                for name in NUMERIC:
+                    numeric[name].append(old.columns[name][row])
+            if not records and len(kept) == old.rows:
+                return False
+            for term in old.terms:
+                rows = [kept[row] for row in old.postings(term) if row in kept]
+                if rows:
+                    postings[term] = rows
+    finally:
+        if old is not None:
+            old.close()
+
+    for record in records.values():
+        row = len(fingerprints)
+        fingerprints.append(record.fingerprint())
+        text.append(_TEXT_SEPARATOR.join(part or "" for part in (record.sku, record.name, record.category)))
+        for name in NUMERIC:
+            numeric[name].append(_nan(getattr(record, name)))
+        for term in record.terms():
+            postings.setdefault(term, []).append(row)
+
+    # Past every existing directory, including one a crashed build left behind
+    number = max((int(directory.name.removeprefix("gen-")) for directory in root.glob("gen-*")), default=0) + 1
+    generation = f"gen-{number:06d}"
+    _write_generation(root, generation, fingerprints, text, numeric, postings)
+    pointer = root / f"{CURRENT}.tmp"
+    pointer.write_text(generation)
+    os.replace(pointer, root / CURRENT)
+
+    generations = sorted(directory.name for directory in root.glob("gen-*"))
+    for name in generations[:generations.index(generation) + 1][:-KEEP_GENERATIONS]:
+        shutil.rmtree(root / name, ignore_errors=True)
+    return True
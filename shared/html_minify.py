@@ -0,0 +1,67 @@
+from lxml import etree
+
+# Elements JumboHTMLParser never reads text from
+DROP_TAGS = ("script", "style", "svg", "noscript", "template", "link", "iframe")
+# Attributes no selector depends on: inline styles and Vue scoped-style markers (data-v-xxxx)
+DROP_ATTRIBUTES = ("style",)
+DROP_ATTRIBUTE_PREFIXES = ("data-v-",)
+
+_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+def _drop(node):
+    """
+    Remove `node` but keep its tail text. When text sits on both sides an empty
+    comment is left in its place: BeautifulSoup's get_text(strip=True) treats
+    the two sides as separate strings, merging them would change the output.
+    """
+    parent = node.getparent()
+    previous = node.getprevious()
+    before = previous.tail if previous is not None else parent.text
+    after = node.tail
+
+    if before and before.strip() and after and after.strip():
+        marker = etree.Comment("")
+        marker.tail = after
+        parent.replace(node, marker)
+        return
+
+    if after:
+        if previous is not None:
+            previous.tail = (previous.tail or "") + after
+        else:
+            parent.text = (parent.text or "") + after
+    parent.remove(node)
+
+
+def minify_html(content):
+    """
+    Strip markup the ETL never looks at: <script>, <style>, <svg> and similar
+    elements, comments, inline styles, Vue data-v-* attributes and whitespace
+    runs between tags. Text that `parse_html` extracts is unchanged.
+
+    Accepts str or UTF-8 bytes and returns the same type.
+    """
+    as_text = isinstance(content, str)
+    root = etree.fromstring(content.encode("utf-8") if as_text else content, _PARSER)
+    if root is None:
+        return content
+
+    for node in list(root.iter(etree.Comment, *DROP_TAGS)):
+        if node.getparent() is not None:
+            _drop(node)
+
+    for el in root.iter():
+        # Runs of whitespace between tags are skipped by get_text(strip=True) anyway
+        if el.tail and len(el.tail) > 1 and not el.tail.strip():
+            el.tail = "\n"
+        if not isinstance(el.tag, str):
+            continue
+        if el.text and len(el.text) > 1 and not el.text.strip():
+            el.text = "\n"
+        for name in list(el.attrib):
+            if name in DROP_ATTRIBUTES or name.startswith(DROP_ATTRIBUTE_PREFIXES):
+                del el.attrib[name]
+
+    minified = etree.tostring(root, method="html", encoding="utf-8")
+    return minified.decode("utf-8") if as_text else minified
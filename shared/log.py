@@ -1,16 +1,173 @@
-import logging 
-from logging.handlers import RotatingFileHandler
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
 import inspect
+import multiprocessing
+import multiprocessing.queues
+import queue
+import threading
+import time
 from pathlib import Path
 import os
 
 _configured = False
+_listener: QueueListener | None = None
+_queue = None
+_handlers: list[logging.Handler] = []
+
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+QUEUE_SIZE = 10_000
+DROP_POLICIES = ("drop_new", "drop_oldest")
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").strip().lower() == "true"
+
+
+def _env_rate_limit() -> float | None:
+    value = os.getenv("LOG_RATE_LIMIT", "").strip()
+    return float(value) if value else None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler for a bounded queue that never blocks the caller on a full
+    queue below ERROR: the record is dropped instead. Records at ERROR and
+    above wait for room, they are never dropped.
+
+    Args:
+        queue: queue.Queue or multiprocessing.Queue with a maxsize.
+        drop_policy: "drop_new" discards the incoming record, "drop_oldest"
+            discards the oldest queued one to make room.
+    """
+
+    def __init__(self, queue, drop_policy: str = "drop_new"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected one of {DROP_POLICIES}")
+        super().__init__(queue)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno >= logging.ERROR:
+            self.queue.put(record)
+            return
+        with self._lock:
+            if self._unreported:
+                self._report_dropped()
+            if not self._offer(record):
+                self.dropped += 1
+                self._unreported += 1
+
+    def _offer(self, record: logging.LogRecord) -> bool:
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            if self.drop_policy == "drop_new":
+                return False
+        try:
+            self.queue.get_nowait()
+            self.queue.put_nowait(record)
+            self.dropped += 1
+            self._unreported += 1
+            return True
+        except (queue.Empty, queue.Full):
+            return False
+
+    def _report_dropped(self) -> None:
+        # Only when there is room, the notice must not push out another record
+        notice = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                   "Logging queue was full, %d records dropped", (self._unreported,), None)
+        try:
+            self.queue.put_nowait(notice)
+            self._unreported = 0
+        except queue.Full:
+            pass
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` records per message template through every
+    `interval` seconds, e.g. one "No title found in %s" warning per minute
+    however many keys it fires for. When a template is let through again the
+    message notes how many similar records were suppressed. One filter can
+    sit on several handlers: each record is decided once, so the handlers
+    share the window and agree on what is shown.
+
+    Args:
+        interval: Window in seconds.
+        burst: Records per template and window.
+        min_level: Records below this level are never limited.
+        dedupe: Group by the formatted message instead of the template, so
+            only exact repeats are suppressed.
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 1, min_level: int = logging.WARNING,
+                 dedupe: bool = False):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.min_level = min_level
+        self.dedupe = dedupe
+        self.suppressed = 0
+        self._windows: dict[tuple, list] = {}   # key -> [window start, passed, suppressed]
+        self._swept = 0.0
+        self._decision = f"_rate_limit_{id(self)}"
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or record.levelno >= logging.ERROR:
+            return True
+        decided = record.__dict__.get(self._decision)
+        if decided is None:
+            decided = self._decide(record)
+            setattr(record, self._decision, decided)
+        return decided
+
+    def _sweep(self, now: float) -> None:
+        # Expired windows with nothing to report go, and any window after a
+        # few intervals, so distinct messages do not pile up (dedupe=True)
+        for key, window in list(self._windows.items()):
+            age = now - window[0]
+            if age >= self.interval and (not window[2] or age >= 10 * self.interval):
+                del self._windows[key]
+        self._swept = now
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage() if self.dedupe else str(record.msg)
+        key = (record.name, record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept >= self.interval:
+                self._sweep(now)
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            self.suppressed += 1
+            return False
+
 
 def setup_logger(
-        component_name: str, 
+        component_name: str,
         level: int = logging.INFO,
         max_bytes: int = 5_000_000,
-        backup_count: int=5
+        backup_count: int=5,
+        use_queue: bool | None = None,
+        queue_size: int = QUEUE_SIZE,
+        drop_policy: str = "drop_new",
+        rate_limit: float | None = None,
+        log_dir: str | Path | None = None
 ) -> None:
     """
     Setup a logger for a component.
@@ -20,14 +177,29 @@ def setup_logger(
         level: The level of the logger (i.e. INFO or DEBUG).
         max_bytes: The maximum number of bytes to write to the log file.
         backup_count: The maximum number of backup files to store.
+        use_queue: Hand records to a background thread through a bounded
+            queue instead of writing them on the caller's thread. Defaults to
+            the LOG_QUEUE environment variable.
+        queue_size: Records the queue holds before `drop_policy` applies.
+        drop_policy: See DroppingQueueHandler.
+        rate_limit: Seconds between repeats of a warning message template
+            (see RateLimitFilter). Defaults to LOG_RATE_LIMIT, unset means no limit.
+        log_dir: Where log files go, the repository's logs/ by default.
     """
-    global _configured
+    global _configured, _listener, _queue
     if _configured:
         return
+    if use_queue is None:
+        use_queue = _env_flag("LOG_QUEUE")
+    if rate_limit is None:
+        rate_limit = _env_rate_limit()
+    if use_queue and multiprocessing.parent_process() is not None:
+        # A spawned worker re-imports its module; it logs through the parent's
+        # queue once its initializer calls configure_worker_logging()
+        return
 
     # Create a directory for the logs
-    root_dir = Path(__file__).resolve().parents[1]
-    log_dir = root_dir/"logs"
+    log_dir = Path(log_dir) if log_dir is not None else Path(__file__).resolve().parents[1]/"logs"
     log_dir.mkdir(exist_ok=True)
 
     # Create a file handler in rotationfor the log file
@@ -37,19 +209,87 @@ def setup_logger(
         backupCount=backup_count
     )
 
-    file_in_rotation.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-    
+    file_in_rotation.setFormatter(logging.Formatter(FORMAT))
+    handlers = [file_in_rotation]
+
+    if _env_flag("LOG_TO_STDOUT"):
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(FORMAT))
+        handlers.append(stream_handler)
+
+    if use_queue:
+        try:
+            # Shareable with worker processes
+            _queue = multiprocessing.Queue(queue_size)
+        except OSError:
+            _queue = queue.Queue(queue_size)
+        # The listener thread does the file I/O, callers only enqueue
+        _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logger)
+        handlers = [DroppingQueueHandler(_queue, drop_policy)]
+
+    if rate_limit:
+        limiter = RateLimitFilter(rate_limit)
+        for handler in handlers:
+            handler.addFilter(limiter)
+
     root = logging.getLogger()
     root.setLevel(level)
-    root.addHandler(file_in_rotation)
+    for handler in handlers:
+        root.addHandler(handler)
+    _handlers.extend(handlers)
 
-    if os.getenv("LOG_TO_STDOUT", "false").strip().lower() == "true":
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-        root.addHandler(stream_handler)
+    _configured = True
+
+
+def log_queue():
+    """The queue worker processes should log to, None unless setup_logger ran in queue mode."""
+    return _queue
 
+
+def configure_worker_logging(log_queue, level: int = logging.INFO, drop_policy: str = "drop_new",
+                             rate_limit: float | None = None) -> None:
+    """
+    Route a worker process's logging to the parent's queue, e.g. as a
+    ProcessPoolExecutor initializer. Handlers inherited through fork are
+    replaced, so only the parent's listener writes the log file.
+    `rate_limit` defaults to LOG_RATE_LIMIT like in setup_logger.
+    """
+    global _configured
+    if rate_limit is None:
+        rate_limit = _env_rate_limit()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = DroppingQueueHandler(log_queue, drop_policy)
+    if rate_limit:
+        handler.addFilter(RateLimitFilter(rate_limit))
+    root.addHandler(handler)
+    root.setLevel(level)
+    _handlers[:] = [handler]
     _configured = True
-    
+
+
+def shutdown_logger() -> None:
+    """Flush the queue and stop the listener, then remove the handlers setup_logger added."""
+    global _configured, _listener, _queue
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    root = logging.getLogger()
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+    if isinstance(_queue, multiprocessing.queues.Queue):
+        _queue.close()
+        _queue.join_thread()
+    _queue = None
+    _configured = False
+
 
 def auto_setup_logger(level: int = logging.INFO) -> None:
     """
@@ -65,5 +305,3 @@ def auto_setup_logger(level: int = logging.INFO) -> None:
     caller_file = inspect.stack()[1].filename
     component_name = Path(caller_file).stem
     setup_logger(component_name, level)
-
-
@@ -0,0 +1,183 @@
+import functools
+import json
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+MAX_SAMPLES = 50_000   # per histogram; beyond this percentiles come from a uniform reservoir sample
+
+
+def _nearest_rank(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+class Histogram:
+    """Count, sum, min and max of every observation plus a bounded sample for percentiles."""
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.samples: list[float] = []
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.samples) < self.max_samples:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.max_samples:
+                self.samples[slot] = value
+
+    def merge(self, other: "Histogram"):
+        for value in other.samples:
+            self.observe(value)
+        # Totals are exact even when the other side sampled
+        self.count += other.count - len(other.samples)
+        self.sum += other.sum - sum(other.samples)
+        if other.count:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        return _nearest_rank(sorted(self.samples), q)
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        pick = functools.partial(_nearest_rank, ordered)
+        return {"count": self.count, "sum": round(self.sum, 6), "mean": round(self.sum / self.count, 6),
+                "min": round(self.min, 6), "p50": round(pick(50), 6), "p95": round(pick(95), 6),
+                "p99": round(pick(99), 6), "max": round(self.max, 6)}
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and histograms for one run.
+
+    Timings are histograms in seconds; by convention stage names are dotted,
+    e.g. "s3.get", "etl.parse", and byte counters end in ".bytes".
+    Worker processes record into their own registry and ship it to the parent
+    with `drain()`, where `merge()` folds it in.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.counters: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the block into histogram `name`, also when it raises (counted in `name.errors`)."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str):
+        """Decorator form of `timer`."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def drain(self) -> dict:
+        """Hand over everything recorded so far and start empty, e.g. at the end of a worker task."""
+        with self._lock:
+            snapshot = {"counters": self.counters, "histograms": self.histograms}
+            self.counters, self.histograms = {}, {}
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, other in snapshot["histograms"].items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.merge(other)
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.counters, self.histograms = {}, {}
+
+    def summary(self) -> dict:
+        """Counters, per-second rates and per-stage latency percentiles for the run so far."""
+        elapsed = max(time.time() - self.started, 1e-9)
+        with self._lock:
+            counters = dict(self.counters)
+            timings = {name: histogram.summary() for name, histogram in self.histograms.items()}
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "counters": counters,
+            "rates_per_second": {name: round(value / elapsed, 3) for name, value in counters.items()},
+            "timings_seconds": timings,
+        }
+
+    def write_summary(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2, sort_keys=True))
+
+    def to_prometheus(self, prefix: str = "foodv") -> str:
+        """Prometheus text exposition format, e.g. for the node_exporter textfile collector."""
+        lines = []
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {name: histogram.summary() for name, histogram in self.histograms.items()}
+        for name, value in sorted(counters.items()):
+            metric = _prometheus_name(prefix, name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+        for name, summary in sorted(histograms.items()):
+            metric = _prometheus_name(prefix, name) + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in ("p50", "p95", "p99"):
+                if quantile in summary:
+                    lines.append(f'{metric}{{quantile="0.{quantile[1:]}"}} {summary[quantile]:g}')
+            lines += [f"{metric}_sum {summary.get('sum', 0):g}", f"{metric}_count {summary['count']}"]
+        return "\n".join(lines) + "\n"
+
+
+def _prometheus_name(prefix: str, name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{name}")
+
+
+# Registry shared by everything in this process
+METRICS = Metrics()
+inc = METRICS.inc
+observe = METRICS.observe
+timer = METRICS.timer
+timed = METRICS.timed
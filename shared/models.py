@@ -1,6 +1,7 @@
-from dataclasses import dataclass, asdict
+from array import array
+from dataclasses import dataclass, asdict, field, fields, make_dataclass
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, Iterable, Iterator, Union, get_args, get_origin, get_type_hints
 
 # ─────────── products ───────────
 @dataclass
@@ -23,8 +24,8 @@ class ProductRow:
 class PriceRow:
     # FK link
     product_id: int
-    # snapshot timestamp (default = now UTC)
-    scraped_at: datetime = datetime.utcnow()
+    # snapshot timestamp (default = now UTC, taken when the row is made)
+    scraped_at: datetime = field(default_factory=datetime.utcnow)
     regular_price: Optional[float] = None
     promo_price: Optional[float] = None
     on_promotion: bool = False
@@ -37,7 +38,7 @@ class PriceRow:
 @dataclass
 class NutritionRow:
     product_id: int
-    scraped_at: datetime = datetime.utcnow()
+    scraped_at: datetime = field(default_factory=datetime.utcnow)
     kcal_per_100g: Optional[float] = None
     protein_per_100g: Optional[float] = None
     fat_per_100g: Optional[float] = None
@@ -46,4 +47,122 @@ class NutritionRow:
     fiber_per_100g: Optional[float] = None
     sugar_per_100g: Optional[float] = None
     raw_json: Optional[Any] = None
-    # nutrition_id auto‑assigned by DB
\ No newline at end of file
+    # nutrition_id auto‑assigned by DB
+
+
+# ─────────── frozen variants ───────────
+def _frozen(row_type: type) -> type:
+    # Same fields and defaults as `row_type`, as a slots=True, frozen=True dataclass:
+    # no __dict__ per row and no accidental edits once built. The parser and loader
+    # keep using the mutable rows above.
+    variant = make_dataclass(
+        f"Frozen{row_type.__name__}",
+        [(f.name, f.type, field(default=f.default, default_factory=f.default_factory)) for f in fields(row_type)],
+        slots=True, frozen=True)
+    variant.__module__ = __name__      # so rows pickle across the parse pool
+    return variant
+
+
+FrozenProductRow = _frozen(ProductRow)
+FrozenPriceRow = _frozen(PriceRow)
+FrozenNutritionRow = _frozen(NutritionRow)
+
+
+# ─────────── columnar batches ───────────
+_ARRAY_CODES = {int: "q", float: "d", bool: "b"}
+
+
+def _column_type(hint) -> type:
+    # Optional[float] -> float; anything else that is not a single type is kept as objects
+    if get_origin(hint) is Union:
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        hint = args[0] if len(args) == 1 else object
+    return hint
+
+
+class RowBatch:
+    """
+    Column-per-field container for many rows of one model, e.g. a whole
+    catalog of PriceRow held in memory before loading. Integer, float and
+    boolean columns are `array`s (8 or 1 bytes per value plus a one byte null
+    flag) instead of a Python object per value; text, datetime and JSON
+    columns stay lists. Appending does not keep the row object around.
+
+    Args:
+        row_type: ProductRow, PriceRow or NutritionRow, or their Frozen variants (any dataclass works).
+    """
+
+    def __init__(self, row_type: type):
+        self.row_type = row_type
+        self.names = [f.name for f in fields(row_type)]
+        hints = get_type_hints(row_type)
+        self._columns: list = []
+        self._present: list[bytearray | None] = []     # null flags of array columns, None for list columns
+        for name in self.names:
+            code = _ARRAY_CODES.get(_column_type(hints[name]))
+            self._columns.append(array(code) if code else [])
+            self._present.append(bytearray() if code else None)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, row):
+        self.append_values(*(getattr(row, name) for name in self.names))
+
+    def append_values(self, *values):
+        """Append one row given as all of its values in field order, without building the row object."""
+        if len(values) != len(self.names):
+            raise ValueError(f"{self.row_type.__name__} has {len(self.names)} columns, got {len(values)} values")
+        try:
+            for column, present, value in zip(self._columns, self._present, values):
+                if present is None:
+                    column.append(value)
+                elif value is None:
+                    column.append(0)
+                    present.append(0)
+                else:
+                    column.append(value)
+                    present.append(1)
+        except (TypeError, OverflowError):
+            # e.g. text in a float column; undo the columns already appended to
+            for column, present in zip(self._columns, self._present):
+                del column[self._length:]
+                if present is not None:
+                    del present[self._length:]
+            raise
+        self._length += 1
+
+    def extend(self, rows: Iterable):
+        for row in rows:
+            self.append(row)
+
+    def clear(self):
+        for index, column in enumerate(self._columns):
+            if self._present[index] is None:
+                self._columns[index] = []
+            else:
+                self._columns[index] = array(column.typecode)
+                self._present[index] = bytearray()
+        self._length = 0
+
+    def _values(self, index: int) -> Iterator:
+        column, present = self._columns[index], self._present[index]
+        if present is None:
+            return iter(column)
+        if column.typecode == "b":
+            return (bool(value) if flag else None for value, flag in zip(column, present))
+        return (value if flag else None for value, flag in zip(column, present))
+
+    def column(self, name: str) -> list:
+        return list(self._values(self.names.index(name)))
+
+    def to_tuples(self, columns: Iterable[str] | None = None) -> Iterator[tuple]:
+        """Rows as tuples of `columns` (all fields by default), lazily, e.g. for COPY or executemany."""
+        names = self.names if columns is None else list(columns)
+        return zip(*(self._values(self.names.index(name)) for name in names))
+
+    def __iter__(self) -> Iterator:
+        row_type = self.row_type
+        for values in self.to_tuples():
+            yield row_type(*values)
@@ -0,0 +1,170 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import quote, unquote
+from shared.metrics import inc, timer
+
+MAX_BYTES = 5 * 1024 ** 3
+_SUFFIX = ".obj"
+
+
+class CacheMiss(LookupError):
+    """An object is not in the local cache and the cache is offline."""
+
+
+def _etag_name(etag: str) -> str:
+    # ETags come quoted from S3 ('"9b2c..."'), multipart ones end in "-<parts>"
+    return quote(etag.strip('"'), safe="") + _SUFFIX
+
+
+def _cacheable(bucket: str, key: str) -> bool:
+    # Every key segment becomes a directory; "", "." and ".." cannot be one
+    return all(part not in ("", ".", "..") for part in (bucket, *key.split("/")))
+
+
+class ObjectCache:
+    """
+    Read-through disk cache for S3 objects.
+
+    Entries are addressed by bucket, key and ETag:
+    <directory>/<bucket>/<key>/<etag>.obj, so a re-uploaded object gets a new
+    entry and a stale copy is never served. Keys with empty, "." or ".."
+    segments are never cached, they are read from S3 every time. Once the
+    cache holds more than `max_bytes`, the least recently read entries are
+    deleted; a file's mtime records its last read, so the order survives
+    restarts.
+
+    Args:
+        directory: Cache root, created if missing.
+        max_bytes: Size cap for all entries together.
+        offline: Never call S3. A missing object raises CacheMiss, and
+            `list_objects` replaces the bucket listing.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = MAX_BYTES, offline: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        # path -> size, least recently used first
+        self._entries: OrderedDict[Path, int] = OrderedDict()
+        self._bytes = 0
+        for path in sorted(self.directory.rglob(f"*{_SUFFIX}"), key=lambda p: p.stat().st_mtime):
+            size = path.stat().st_size
+            self._entries[path] = size
+            self._bytes += size
+
+    def _key_dir(self, bucket: str, key: str) -> Path:
+        if not _cacheable(bucket, key):
+            raise ValueError(f"s3://{bucket}/{key} cannot be stored in the cache")
+        # Segments are quoted whole, so none of them contains a separator
+        key_dir = self.directory.joinpath(quote(bucket, safe=""), *(quote(part, safe="") for part in key.split("/")))
+        if not os.path.normpath(key_dir).startswith(os.path.normpath(self.directory) + os.sep):
+            raise ValueError(f"s3://{bucket}/{key} maps outside the cache directory {self.directory}")
+        return key_dir
+
+    def _path(self, bucket: str, key: str, etag: str) -> Path:
+        return self._key_dir(bucket, key) / _etag_name(etag)
+
+    def _latest(self, bucket: str, key: str) -> Path | None:
+        key_dir = self._key_dir(bucket, key)
+        if not key_dir.is_dir():
+            return None
+        paths = [path for path in key_dir.iterdir() if path.name.endswith(_SUFFIX)]
+        return max(paths, key=lambda p: p.stat().st_mtime, default=None)
+
+    def read(self, bucket: str, key: str, etag: str | None = None) -> bytes | None:
+        """
+        The cached object, or None when it is not cached. Without an ETag the
+        most recently read copy of the key is used.
+        """
+        path = self._path(bucket, key, etag) if etag else self._latest(bucket, key)
+        if path is None:
+            return None
+        try:
+            body = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return body
+
+    def _touch(self, path: Path):
+        with self._lock:
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def put(self, bucket: str, key: str, etag: str, body: bytes) -> Path:
+        path = self._path(bucket, key, etag)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.part")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(body) - self._entries.pop(path, 0)
+            self._entries[path] = len(body)
+        self._evict()
+        return path
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._bytes <= self.max_bytes or len(self._entries) <= 1:
+                    return
+                path, size = self._entries.popitem(last=False)
+                self._bytes -= size
+            path.unlink(missing_ok=True)
+            inc("cache.evictions")
+
+    def get(self, s3, bucket: str, key: str, etag: str | None = None) -> bytes:
+        """
+        The object's body from disk when cached, otherwise from S3 (stored for
+        next time). The ETag of the listing is used when given, else the one
+        S3 returns with the body.
+        """
+        cacheable = _cacheable(bucket, key)
+        with timer("cache.read"):
+            # Online, a key without an ETag could have changed since it was cached
+            body = self.read(bucket, key, etag) if cacheable and (etag or self.offline) else None
+            if body is not None:
+                inc("cache.hits")
+                inc("cache.bytes", len(body))
+                return body
+        inc("cache.misses")
+        if self.offline:
+            raise CacheMiss(f"s3://{bucket}/{key} is not in the local cache {self.directory} (offline mode)")
+        with timer("s3.get"):
+            response = s3.get_object(Bucket=bucket, Key=key)
+            body = response["Body"].read()
+        inc("s3.get.bytes", len(body))
+        etag = etag or response.get("ETag")
+        if etag and cacheable:
+            self.put(bucket, key, etag, body)
+        return body
+
+    def list_objects(self, bucket: str, prefix: str = "") -> Iterator[dict]:
+        """Cached objects below `prefix`, newest copy per key, shaped like list_objects_v2 entries."""
+        if bucket in ("", ".", ".."):
+            return
+        bucket_dir = self.directory / quote(bucket, safe="")
+        seen = set()
+        for path in sorted(bucket_dir.rglob(f"*{_SUFFIX}")):
+            key = unquote(path.parent.relative_to(bucket_dir).as_posix())
+            if key in seen or not key.startswith(prefix):
+                continue
+            seen.add(key)
+            latest = self._latest(bucket, key)
+            # mtime is the last read, not S3's LastModified
+            yield {"Key": key, "ETag": f'"{unquote(latest.name.removesuffix(_SUFFIX))}"',
+                   "Size": latest.stat().st_size, "LastModified": None}
+
+    # Defined last: in the class body the name would shadow the builtin in annotations
+    @property
+    def bytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip always works
+    zstandard = None
+
+SHARD_SUFFIX = ".pages"
+INDEX_SUFFIX = ".idx.json"
+DEFAULT_CODEC = "zstd" if zstandard is not None else "gzip"
+MAX_SHARD_BYTES = 64 * 1024 * 1024
+
+
+# ─────────── Codecs ─────────── #
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        _require_zstd()
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        _require_zstd()
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("The zstd codec needs the 'zstandard' package")
+
+
+# ─────────── Index ─────────── #
+@dataclass(frozen=True)
+class ArchiveEntry:
+    key: str        # logical key, same as the per-object layout ("Jumbo/<category>/<page>.html")
+    offset: int     # start of the compressed record in the shard
+    length: int     # compressed length
+    size: int       # uncompressed length
+    sha256: str     # of the uncompressed page
+
+    @property
+    def range_header(self) -> str:
+        return f"bytes={self.offset}-{self.offset + self.length - 1}"
+
+
+@dataclass
+class ShardIndex:
+    shard: str      # shard file name, e.g. "Jumbo-20250901-0001.pages"
+    codec: str
+    entries: list[ArchiveEntry]
+
+    def to_json(self) -> bytes:
+        return json.dumps({
+            "version": 1,
+            "shard": self.shard,
+            "codec": self.codec,
+            "entries": [[e.key, e.offset, e.length, e.size, e.sha256] for e in self.entries],
+        }, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "ShardIndex":
+        raw = json.loads(data)
+        return cls(raw["shard"], raw["codec"], [ArchiveEntry(*entry) for entry in raw["entries"]])
+
+
+# ─────────── Writing ─────────── #
+class ShardWriter:
+    """Append-only shard of independently compressed pages plus its offset index."""
+
+    def __init__(self, path: str | Path, codec: str = DEFAULT_CODEC):
+        self.path = Path(path)
+        self.codec = codec
+        self.entries: list[ArchiveEntry] = []
+        self._file = open(self.path, "xb")
+        self._offset = 0
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name.removesuffix(SHARD_SUFFIX) + INDEX_SUFFIX)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._offset
+
+    def append(self, key: str, content: bytes) -> ArchiveEntry:
+        record = compress(content, self.codec)
+        self._file.write(record)
+        entry = ArchiveEntry(key, self._offset, len(record), len(content), hashlib.sha256(content).hexdigest())
+        self._offset += len(record)
+        self.entries.append(entry)
+        return entry
+
+    def close(self) -> ShardIndex:
+        self._file.close()
+        index = ShardIndex(self.path.name, self.codec, self.entries)
+        self.index_path.write_bytes(index.to_json())
+        return index
+
+
+class ArchiveWriter:
+    """
+    Writes pages into size-capped shards in `directory`.
+
+    Args:
+        directory: Where shard and index files are written.
+        name: Shard name prefix; shards are numbered "<name>-0001.pages", ...
+        codec: "zstd" (when installed) or "gzip".
+        max_shard_bytes: Compressed size after which a new shard is started.
+        on_shard_closed: Called with (shard path, index path, index) for every
+            finished shard, e.g. to upload both to S3. It runs on the thread
+            whose page filled the shard, outside the writer's lock, so other
+            threads keep adding pages to the next shard meanwhile.
+    """
+
+    def __init__(self, directory: str | Path, name: str, codec: str = DEFAULT_CODEC,
+                 max_shard_bytes: int = MAX_SHARD_BYTES,
+                 on_shard_closed: Callable[[Path, Path, ShardIndex], None] | None = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.codec = codec
+        self.max_shard_bytes = max_shard_bytes
+        self.on_shard_closed = on_shard_closed
+        self._shard: ShardWriter | None = None
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def add(self, key: str, content: bytes) -> ArchiveEntry:
+        closed = None
+        with self._lock:
+            if self._shard is None:
+                self._count += 1
+                self._shard = ShardWriter(self.directory / f"{self.name}-{self._count:04d}{SHARD_SUFFIX}",
+                                          self.codec)
+            entry = self._shard.append(key, content)
+            if self._shard.bytes_written >= self.max_shard_bytes:
+                closed = self._close_shard()
+        if closed is not None:
+            self._shard_closed(*closed)
+        return entry
+
+    def _close_shard(self) -> tuple[ShardWriter, ShardIndex]:
+        shard, self._shard = self._shard, None
+        return shard, shard.close()
+
+    def _shard_closed(self, shard: ShardWriter, index: ShardIndex):
+        if self.on_shard_closed is not None:
+            self.on_shard_closed(shard.path, shard.index_path, index)
+
+    def close(self):
+        closed = None
+        with self._lock:
+            if self._shard is not None:
+                closed = self._close_shard()
+        if closed is not None:
+            self._shard_closed(*closed)
+
+
+# ─────────── Reading ─────────── #
+class LocalShard:
+    """Memory-mapped shard on local disk."""
+
+    def __init__(self, path: str | Path, codec: str):
+        self.path = Path(path)
+        self.codec = codec
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, entry: ArchiveEntry) -> bytes:
+        return decompress(self._mmap[entry.offset:entry.offset + entry.length], self.codec)
+
+    def close(self):
+        self._mmap.close()
+
+
+def read_local_archive(directory: str | Path) -> Iterator[tuple[ArchiveEntry, bytes]]:
+    """Yield (entry, page) for every page in every shard of `directory`."""
+    for index_path in sorted(Path(directory).glob(f"*{INDEX_SUFFIX}")):
+        index = ShardIndex.from_json(index_path.read_bytes())
+        shard = LocalShard(index_path.with_name(index.shard), index.codec)
+        try:
+            for entry in index.entries:
+                yield entry, shard.read(entry)
+        finally:
+            shard.close()
+
+
+def s3_read(s3, bucket: str, shard_key: str, entry: ArchiveEntry, codec: str) -> bytes:
+    """Fetch a single page from a shard in S3 with a ranged GET."""
+    body = s3.get_object(Bucket=bucket, Key=shard_key, Range=entry.range_header)["Body"].read()
+    return decompress(body, codec)
+
+
+def ensure_local_copy(s3, bucket: str, shard_key: str, path: Path) -> Path:
+    """Download a whole shard once (one request for many pages) unless it is already on disk."""
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.part")
+        s3.download_file(bucket, shard_key, str(tmp))
+        os.replace(tmp, path)
+    return path
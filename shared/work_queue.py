@@ -0,0 +1,275 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+from shared.metrics import inc, timer
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 5.0      # seconds before a failed unit may be leased again, doubled per attempt
+POLL_SECONDS = 1.0
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+@dataclass(slots=True, frozen=True)
+class WorkUnit:
+    unit_id: int
+    kind: str              # which pool of workers runs it, e.g. "scrape" or "etl"
+    key: str               # unique per kind, e.g. the category name or S3 prefix
+    payload: dict
+    attempt: int           # 1 on the first lease
+    token: str             # identifies this lease; heartbeat/complete/fail with an old token do nothing
+
+
+@dataclass
+class WorkerStats:
+    done: int = 0
+    failed: int = 0
+    lost: int = 0          # lease expired while running, another worker took the unit over
+
+
+# ─────────── Queue ─────────── #
+class WorkQueue:
+    """
+    Leased work units in an SQLite file, shared by every worker that can see
+    the file (processes on one host, or containers with a common volume).
+
+    A coordinator `submit`s units; workers `lease` one at a time. A lease
+    lasts `lease_seconds` and is kept alive with `heartbeat`. A unit whose
+    lease runs out (the worker died or hung) goes back to the queue, and so
+    does a unit that `fail`ed, after a delay that doubles per attempt. After
+    `max_attempts` leases it is marked failed for good. Every state change is
+    one short write transaction, SQLite's file lock serializes the workers.
+    """
+
+    def __init__(self, path: str | Path, lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS, retry_delay: float = RETRY_DELAY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Autocommit, transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS units (
+                    unit_id       INTEGER PRIMARY KEY,
+                    kind          TEXT NOT NULL,
+                    key           TEXT NOT NULL,
+                    payload       TEXT NOT NULL,
+                    status        TEXT NOT NULL,
+                    attempts      INTEGER NOT NULL DEFAULT 0,
+                    available_at  REAL NOT NULL DEFAULT 0,
+                    lease_owner   TEXT,
+                    lease_token   TEXT,
+                    lease_expires REAL,
+                    last_error    TEXT,
+                    result        TEXT,
+                    UNIQUE (kind, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS units_ready ON units (kind, status, available_at)")
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def submit(self, kind: str, units: Iterable[tuple[str, dict]], reset: bool = False) -> int:
+        """
+        Add (key, payload) units. Keys already queued for `kind` are left as
+        they are, so a restarted coordinator does not duplicate work; with
+        `reset` finished and failed ones are queued again. Returns the number
+        of units added or reset.
+        """
+        added = 0
+        with self._transaction() as conn:
+            for key, payload in units:
+                cur = conn.execute(
+                    "INSERT INTO units (kind, key, payload, status) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (kind, key) DO NOTHING",
+                    (kind, key, json.dumps(payload), PENDING),
+                )
+                if cur.rowcount == 0 and reset:
+                    cur = conn.execute(
+                        "UPDATE units SET payload = ?, status = ?, attempts = 0, available_at = 0, "
+                        "last_error = NULL, result = NULL WHERE kind = ? AND key = ? AND status IN (?, ?)",
+                        (json.dumps(payload), PENDING, kind, key, DONE, FAILED),
+                    )
+                added += cur.rowcount
+        inc("queue.submitted", added)
+        return added
+
+    def lease(self, kind: str, owner: str) -> WorkUnit | None:
+        """The next unit that is ready, or None when none is (there may still be some running)."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases used up their attempt; give up on units that have none left
+            expired = conn.execute(
+                "UPDATE units SET status = ?, last_error = 'lease expired', lease_token = NULL "
+                "WHERE kind = ? AND status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, kind, LEASED, now, self.max_attempts),
+            ).rowcount
+            row = conn.execute(
+                "SELECT unit_id, key, payload, attempts FROM units "
+                "WHERE kind = ? AND ((status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?)) "
+                "ORDER BY attempts, unit_id LIMIT 1",
+                (kind, PENDING, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                unit = None
+            else:
+                unit_id, key, payload, attempts = row
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE units SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_token = ?, "
+                    "lease_expires = ? WHERE unit_id = ?",
+                    (LEASED, owner, token, now + self.lease_seconds, unit_id),
+                )
+                unit = WorkUnit(unit_id, kind, key, json.loads(payload), attempts + 1, token)
+        if expired:
+            inc("queue.failed", expired)
+        if unit is not None:
+            inc("queue.leased")
+        return unit
+
+    def heartbeat(self, unit: WorkUnit) -> bool:
+        """Extend the lease; False once it was lost to another worker."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE units SET lease_expires = ? WHERE unit_id = ? AND lease_token = ? AND status = ?",
+                (time.time() + self.lease_seconds, unit.unit_id, unit.token, LEASED),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, unit: WorkUnit, result: dict | None = None) -> bool:
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE units SET status = ?, result = ?, lease_token = NULL, lease_expires = NULL "
+                "WHERE unit_id = ? AND lease_token = ? AND status = ?",
+                (DONE, json.dumps(result) if result is not None else None, unit.unit_id, unit.token, LEASED),
+            )
+        if cur.rowcount == 1:
+            inc("queue.done")
+        return cur.rowcount == 1
+
+    def fail(self, unit: WorkUnit, error: str) -> bool:
+        """Queue the unit again after a back-off, or mark it failed once it used all attempts."""
+        final = unit.attempt >= self.max_attempts
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE units SET status = ?, available_at = ?, last_error = ?, lease_token = NULL, "
+                "lease_expires = NULL WHERE unit_id = ? AND lease_token = ? AND status = ?",
+                (FAILED if final else PENDING, time.time() + self.retry_delay * 2 ** (unit.attempt - 1),
+                 error, unit.unit_id, unit.token, LEASED),
+            )
+        if cur.rowcount == 1:
+            inc("queue.failed" if final else "queue.retried")
+        return cur.rowcount == 1
+
+    def counts(self, kind: str) -> dict[str, int]:
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            counts.update(self._conn.execute(
+                "SELECT status, COUNT(*) FROM units WHERE kind = ? GROUP BY status", (kind,)
+            ).fetchall())
+        return counts
+
+    def is_drained(self, kind: str) -> bool:
+        """True once every unit of `kind` is done or failed for good."""
+        counts = self.counts(kind)
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def units(self, kind: str) -> list[dict]:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT key, status, attempts, lease_owner, last_error, result FROM units "
+                "WHERE kind = ? ORDER BY unit_id", (kind,)
+            )
+            names = [column[0] for column in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def close(self):
+        self._conn.close()
+
+
+# ─────────── Worker loop ─────────── #
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _keep_alive(queue: WorkQueue, unit: WorkUnit, stop: threading.Event, lost: threading.Event, every: float):
+    while not stop.wait(every):
+        if not queue.heartbeat(unit):
+            lost.set()
+            return
+
+
+def run_worker(queue: WorkQueue, kind: str, handler: Callable[[dict], dict | None],
+               owner: str | None = None, poll_seconds: float = POLL_SECONDS,
+               stop: threading.Event | None = None) -> WorkerStats:
+    """
+    Lease units of `kind` and run `handler(payload)` on each until the queue
+    is drained (or `stop` is set). The lease is renewed in the background every
+    third of `lease_seconds` while the handler runs. An exception fails the
+    unit, which the queue retries; the handler's return value is stored as the
+    unit's result. Handlers must be safe to run twice on the same unit, a
+    lease that expired mid-run is handed to another worker.
+    """
+    owner = owner or worker_name()
+    stop = stop or threading.Event()
+    stats = WorkerStats()
+    while not stop.is_set():
+        unit = queue.lease(kind, owner)
+        if unit is None:
+            if queue.is_drained(kind):
+                break
+            # Units are running elsewhere or waiting out a retry delay
+            stop.wait(poll_seconds)
+            continue
+
+        logger.info("%s: unit %s (attempt %d)", owner, unit.key, unit.attempt)
+        done, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=_keep_alive, daemon=True,
+                                     args=(queue, unit, done, lost, queue.lease_seconds / 3))
+        heartbeat.start()
+        try:
+            with timer(f"queue.unit.{kind}"):
+                result = handler(unit.payload)
+        except Exception as e:
+            logger.exception("%s: unit %s failed", owner, unit.key)
+            done.set()
+            heartbeat.join()
+            if queue.fail(unit, f"{type(e).__name__}: {e}"):
+                stats.failed += 1
+            else:
+                stats.lost += 1
+            continue
+        done.set()
+        heartbeat.join()
+        if queue.complete(unit, result):
+            stats.done += 1
+        else:
+            logger.warning("%s: lease on %s expired before it finished", owner, unit.key)
+            stats.lost += 1
+    return stats
@@ -0,0 +1,153 @@
+import unittest
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import tempfile
+import time
+import httpx
+from fakes import FakeBackend, FakeLLM, LocalBroker, job
+from async_worker import AgentWorker
+from prompts import FALLBACK_ANSWER
+from response_cache import ResponseCache
+from shared.catalog_index import CatalogIndex, CatalogRecord, update_index
+
+RESPONSE_URL = "http://backend.test/internal/agent-response"
+
+
+class AsyncWorker_test(unittest.IsolatedAsyncioTestCase):
+
+
+    async def drain(self, bodies, llm, backend, concurrency, cache=None, catalog=None):
+        worker = AgentWorker(llm.client(), backend.client(), RESPONSE_URL, concurrency, cache=cache, catalog=catalog)
+        broker = LocalBroker(bodies, prefetch=concurrency)
+        with contextlib.redirect_stdout(io.StringIO()):
+            await broker.drain(worker.handle)
+        return worker, broker
+
+
+    async def test_acks_after_delivery(self):
+        llm, backend = FakeLLM(), FakeBackend()
+        profile = {"allergies": ["noten"], "summary": {"goal": "afvallen"}}
+        worker, broker = await self.drain([job(1, profile=profile)], llm, backend, concurrency=2)
+
+        self.assertEqual(backend.posts, [{"userId": "user-1", "jobId": "job-1", "message": "Eet havermout met fruit."}])
+        self.assertEqual([m.outcome for m in broker.settled], ["ack"])
+        self.assertIn("noten", llm.requests[0]["messages"][1]["content"])
+
+
+    async def test_failed_delivery_is_requeued_not_acked(self):
+        llm, backend = FakeLLM(), FakeBackend(fail_first=1)
+        worker, broker = await self.drain([job(1)], llm, backend, concurrency=1)
+
+        self.assertEqual([m.outcome for m in broker.settled], ["nack", "ack"])
+        self.assertEqual(len(backend.posts), 1)
+
+
+    async def test_transport_error_is_requeued(self):
+        llm, backend = FakeLLM(), FakeBackend()
+        attempts = []
+
+        async def flaky(request):
+            attempts.append(request)
+            if len(attempts) == 1:
+                raise httpx.ConnectError("connection refused")
+            return await backend.handler(request)
+
+        worker = AgentWorker(llm.client(), httpx.AsyncClient(transport=httpx.MockTransport(flaky)), RESPONSE_URL, 1)
+        broker = LocalBroker([job(1)], prefetch=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            await broker.drain(worker.handle)
+        self.assertEqual([m.outcome for m in broker.settled], ["nack", "ack"])
+
+
+    async def test_rejected_response_is_not_requeued(self):
+        llm, backend = FakeLLM(), FakeBackend(fail_first=1, fail_status=422)
+        worker, broker = await self.drain([job(1)], llm, backend, concurrency=1)
+
+        self.assertEqual([m.outcome for m in broker.settled], ["reject"])
+        self.assertEqual((backend.posts, worker.failed), ([], 1))
+
+
+    async def test_malformed_message_is_rejected(self):
+        incomplete = json.dumps({"message": {"jobId": "job-1", "newMessage": "Hoi"}}).encode()
+        worker, broker = await self.drain([b"not json", b'{"message": "Hoi"}', incomplete], FakeLLM(), FakeBackend(),
+                                          concurrency=1)
+        self.assertEqual([m.outcome for m in broker.settled], ["reject"] * 3)
+
+
+    async def test_catalog_error_falls_back_and_acks(self):
+        class BrokenCatalog:
+            def reload_if_changed(self):
+                raise OSError("index is being replaced")
+
+        llm, backend = FakeLLM(), FakeBackend()
+        worker, broker = await self.drain([job(1)], llm, backend, concurrency=1, catalog=BrokenCatalog())
+
+        self.assertEqual([m.outcome for m in broker.settled], ["ack"])
+        self.assertEqual(backend.posts, [{"userId": "user-1", "jobId": "job-1", "message": FALLBACK_ANSWER}])
+
+
+    async def test_unexpected_error_rejects_and_frees_the_slot(self):
+        llm, backend = FakeLLM(), FakeBackend()
+        worker = AgentWorker(llm.client(), backend.client(), RESPONSE_URL, 1)
+
+        async def broken(payload):
+            raise RuntimeError("bug")
+
+        worker.generate = broken
+        broker = LocalBroker([job(1), job(2)], prefetch=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.wait_for(broker.drain(worker.handle), timeout=5)
+        self.assertEqual([m.outcome for m in broker.settled], ["reject", "reject"])
+
+
+    async def test_repeated_question_is_answered_from_cache(self):
+        llm, backend, cache = FakeLLM(), FakeBackend(), ResponseCache()
+        await self.drain([job(1)], llm, backend, concurrency=1, cache=cache)
+        await self.drain([job(1), job(1, message="Mag ik pindakaas?")], llm, backend, concurrency=1, cache=cache)
+
+        self.assertEqual(len(llm.requests), 2)
+        self.assertEqual(len(backend.posts), 3)
+        self.assertEqual(cache.stats.memory_hits, 1)
+
+
+    async def test_new_catalog_generation_is_not_answered_from_cache(self):
+        llm, backend, cache = FakeLLM(), FakeBackend(), ResponseCache()
+        question = "Iets eiwitrijks?"
+        with tempfile.TemporaryDirectory() as root:
+            update_index(root, [CatalogRecord("A1", "Skyr Naturel", price=1.79, protein=11.0)])
+            catalog = CatalogIndex(root)
+            await self.drain([job(1, message=question), job(1, message=question)], llm, backend, concurrency=1,
+                             cache=cache, catalog=catalog)
+            # The next ETL run changes the price the cached answer quotes
+            update_index(root, [CatalogRecord("A1", "Skyr Naturel", price=1.49, protein=11.0)])
+            await self.drain([job(1, message=question)], llm, backend, concurrency=1, cache=cache, catalog=catalog)
+            catalog.close()
+
+        self.assertEqual(len(llm.requests), 2)
+        self.assertEqual(cache.stats.memory_hits, 1)
+        self.assertIn("€1.49", llm.requests[1]["messages"][1]["content"])
+
+
+    async def test_load(self):
+        # 200 jobs against an LLM that takes 20 ms per call
+        messages, latency, concurrency = 200, 0.02, 16
+        llm, backend = FakeLLM(latency=latency), FakeBackend()
+
+        start = time.perf_counter()
+        worker, broker = await self.drain([job(n) for n in range(messages)], llm, backend, concurrency)
+        elapsed = time.perf_counter() - start
+
+        p95 = statistics.quantiles(worker.latencies, n=20)[-1]
+        print(f"\n{messages / elapsed:.0f} msg/s, p95 latency {p95 * 1000:.0f} ms "
+              f"(concurrency {concurrency}, LLM {latency * 1000:.0f} ms)")
+        self.assertEqual(len(backend.posts), messages)
+        self.assertLessEqual(broker.max_unacked, concurrency)
+        # One-at-a-time handling would need messages * latency seconds
+        self.assertLess(elapsed, messages * latency / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
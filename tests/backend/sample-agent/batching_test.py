@@ -0,0 +1,81 @@
+import unittest
+import contextlib
+import io
+import time
+from fakes import FakeBackend, FakeLLM, LocalBroker, job
+from async_worker import AgentWorker
+from batching import BatchScheduler
+
+RESPONSE_URL = "http://backend.test/internal/agent-response"
+BULK_URL = "http://backend.test/internal/agent-responses"
+
+
+class BatchScheduler_test(unittest.IsolatedAsyncioTestCase):
+
+
+    async def drain(self, bodies, llm, backend, max_batch, concurrency, window=0.01, bulk_url=BULK_URL):
+        worker = AgentWorker(llm.client(), backend.client(), RESPONSE_URL, concurrency)
+        scheduler = BatchScheduler(worker, max_batch, window, bulk_url)
+        broker = LocalBroker(bodies, prefetch=max_batch * 2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            await broker.drain(scheduler.submit)
+        return scheduler, worker, broker
+
+
+    async def test_full_batches_are_posted_in_bulk_and_acked_one_by_one(self):
+        llm, backend = FakeLLM(), FakeBackend()
+        scheduler, worker, broker = await self.drain([job(n) for n in range(8)], llm, backend,
+                                                     max_batch=4, concurrency=4)
+
+        self.assertEqual(scheduler.batch_sizes, [4, 4])
+        self.assertEqual(backend.bulk_posts, 2)
+        self.assertEqual(sorted(p["userId"] for p in backend.posts), sorted(f"user-{n}" for n in range(8)))
+        self.assertEqual([m.outcome for m in broker.settled], ["ack"] * 8)
+
+
+    async def test_window_flushes_a_partial_batch(self):
+        llm, backend = FakeLLM(), FakeBackend()
+        scheduler, worker, broker = await self.drain([job(1), job(2), job(3)], llm, backend,
+                                                     max_batch=10, concurrency=4)
+        self.assertEqual(scheduler.batch_sizes, [3])
+        self.assertEqual(worker.handled, 3)
+
+
+    async def test_failed_bulk_post_falls_back_to_single_posts(self):
+        llm, backend = FakeLLM(), FakeBackend(fail_bulk=True)
+        scheduler, worker, broker = await self.drain([job(n) for n in range(4)], llm, backend,
+                                                     max_batch=4, concurrency=4)
+        self.assertEqual(backend.bulk_posts, 0)
+        self.assertEqual(len(backend.posts), 4)
+        self.assertEqual([m.outcome for m in broker.settled], ["ack"] * 4)
+
+
+    async def test_malformed_message_is_rejected_without_failing_the_batch(self):
+        llm, backend = FakeLLM(), FakeBackend()
+        scheduler, worker, broker = await self.drain([job(1), b"not json", job(2)], llm, backend,
+                                                     max_batch=3, concurrency=3)
+        self.assertEqual(sorted(m.outcome for m in broker.settled), ["ack", "ack", "reject"])
+        self.assertEqual(len(backend.posts), 2)
+
+
+    async def test_backlog_drain_throughput(self):
+        # A backlog of 200 jobs against an LLM that takes 20 ms per call
+        messages, latency = 200, 0.02
+        llm, backend = FakeLLM(latency=latency), FakeBackend()
+
+        start = time.perf_counter()
+        scheduler, worker, broker = await self.drain([job(n) for n in range(messages)], llm, backend,
+                                                     max_batch=16, concurrency=16)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{messages / elapsed:.0f} msg/s, {len(scheduler.batch_sizes)} batches, "
+              f"{backend.bulk_posts} bulk posts for {messages} answers")
+        self.assertEqual(worker.handled, messages)
+        self.assertLessEqual(backend.bulk_posts, len(scheduler.batch_sizes))
+        self.assertLess(backend.bulk_posts, messages / 4)
+        # One-at-a-time handling would need messages * latency seconds
+        self.assertLess(elapsed, messages * latency / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+from pathlib import Path
+import fakes  # noqa: F401  (puts the agent directory on sys.path)
+from catalog import find_products, format_products, question_filters
+from prompts import PRODUCTS_HEADER, build_messages
+from shared.catalog_index import CatalogIndex, CatalogRecord, update_index
+
+RECORDS = [
+    CatalogRecord("A1", "Skyr Naturel", "zuivel,-eieren,-boter", price=1.79, kcal=63, protein=11.0, fat=0.2,
+                  sugar=4.0),
+    CatalogRecord("B2", "Notenmix Ongezouten", "koek,-snoep,-chocolade-en-chips", price=2.99, kcal=610,
+                  protein=20.0, sugar=4.0),
+    CatalogRecord("C3", "Kipfilet", "vlees,-vis-en-vega", price=4.99, kcal=110, protein=23.5, fat=1.5, sugar=0.0),
+    CatalogRecord("D4", "Kwark Mager", "zuivel,-eieren,-boter", price=1.15, kcal=57, protein=10.0, fat=0.1,
+                  sugar=3.5),
+]
+
+
+class Catalog_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        update_index(Path(self.tmp.name), RECORDS)
+        self.index = CatalogIndex(self.tmp.name)
+
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+
+    def test_question_filters(self):
+        self.assertEqual(question_filters("High protein snacks under €3 without nuts?"),
+                         {"ranges": {"protein": (10.0, None), "price": (None, 3.0)},
+                          "exclude": ["allergen:nuts", "allergen:peanuts"], "sort": "-protein"})
+        self.assertEqual(question_filters("Iets eiwitrijks onder de 2,50 euro, notenvrij")["ranges"],
+                         {"protein": (10.0, None), "price": (None, 2.5)})
+        self.assertEqual(question_filters("Iets eiwitrijks, notenvrij")["exclude"],
+                         ["allergen:nuts", "allergen:peanuts"])
+        # Allergies in the dossier always count
+        filters = question_filters("Wat is een goed ontbijt?", {"allergies": ["Lactose", "Shellfish"]})
+        self.assertEqual(filters, {"ranges": {}, "exclude": ["allergen:milk", "allergen:shellfish"], "sort": None})
+        self.assertEqual(question_filters("I ate 3 eggs")["ranges"], {})
+
+
+    def test_nutrition_limits_are_not_prices(self):
+        self.assertEqual(question_filters("high protein under 200 kcal")["ranges"], {"protein": (10.0, None)})
+        self.assertEqual(question_filters("high protein, max 5 g sugar")["ranges"], {"protein": (10.0, None)})
+        self.assertEqual(question_filters("high protein, max 5 euro")["ranges"],
+                         {"protein": (10.0, None), "price": (None, 5.0)})
+        self.assertEqual(question_filters("iets goedkoper dan € 1,50")["ranges"], {"price": (None, 1.5)})
+
+
+    def test_allergies_stated_in_the_question(self):
+        nuts = ["allergen:nuts", "allergen:peanuts"]
+        self.assertEqual(question_filters("I have a nut allergy, high protein please")["exclude"], nuts)
+        self.assertEqual(question_filters("Ik heb een notenallergie, iets eiwitrijks?")["exclude"], nuts)
+        self.assertEqual(question_filters("I'm allergic to peanuts and fish. High protein?")["exclude"],
+                         ["allergen:fish", "allergen:peanuts"])
+        self.assertEqual(question_filters("Ik ben lactose intolerant, eiwitrijk graag")["exclude"], ["allergen:milk"])
+
+
+    def test_grounded_prompt(self):
+        products = find_products(self.index, "high protein under €3 without nuts")
+        self.assertEqual([product["sku"] for product in products], ["A1", "D4"])
+        self.assertEqual(find_products(self.index, "high protein", {"allergies": ["Lactose"]})[0]["sku"], "C3")
+        self.assertEqual(find_products(self.index, "Wat is een goed ontbijt?"), [])
+        self.assertEqual([product["sku"] for product in find_products(self.index, "nut allergy, high protein")],
+                         ["C3", "A1", "D4"])
+
+        lines = format_products(products)
+        self.assertEqual(lines.splitlines()[0],
+                         "- Skyr Naturel | €1.79 | per 100 g: 63 kcal, protein 11g, sugar 4g, fat 0.2g")
+        user_prompt = build_messages("high protein under €3 without nuts", None, products=lines)[1]["content"]
+        self.assertTrue(user_prompt.endswith(f"{PRODUCTS_HEADER}\n{lines}"))
+        self.assertEqual(len(format_products(products, token_budget=30).splitlines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+import httpx
+import openai
+
+# The agent is a standalone uv project, not a package
+AGENT_DIR = Path(__file__).resolve().parents[3] / "backend" / "sample-agent"
+sys.path.insert(0, str(AGENT_DIR))
+
+
+def job(n, message="Wat kan ik eten als ontbijt?", profile=None):
+    payload = {"jobId": f"job-{n}", "userId": f"user-{n}", "newMessage": message, "userProfile": profile}
+    return json.dumps({"message": payload}).encode()
+
+
+class FakeMessage:
+    """Stand-in for aio_pika.IncomingMessage."""
+
+    def __init__(self, broker, body):
+        self.broker = broker
+        self.body = body
+        self.outcome = None
+
+    async def ack(self):
+        self.outcome = "ack"
+        self.broker._settle(self)
+
+    async def nack(self, requeue=True):
+        self.outcome = "nack"
+        self.broker._settle(self, requeue)
+
+    async def reject(self, requeue=False):
+        self.outcome = "reject"
+        self.broker._settle(self, requeue)
+
+
+class LocalBroker:
+    """
+    In-process stand-in for one RabbitMQ queue: delivers up to `prefetch`
+    unacked messages to the consumer at a time and redelivers nacked ones.
+    """
+
+    def __init__(self, bodies, prefetch):
+        self.ready = list(bodies)
+        self.prefetch = prefetch
+        self.unacked = 0
+        self.max_unacked = 0
+        self.settled = []
+        self._changed = asyncio.Event()
+
+    def _settle(self, message, requeue=False):
+        self.unacked -= 1
+        self.settled.append(message)
+        if requeue:
+            self.ready.append(message.body)
+        self._changed.set()
+
+    async def drain(self, callback):
+        """Deliver until every message is settled without requeue."""
+        tasks = set()
+        while self.ready or self.unacked:
+            while self.ready and self.unacked < self.prefetch:
+                self.unacked += 1
+                self.max_unacked = max(self.max_unacked, self.unacked)
+                tasks.add(asyncio.create_task(callback(FakeMessage(self, self.ready.pop(0)))))
+            self._changed.clear()
+            await self._changed.wait()
+        await asyncio.gather(*tasks)
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+    }
+
+
+def completion_chunk(content):
+    return {
+        "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": "fake",
+        "choices": [{"index": 0, "finish_reason": None, "delta": {"content": content}}],
+    }
+
+
+def tokens(answer):
+    """Split an answer roughly like a tokenizer would: words with their leading space."""
+    words = answer.split(" ")
+    return [words[0]] + [" " + word for word in words[1:]]
+
+
+async def sse_stream(answer, latency, token_delay):
+    await asyncio.sleep(latency)
+    for token in tokens(answer):
+        yield f"data: {json.dumps(completion_chunk(token))}\n\n".encode()
+        await asyncio.sleep(token_delay)
+    yield b"data: [DONE]\n\n"
+
+
+class FakeLLM:
+    """
+    OpenAI-compatible endpoint served through httpx.MockTransport. `latency`
+    is the time to the first token; streamed requests then get one token
+    every `token_delay` seconds, plain ones get the whole answer at the end.
+    """
+
+    def __init__(self, latency=0.0, answer="Eet havermout met fruit.", token_delay=0.0):
+        self.latency = latency
+        self.answer = answer
+        self.token_delay = token_delay
+        self.requests = []
+
+    async def handler(self, request):
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if body.get("stream"):
+            return httpx.Response(200, headers={"content-type": "text/event-stream"},
+                                  content=sse_stream(self.answer, self.latency, self.token_delay))
+        await asyncio.sleep(self.latency + self.token_delay * len(tokens(self.answer)))
+        return httpx.Response(200, json=completion(self.answer))
+
+    def client(self):
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return openai.AsyncOpenAI(api_key="test", base_url="http://llm.test/v1", http_client=http, max_retries=0)
+
+
+class FakeBackend:
+    """
+    Records what the agent posts to /internal/agent-response, the bulk
+    /internal/agent-responses and, when streaming, the chunk endpoint.
+    """
+
+    def __init__(self, fail_first=0, fail_bulk=False, fail_status=503):
+        self.posts = []
+        self.chunks = []
+        self.bulk_posts = 0
+        self.fail_first = fail_first
+        self.fail_bulk = fail_bulk
+        self.fail_status = fail_status
+
+    async def handler(self, request):
+        body = json.loads(request.content)
+        if self.fail_first or (self.fail_bulk and isinstance(body, list)):
+            self.fail_first = max(self.fail_first - 1, 0)
+            return httpx.Response(self.fail_status)
+        if isinstance(body, list):
+            self.bulk_posts += 1
+            self.posts.extend(body)
+        elif request.url.path.endswith("-chunk"):
+            self.chunks.append(body)
+        else:
+            self.posts.append(body)
+        return httpx.Response(200)
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
@@ -0,0 +1,68 @@
+import unittest
+import json
+import fakes  # noqa: F401  (puts the agent directory on sys.path)
+from prompt_builder import compact_profile, count_tokens
+from prompts import build_messages
+
+# Same shape as the Angular UserDossier
+DOSSIER = {
+    "summary": {"name": "Leha", "avatar": "assets/kaban.png", "goal": "Muscle Gain", "calorieTarget": 2800,
+                "macros": {"protein": 180, "carbs": 250, "fats": 70}},
+    "goals": {"age": 45, "sex": "M", "description": "Lean muscle, little fat gain.",
+              "activity": "Moderately Active (3-5 workouts/week)", "maintenanceCalories": 2500,
+              "estimatedWeeklyChange": "+0.3kg"},
+    "preferences": {"mealsPerDay": 3, "budget": {"perDay": 15, "perWeek": 100},
+                    "equipment": {"oven": True, "stove": True, "airFryer": False, "slowCooker": False},
+                    "cookingMethods": {"raw": True, "fried": False, "baked": True},
+                    "portionSize": "Medium", "mealPrep": {"difficulty": "Medium", "cookingTime": "30-45 minutes"}},
+    "food": {"favorites": ["Pasta", "Salmon"], "dislikes": ["Liver"]},
+    "allergies": ["Peanuts", "Shellfish"],
+}
+
+
+class PromptBuilder_test(unittest.TestCase):
+
+
+    def test_compact_format(self):
+        lines = compact_profile(DOSSIER).splitlines()
+
+        self.assertEqual(lines[0], "allergies: Peanuts, Shellfish")
+        self.assertEqual(lines[1], "food: favorites=Pasta, Salmon; dislikes=Liver")
+        self.assertIn("summary: goal=Muscle Gain; calorieTarget=2800; macros.protein=180", lines[2])
+        self.assertIn("equipment=oven, stove; cookingMethods=raw, baked", lines[4])
+        text = "\n".join(lines)
+        for dropped in ("airFryer", "fried", "avatar", "Leha"):
+            self.assertNotIn(dropped, text)
+
+
+    def test_budget_keeps_allergies(self):
+        compact = compact_profile(DOSSIER, token_budget=25)
+        self.assertLessEqual(count_tokens(compact), 25)
+        self.assertTrue(compact.startswith("allergies: Peanuts, Shellfish"))
+        self.assertNotIn("preferences", compact)
+
+        self.assertEqual(compact_profile(DOSSIER, token_budget=0).splitlines(), ["allergies: Peanuts, Shellfish"])
+
+
+    def test_compact_prompt_is_smaller(self):
+        compact = build_messages("Wat eet ik vanavond?", DOSSIER, prompt_format="compact")
+        full = build_messages("Wat eet ik vanavond?", DOSSIER, prompt_format="json")
+
+        self.assertIn(json.dumps(DOSSIER, indent=2), full[1]["content"])
+        self.assertIn("Question: Wat eet ik vanavond?", compact[1]["content"])
+        size = lambda messages: sum(count_tokens(m["content"]) for m in messages)
+        self.assertLess(size(compact), size(full) * 0.7)
+
+
+    def test_missing_profile_uses_generic_prompt(self):
+        self.assertEqual(build_messages("Hoi", None)[1]["content"], "Hoi")
+        self.assertEqual(build_messages("Hoi", {})[1]["content"], "Hoi")
+
+
+    def test_token_estimate(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertGreater(count_tokens("allergies: Peanuts, Shellfish"), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
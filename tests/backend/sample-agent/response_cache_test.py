@@ -0,0 +1,107 @@
+import unittest
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+import fakes  # noqa: F401  (puts the agent directory on sys.path)
+from response_cache import ResponseCache, cache_key, normalize_question
+
+PROFILE = {"allergies": ["Selderij"], "summary": {"goal": "afvallen"}, "preferences": {"vegetarian": True}}
+QUESTION = "Wat kan ik eten als ontbijt?"
+ANSWER = "Eet havermout met fruit."
+
+
+class ResponseCache_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "cache.sqlite"
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def test_key_ignores_formatting_and_key_order(self):
+        reordered = {"preferences": {"vegetarian": True}, "summary": {"goal": "afvallen"}, "allergies": ["Selderij"]}
+        self.assertEqual(normalize_question("  Wat kan ik eten,  als ONTBIJT?? "), "wat kan ik eten als ontbijt")
+        self.assertEqual(cache_key("u1", PROFILE, QUESTION), cache_key("u1", reordered, "wat kan ik eten als ontbijt"))
+        self.assertNotEqual(cache_key("u1", PROFILE, QUESTION), cache_key("u1", {**PROFILE, "allergies": []}, QUESTION))
+        self.assertNotEqual(cache_key("u1", PROFILE, QUESTION), cache_key("u2", PROFILE, QUESTION))
+
+
+    def test_memory_then_disk_hit(self):
+        cache = ResponseCache(self.path)
+        self.assertIsNone(cache.get("u1", PROFILE, QUESTION))
+        cache.put("u1", PROFILE, QUESTION, ANSWER)
+        self.assertEqual(cache.get("u1", PROFILE, "wat kan ik eten als ontbijt"), ANSWER)
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get("u1", PROFILE, QUESTION), ANSWER)
+        self.assertEqual(reopened.get("u1", PROFILE, QUESTION), ANSWER)
+        self.assertEqual((reopened.stats.disk_hits, reopened.stats.memory_hits), (1, 1))
+        self.assertEqual(cache.stats.as_dict()["hit_rate"], 0.5)
+        reopened.close()
+
+
+    def test_expired_answers_are_regenerated(self):
+        cache = ResponseCache(self.path, ttl_seconds=60)
+        cache.put("u1", PROFILE, QUESTION, ANSWER)
+        with mock.patch("response_cache.time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("u1", PROFILE, QUESTION))
+        self.assertEqual(cache.stats.misses, 1)
+        cache.close()
+
+
+    def test_lru_eviction_in_both_tiers(self):
+        cache = ResponseCache(self.path, max_memory_entries=2, max_disk_entries=3)
+        for n in range(5):
+            cache.put("u1", PROFILE, f"vraag {n}", f"antwoord {n}")
+        self.assertEqual(len(cache._memory), 2)
+        self.assertEqual(cache._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0], 3)
+        self.assertIsNone(cache.get("u1", PROFILE, "vraag 0"))
+        self.assertEqual(cache.get("u1", PROFILE, "vraag 2"), "antwoord 2")
+        cache.close()
+
+
+    def test_profile_change_drops_the_users_answers(self):
+        cache = ResponseCache(self.path)
+        cache.put("u1", PROFILE, QUESTION, ANSWER)
+        cache.put("u2", PROFILE, QUESTION, ANSWER)
+
+        changed = {**PROFILE, "allergies": ["Selderij", "Pinda"]}
+        self.assertIsNone(cache.get("u1", changed, QUESTION))
+        self.assertIsNone(cache.get("u1", PROFILE, QUESTION))
+        self.assertEqual(cache.get("u2", PROFILE, QUESTION), ANSWER)
+        self.assertGreaterEqual(cache.stats.invalidations, 1)
+        cache.close()
+
+
+    def test_profile_change_is_detected_after_restart(self):
+        cache = ResponseCache(self.path)
+        cache.put("u1", PROFILE, QUESTION, ANSWER)
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        reopened.get("u1", {**PROFILE, "allergies": []}, QUESTION)
+        self.assertEqual(reopened._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0], 0)
+        reopened.close()
+
+
+    def test_allergy_questions_bypass_the_cache(self):
+        cache = ResponseCache()
+        for question in ("Mag ik pindakaas?", "Bevat dit eieren?", "Zitten er hazelnoten in?",
+                         "Is soep met selderij ok?", "Ik ben allergisch voor kiwi"):
+            cache.put("u1", PROFILE, question, ANSWER)
+            self.assertIsNone(cache.get("u1", PROFILE, question), question)
+        self.assertEqual(cache.stats.stores, 0)
+        self.assertEqual(cache.stats.misses, 0)
+
+        cache.put("u1", PROFILE, "Is wei eiwit goed na het sporten?", ANSWER)
+        self.assertEqual(cache.get("u1", PROFILE, "Is wei eiwit goed na het sporten?"), ANSWER)
+
+
+if __name__ == "__main__":
+    unittest.main()
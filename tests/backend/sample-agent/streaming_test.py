@@ -0,0 +1,69 @@
+import unittest
+import contextlib
+import io
+import time
+from fakes import FakeBackend, FakeLLM, LocalBroker, job
+from async_worker import AgentWorker
+from streaming import ChunkBatcher
+
+RESPONSE_URL = "http://backend.test/internal/agent-response"
+CHUNK_URL = "http://backend.test/internal/agent-response-chunk"
+ANSWER = "Begin de dag met havermout, yoghurt en een handje blauwe bessen voor extra vezels."
+
+
+class ChunkBatcher_test(unittest.IsolatedAsyncioTestCase):
+
+
+    async def test_first_delta_is_sent_alone_then_batched_by_size(self):
+        backend = FakeBackend()
+        batcher = ChunkBatcher(backend.client(), CHUNK_URL, "user-1", "job-1", flush_chars=10, flush_interval=60)
+        for delta in ["Eet", " meer", " groente", " en", " fruit"]:
+            await batcher.add(delta)
+        await batcher.flush(done=True)
+
+        self.assertEqual([c["delta"] for c in backend.chunks], ["Eet", " meer groente", " en fruit"])
+        self.assertEqual([c["sequence"] for c in backend.chunks], [0, 1, 2])
+        self.assertEqual([c["done"] for c in backend.chunks], [False, False, True])
+
+
+    async def test_old_pending_text_is_flushed(self):
+        backend = FakeBackend()
+        batcher = ChunkBatcher(backend.client(), CHUNK_URL, "user-1", "job-1", flush_chars=1000, flush_interval=0.01)
+        await batcher.add("a")
+        await batcher.add("b")
+        time.sleep(0.02)
+        await batcher.add("c")
+        self.assertEqual([c["delta"] for c in backend.chunks], ["a", "bc"])
+
+
+    async def test_failed_chunk_is_counted_not_raised(self):
+        backend = FakeBackend(fail_first=1)
+        batcher = ChunkBatcher(backend.client(), CHUNK_URL, "user-1", "job-1")
+        with contextlib.redirect_stdout(io.StringIO()):
+            await batcher.add("Eet")
+            await batcher.flush(done=True)
+        self.assertEqual((batcher.errors, batcher.posts), (1, 1))
+
+
+class StreamingWorker_test(unittest.IsolatedAsyncioTestCase):
+
+
+    async def test_streamed_answer_matches_final_message(self):
+        llm, backend = FakeLLM(latency=0.01, answer=ANSWER, token_delay=0.005), FakeBackend()
+        worker = AgentWorker(llm.client(), backend.client(), RESPONSE_URL, 2,
+                             chunk_url=CHUNK_URL, flush_chars=20, flush_interval=60)
+        broker = LocalBroker([job(1)], prefetch=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            await broker.drain(worker.handle)
+
+        self.assertTrue(llm.requests[0]["stream"])
+        self.assertEqual(backend.posts, [{"userId": "user-1", "jobId": "job-1", "message": ANSWER}])
+        self.assertEqual("".join(c["delta"] for c in backend.chunks), ANSWER)
+        self.assertGreater(len(backend.chunks), 2)
+        self.assertTrue(backend.chunks[-1]["done"])
+        self.assertEqual({c["jobId"] for c in backend.chunks}, {"job-1"})
+        self.assertEqual([m.outcome for m in broker.settled], ["ack"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import logging
+import tempfile
+from pathlib import Path
+from shared.catalog_index import CatalogIndex
+from data_processing.ETL.Jumbo.catalog_export import export_index
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from local_bucket import LocalBucket
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+
+
+class CatalogExport_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bucket = LocalBucket(Path(self.tmp.name) / "bucket")
+        self.db_url = f"sqlite:///{Path(self.tmp.name) / 'food.sqlite'}"
+        self.index_path = Path(self.tmp.name) / "catalog"
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def run_parser(self):
+        parser = JumboHTMLParser("dummy", "Jumbo/", self.db_url, catalog_index_path=self.index_path)
+        parser._s3 = self.bucket
+        return parser.run()
+
+
+    def test_parser_run_updates_index(self):
+        for n in range(2):
+            self.bucket.put(f"Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-{n}POT.html",
+                            FIXTURE.read_bytes())
+        self.run_parser()
+        index = CatalogIndex(self.index_path)
+        self.assertEqual(len(index), 2)
+        first_generation = index.generation
+
+        # A later run over one new page merges it into the index
+        self.bucket.put("Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-2POT.html",
+                        FIXTURE.read_bytes())
+        self.run_parser()
+        self.assertTrue(index.reload_if_changed())
+        self.assertGreater(index.generation, first_generation)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(len(index.search(ranges={"price": (0.0, None)}, exclude=["allergen:nuts"])), 0)
+        index.close()
+
+        # Nothing changed since, so a full rebuild writes no new generation
+        self.assertFalse(export_index(self.db_url, self.index_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from shared.work_queue import DONE, WorkQueue, run_worker
+from data_processing.ETL.Jumbo.distributed import KIND, PrefixHandler, etl_units, split_prefix
+from data_processing.ETL.Jumbo.loader import connect
+from local_bucket import LocalBucket
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+CATEGORIES = ["zuivel,-eieren,-boter", "diepvries", "frisdrank-en-sappen"]
+
+
+class DistributedETL_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.bucket = LocalBucket(self.root / "bucket")
+        html = FIXTURE.read_bytes()
+        for n, category in enumerate(CATEGORIES * 2):
+            self.bucket.put(f"Jumbo/{category}/amorelli-pistache-creme-190-g-{n}POT.html", html)
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def test_split_prefix(self):
+        self.assertEqual(split_prefix(self.bucket, "dummy", "Jumbo/"),
+                         [f"Jumbo/{category}/" for category in sorted(CATEGORIES)])
+        self.bucket.put("Jumbo/loose-page.html", b"<html></html>")
+        self.assertEqual(split_prefix(self.bucket, "dummy", "Jumbo/"), ["Jumbo/"])
+
+
+    def test_workers_load_every_prefix(self):
+        queue = WorkQueue(self.root / "queue.sqlite")
+        self.assertEqual(queue.submit(KIND, etl_units(self.bucket, "dummy", "Jumbo/")), 3)
+        db = f"sqlite:///{self.root / 'food.sqlite'}"
+        handler = PrefixHandler(db, manifest_dir=self.root / "manifests", parse_workers=0, s3=self.bucket)
+
+        workers = [threading.Thread(target=run_worker, args=(queue, KIND, handler),
+                                    kwargs={"owner": f"worker-{n}", "poll_seconds": 0.05}) for n in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        units = queue.units(KIND)
+        self.assertEqual([unit["status"] for unit in units], [DONE] * 3)
+        self.assertTrue(all('"processed": 2' in unit["result"] for unit in units))
+        self.assertEqual(len(list((self.root / "manifests").iterdir())), 3)
+        conn, _ = connect(db)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM food.products").fetchone(), (6,))
+        conn.close()
+        queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
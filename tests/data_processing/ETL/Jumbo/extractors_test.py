@@ -0,0 +1,124 @@
+import unittest
+import logging
+from datetime import datetime
+from pathlib import Path
+from benchmarks.synthetic_catalog import generate
+from data_processing.ETL.Jumbo.extractors import ENGINES, extract_bs4, extract_lxml
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+SCRAPED_AT = datetime(2025, 9, 1, 12, 0)
+KEY = "Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-666821POT.html"
+
+# Small pages covering the branches the fixture does not hit
+VARIANTS = {
+    "empty": b"",
+    "no_sections": b"<html><body><p>nothing here</p></body></html>",
+    "two_spans": (b'<html><body><div class="price-per-unit x"><span aria-hidden="true">1,00</span>'
+                  b'<span aria-hidden="true">kilo</span></div></body></html>'),
+    "nested_text": ('<html><body><h1 data-testid="product-title"><!--[--> Melk <b>halfvol</b> '
+                    '<script>var x = 1;</script><!--]--></h1>'
+                    '<div class="price-per-unit"><span aria-hidden="true">1,19</span>'
+                    '<span aria-hidden="true">/</span><span aria-hidden="true"> Liter </span></div>'
+                    '<div data-testid="product-description-text-body"><p>Verse <i>melk</i></p>'
+                    '<ul><li>1,5% vet</li><li> </li><li>Houdbaar <!-- x --> 7 dagen</li></ul></div>'
+                    '<div data-testid="origin-collapsible"><div><div class="content open"><strong>Herkomst</strong>'
+                    '<p>Nederland</p></div></div></div></body></html>').encode("utf-8"),
+    "promotion": ('<html><body><div class="product-panel-info"><h1 data-testid="product-title">Cola</h1>'
+                  '<div class="promotion-details"><div class="promotion-tags"><span class="jum-tag">'
+                  '<span class="tag-line">2e halve prijs</span></span><span class="jum-tag">'
+                  '<span class="tag-line"> </span></span></div></div>'
+                  '<div data-testid="product-price"><div class="current-price"><span aria-hidden="true">1</span>'
+                  '<span aria-hidden="true">49</span></div><div class="old-price">'
+                  '<span aria-hidden="true">€ 1,99</span></div><div class="price-per-unit">'
+                  '<span aria-hidden="true">1,49</span><span aria-hidden="true">/</span>'
+                  '<span aria-hidden="true">liter</span></div></div></div>'
+                  '<div class="product-card"><div class="promotion-tags"><span class="tag-line">1+1 gratis</span>'
+                  '</div></div>'
+                  '<table data-testid="nutritional-values-table-content"><thead><tr><th>Voedingswaarden</th>'
+                  '<th>per 250 ml</th><th>per 100 ml</th></tr></thead><tbody>'
+                  '<tr><td>Energie</td><td>450 kJ</td><td>180 kJ</td></tr>'
+                  '<tr><td>Zout</td><td>0.05 g</td><td>0.02 g</td></tr>'
+                  '<tr><td>Natrium</td><td>40 mg</td><td>16 mg</td></tr>'
+                  '<tr><td>Koolhydraten</td><td>26.5 g</td><td>10.6 g</td></tr></tbody></table>'
+                  '</body></html>').encode("utf-8"),
+}
+
+
+class Extractors_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+
+    def test_engines_extract_identical_fields(self):
+        pages = {"fixture": FIXTURE.read_bytes(), **VARIANTS}
+        for name, content in pages.items():
+            with self.subTest(page=name):
+                self.assertEqual(extract_lxml(content), extract_bs4(content))
+
+
+    def test_nested_text_fields(self):
+        fields = extract_lxml(VARIANTS["nested_text"])
+        self.assertEqual(fields.title, "Melkhalfvol")
+        self.assertEqual(fields.unit_spans, ["1,19", "/", "Liter"])
+        self.assertEqual(fields.description_parts, ["Verse melk", "1,5% vet", "Houdbaar 7 dagen"])
+        self.assertEqual(fields.origin_text, "Nederland")
+
+
+    def test_engines_agree_on_synthetic_catalog(self):
+        for page in generate(12, seed=7):
+            with self.subTest(key=page.key, removed=page.removed, size=page.size):
+                fields = extract_lxml(page.content)
+                self.assertEqual(fields, extract_bs4(page.content))
+                self.assertEqual(fields.title, page.title)
+                self.assertEqual(fields.unit_spans[-1] if fields.has_price_per_unit else None, page.unit_text)
+                self.assertEqual(fields.description_parts, page.description)
+
+
+    def test_price_and_nutrition_fields(self):
+        fields = extract_lxml(VARIANTS["promotion"])
+        self.assertEqual(fields.price_spans, ["1", "49"])
+        self.assertEqual(fields.old_price_spans, ["€ 1,99"])
+        # Tags of recommendation cards outside the product panel are not this product's
+        self.assertEqual(fields.promo_tags, ["2e halve prijs"])
+        self.assertEqual(fields.nutrition_header, ["Voedingswaarden", "per 250 ml", "per 100 ml"])
+        self.assertEqual(fields.nutrition_rows[1], ["Zout", "0.05 g", "0.02 g"])
+
+
+    def test_promotion_rows(self):
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", engine="lxml")
+        result = parser.parse_html(VARIANTS["promotion"], "Jumbo/frisdrank/cola-1-liter-123FLS.html", SCRAPED_AT)
+        price, nutrition = result["price"], result["nutrition"]
+        self.assertEqual((price.regular_price, price.promo_price, price.on_promotion), (1.99, 1.49, True))
+        self.assertEqual((price.promo_type, price.promo_text), ("second_half_price", "2e halve prijs"))
+        self.assertIsNone(price.price_per_kg)
+        # Normalized from the per 250 ml column, natrium wins over salt
+        self.assertEqual(nutrition.kcal_per_100g, 43.02)
+        self.assertEqual(nutrition.sodium_per_100g, 0.02)
+        self.assertEqual(nutrition.carbs_per_100g, 10.6)
+        self.assertIsNone(nutrition.fat_per_100g)
+
+
+    def test_engines_produce_identical_rows(self):
+        pages = {"fixture": FIXTURE.read_bytes(), **VARIANTS}
+        for name, content in pages.items():
+            with self.subTest(page=name):
+                rows = {engine: JumboHTMLParser("dummy", "Jumbo/", "dummy", engine=engine)
+                        .parse_html(content, KEY, SCRAPED_AT) for engine in ENGINES}
+                self.assertEqual(rows["lxml"], rows["bs4"])
+                self.assertEqual(*(repr(result).encode("utf-8") for result in rows.values()))
+
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            JumboHTMLParser("dummy", "Jumbo/", "dummy", engine="regex")
+
+
+if __name__ == "__main__":
+    unittest.main()
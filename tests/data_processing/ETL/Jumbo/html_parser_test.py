@@ -1,8 +1,18 @@
 import unittest
+import json
 import logging
+import tempfile
+from datetime import datetime
 from pathlib import Path
-from shared.models import ProductRow
+from shared.models import NutritionRow, PriceRow, ProductRow
 from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from data_processing.ETL.Jumbo.loader import connect
+from shared.page_archive import ArchiveWriter
+from shared.object_cache import CacheMiss
+from local_bucket import LocalBucket
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+CATEGORY = "ontbijt,-broodbeleg-en-bakproducten"
 
 class JumboParser_test(unittest.TestCase):
 
@@ -49,10 +59,235 @@ class JumboParser_test(unittest.TestCase):
         self.assertEqual(actual_output.country_of_origin, desired_output.country_of_origin)
 
 
+    def test_price_and_nutrition_rows(self):
+        scraped_at = datetime(2025, 9, 1, 12, 0)
+        key = f"Jumbo/{CATEGORY}/amorelli-pistache-creme-190-g-666821POT.html"
+        result = JumboHTMLParser("dummy", "Jumbo/", "dummy").parse_html(FIXTURE.read_bytes(), key, scraped_at)
+
+        self.assertEqual(result["price"], PriceRow(product_id=0, scraped_at=scraped_at, regular_price=4.99,
+                                                   on_promotion=False, price_per_kg=26.26))
+        nutrition = result["nutrition"]
+        self.assertEqual(nutrition, NutritionRow(
+            product_id=0, scraped_at=scraped_at, kcal_per_100g=606.0, protein_per_100g=8.9, fat_per_100g=45.6,
+            carbs_per_100g=37.9, sodium_per_100g=0.08, fiber_per_100g=3.7, sugar_per_100g=36.7,
+            raw_json=nutrition.raw_json))
+        self.assertEqual(nutrition.raw_json["header"], ["Voedingswaarden", "per 100 g"])
+        self.assertIn(["Energie", "2515 kJ / 606 kcal"], nutrition.raw_json["rows"])
+
+
     def run_all(self):
         self.test_predefined_output()
 
 
+class JumboParserPipeline_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bucket = LocalBucket(Path(self.tmp.name))
+        html = FIXTURE.read_bytes()
+        self.keys = [f"Jumbo/{CATEGORY}/amorelli-pistache-creme-190-g-{n}POT.html" for n in range(12)]
+        for key in self.keys:
+            self.bucket.put(key, html)
+        self.bucket.put(f"Jumbo/{CATEGORY}/notes.txt", b"not a page")
+
+        self.parser = JumboHTMLParser("dummy", "Jumbo/", "dummy")
+        self.parser._s3 = self.bucket
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def assert_streamed_all(self, results):
+        self.assertEqual(sorted(key for key, _ in results), sorted(self.keys))
+        for key, result in results:
+            product = result["product"]
+            self.assertEqual(product.external_sku, key.split("-")[-1].split(".")[0])
+            self.assertEqual(product.name, "Amorelli Pistache Crème 190 g")
+
+
+    def test_inline_parse_matches_sequential(self):
+        results = list(self.parser.iter_parsed(fetch_workers=4, parse_workers=0, max_in_flight=3))
+        self.assert_streamed_all(results)
+
+        sequential = {key: self.parser.parse_html(self.parser.load_html(key), key)["product"]
+                      for key in self.parser.iterate_html_keys()}
+        self.assertEqual({key: result["product"] for key, result in results}, sequential)
+
+
+    def test_process_pool(self):
+        results = list(self.parser.iter_parsed(fetch_workers=3, parse_workers=2, max_in_flight=4))
+        self.assert_streamed_all(results)
+
+
+    def test_minified_pages_parse_the_same(self):
+        minifying = JumboHTMLParser("dummy", "Jumbo/", "dummy", minify=True)
+        minifying._s3 = self.bucket
+        results = dict(minifying.iter_parsed(fetch_workers=2, parse_workers=2, max_in_flight=4))
+
+        scraped_at = datetime(2026, 1, 1)
+        for key, result in results.items():
+            expected = self.parser.parse_html(self.parser.load_html(key), key, scraped_at)
+            self.assertEqual(minifying.parse_html(self.parser.load_html(key), key, scraped_at), expected)
+            self.assertEqual(result["product"], expected["product"])
+
+
+    def test_snapshots_are_stamped_with_last_modified(self):
+        modified = {key: self.bucket._describe(key)["LastModified"].replace(tzinfo=None) for key in self.keys}
+        for parse_workers in (0, 2):
+            results = dict(self.parser.iter_parsed(parse_workers=parse_workers, full=True))
+            self.assertEqual({key: result["price"].scraped_at for key, result in results.items()}, modified)
+            self.assertEqual({key: result["nutrition"].scraped_at for key, result in results.items()}, modified)
+
+        # A full re-parse of unchanged pages loads no second snapshot
+        db_url = f"sqlite:///{Path(self.tmp.name) / 'food.sqlite'}"
+        for _ in range(2):
+            parser = JumboHTMLParser("dummy", "Jumbo/", db_url)
+            parser._s3 = self.bucket
+            parser.run(full=True)
+        conn, _ = connect(db_url)
+        counts = [conn.execute(f"SELECT COUNT(*) FROM food.{table}").fetchone()[0] for table in ("prices", "nutrition")]
+        conn.close()
+        self.assertEqual(counts, [len(self.keys), len(self.keys)])
+
+
+    def test_run_writes_metrics_summary(self):
+        metrics_path = Path(self.tmp.name) / "metrics.json"
+        self.parser.run(pipelined=True, fetch_workers=2, parse_workers=2, metrics_path=metrics_path)
+
+        summary = json.loads(metrics_path.read_text())
+        timings, counters = summary["timings_seconds"], summary["counters"]
+        self.assertEqual(timings["s3.get"]["count"], len(self.keys))
+        # Recorded in the parse processes and merged into this one
+        self.assertEqual(timings["etl.parse"]["count"], len(self.keys))
+        self.assertEqual(counters["etl.pages"], len(self.keys))
+        self.assertEqual(counters["s3.list.objects"], len(self.keys) + 1)
+        self.assertEqual(counters["s3.get.bytes"], len(self.keys) * FIXTURE.stat().st_size)
+        self.assertLessEqual(timings["etl.parse"]["p50"], timings["etl.parse"]["p99"])
+
+
+    def test_backpressure_limits_prefetch(self):
+        stream = self.parser.iter_parsed(fetch_workers=8, parse_workers=0, max_in_flight=2)
+        next(stream)
+        # Only the window plus the refill after the first result may have been fetched
+        self.assertLessEqual(len(self.bucket.get_calls), 3)
+        stream.close()
+
+
 if __name__ == "__main__":
     tester = JumboParser_test()
     tester.test_input_output()
+
+
+class JumboParserArchive_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.bucket = LocalBucket(root / "bucket")
+        html = FIXTURE.read_bytes()
+
+        # Two pages in the old per-object layout, five in an archive shard
+        self.object_keys = [f"Jumbo/{CATEGORY}/amorelli-pistache-creme-190-g-{n}POT.html" for n in range(2)]
+        for key in self.object_keys:
+            self.bucket.put(key, html)
+        self.archived_keys = [f"Jumbo/{CATEGORY}/amorelli-pistache-creme-190-g-{n}POT.html" for n in range(10, 15)]
+        writer = ArchiveWriter(root / "out", "Jumbo-test", codec="gzip")
+        for key in self.archived_keys:
+            writer.add(key, html)
+        writer.close()
+        for path in (root / "out").iterdir():
+            self.bucket.put(f"Jumbo/_archive/{path.name}", path.read_bytes())
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def parse_all(self, **kwargs):
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", **kwargs)
+        parser._s3 = self.bucket
+        return {key: result["product"] for key, result in parser.iter_parsed(parse_workers=0)}
+
+
+    def test_reads_both_layouts_with_range_reads(self):
+        products = self.parse_all()
+        self.assertEqual(sorted(products), sorted(self.object_keys + self.archived_keys))
+        self.assertEqual(products[self.archived_keys[0]].external_sku, "10POT")
+        self.assertEqual(products[self.archived_keys[0]].name, "Amorelli Pistache Crème 190 g")
+
+
+    def test_local_shard_is_downloaded_once(self):
+        products = self.parse_all(archive_dir=Path(self.tmp.name) / "cache")
+        self.assertEqual(len(products), 7)
+        self.assertEqual(self.bucket.get_calls.count("Jumbo/_archive/Jumbo-test-0001.pages"), 1)
+
+
+    def test_offline_run_reads_local_shards(self):
+        root = Path(self.tmp.name)
+        self.parse_all(archive_dir=root / "shards", cache_dir=root / "cache")
+        calls = len(self.bucket.get_calls)
+        products = self.parse_all(archive_dir=root / "shards", cache_dir=root / "cache", offline=True)
+        self.assertEqual(sorted(products), sorted(self.object_keys + self.archived_keys))
+        self.assertEqual(len(self.bucket.get_calls), calls)
+
+        # Without the shard on disk an offline run stops instead of calling S3
+        (root / "shards" / "Jumbo-test-0001.pages").unlink()
+        with self.assertRaises(CacheMiss):
+            self.parse_all(archive_dir=root / "shards", cache_dir=root / "cache", offline=True)
+        self.assertEqual(len(self.bucket.get_calls), calls)
+
+
+class JumboParserCache_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.bucket = LocalBucket(root / "bucket")
+        self.cache_dir = root / "cache"
+        html = FIXTURE.read_bytes()
+        self.keys = [f"Jumbo/{CATEGORY}/amorelli-pistache-creme-190-g-{n}POT.html" for n in range(4)]
+        for key in self.keys:
+            self.bucket.put(key, html)
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def parse_all(self, **kwargs):
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", cache_dir=self.cache_dir, **kwargs)
+        parser._s3 = self.bucket
+        return {key: result["product"] for key, result in parser.iter_parsed(parse_workers=0)}
+
+
+    def test_rerun_reads_the_cache(self):
+        first = self.parse_all()
+        self.assertEqual(len(self.bucket.get_calls), len(self.keys))
+        self.assertEqual(self.parse_all(), first)
+        self.assertEqual(len(self.bucket.get_calls), len(self.keys))
+
+
+    def test_offline_run(self):
+        self.parse_all()
+        calls = len(self.bucket.get_calls)
+        products = self.parse_all(offline=True)
+        self.assertEqual(sorted(products), sorted(self.keys))
+        self.assertEqual(len(self.bucket.get_calls), calls)
+
+
+    def test_offline_miss_fails_fast(self):
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", cache_dir=self.cache_dir, offline=True)
+        parser._s3 = self.bucket
+        with self.assertRaises(CacheMiss):
+            parser.load_html(self.keys[0])
+        self.assertEqual(self.bucket.get_calls, [])
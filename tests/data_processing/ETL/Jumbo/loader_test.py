@@ -0,0 +1,139 @@
+import unittest
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from shared.models import ProductRow, PriceRow, NutritionRow
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from data_processing.ETL.Jumbo.loader import CatalogLoader, connect
+from local_bucket import LocalBucket
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+SCRAPED_AT = datetime(2025, 9, 1, 12, 0)
+
+
+def make_result(sku: str, name: str, price: float | None = None, kcal: float | None = None):
+    result = {"product": ProductRow(store_id=1, external_sku=sku, name=name, category="test",
+                                    unit_type="weight", unit_value=1000, unit_description="1 kilogram")}
+    if price is not None:
+        result["price"] = PriceRow(product_id=0, scraped_at=SCRAPED_AT, regular_price=price)
+    if kcal is not None:
+        result["nutrition"] = NutritionRow(product_id=0, scraped_at=SCRAPED_AT, kcal_per_100g=kcal,
+                                           raw_json={"energie": f"{kcal} kcal"})
+    return result
+
+
+class CountingConnection:
+    """Wraps a sqlite3 connection and records every statement executed through its cursors."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+
+    def cursor(self):
+        owner = self
+
+        class Cursor:
+            def __init__(self):
+                self.cur = owner.conn.cursor()
+
+            def execute(self, sql, *args):
+                owner.statements.append(" ".join(sql.split()))
+                return self.cur.execute(sql, *args)
+
+            def executemany(self, sql, rows):
+                owner.statements.append(" ".join(sql.split()))
+                return self.cur.executemany(sql, rows)
+
+            def fetchall(self):
+                return self.cur.fetchall()
+
+            def close(self):
+                self.cur.close()
+
+        return Cursor()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class CatalogLoader_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        conn, self.dialect = connect("sqlite://")
+        self.conn = CountingConnection(conn)
+
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+
+    def query(self, sql):
+        return self.conn.conn.execute(sql).fetchall()
+
+
+    def test_batches_use_set_based_statements(self):
+        loader = CatalogLoader(self.conn, self.dialect, batch_size=50, commit_every=2)
+        for n in range(120):
+            loader.add(make_result(f"SKU{n}", f"Product {n}", price=1.0 + n, kcal=100 + n))
+        loader.close()
+
+        self.assertEqual(loader.stats.batches, 3)
+        self.assertEqual(loader.stats.commits, 2)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM food.products"), [(120,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM food.prices"), [(120,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM food.nutrition"), [(120,)])
+        # One upsert per table per batch, no per-row inserts into the food schema
+        inserts = [sql for sql in self.conn.statements if sql.startswith("INSERT INTO food.")]
+        self.assertEqual(len(inserts), 3 * 3)
+        self.assertTrue(all("SELECT" in sql for sql in inserts))
+
+
+    def test_upsert_and_product_id_lookup(self):
+        loader = CatalogLoader(self.conn, self.dialect, batch_size=10)
+        loader.add(make_result("A1", "Old name", price=2.5))
+        loader.flush()
+        first_id = loader.product_ids["A1"]
+
+        loader.add(make_result("A1", "New name"))
+        loader.add(make_result("B2", "Other", kcal=50))
+        loader.close()
+
+        self.assertEqual(loader.product_ids["A1"], first_id)
+        self.assertEqual(self.query("SELECT product_id, name FROM food.products WHERE external_sku = 'A1'"),
+                         [(first_id, "New name")])
+        self.assertEqual(self.query("SELECT product_id, regular_price FROM food.prices"), [(first_id, 2.5)])
+        self.assertEqual(self.query("SELECT product_id, raw_json FROM food.nutrition"),
+                         [(loader.product_ids["B2"], '{"energie": "50 kcal"}')])
+
+
+    def test_duplicate_sku_in_batch_keeps_last(self):
+        loader = CatalogLoader(self.conn, self.dialect)
+        loader.add(make_result("A1", "First"))
+        loader.add(make_result("A1", "Second"))
+        loader.close()
+        self.assertEqual(self.query("SELECT name FROM food.products"), [("Second",)])
+
+
+    def test_parser_run_loads_into_database(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            bucket = LocalBucket(Path(tmp) / "bucket")
+            for n in range(3):
+                bucket.put(f"Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-{n}POT.html",
+                           FIXTURE.read_bytes())
+            db_path = Path(tmp) / "food.sqlite"
+            parser = JumboHTMLParser("dummy", "Jumbo/", f"sqlite:///{db_path}",
+                                     manifest_path=Path(tmp) / "manifest.sqlite")
+            parser._s3 = bucket
+            parser.run(batch_size=2)
+
+            conn, _ = connect(f"sqlite:///{db_path}")
+            rows = conn.execute("SELECT external_sku, name FROM food.products ORDER BY external_sku").fetchall()
+            conn.close()
+        self.assertEqual(rows, [(f"{n}POT", "Amorelli Pistache Crème 190 g") for n in range(3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import hashlib
+import io
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class LocalBucket:
+    """
+    Directory-backed stand-in for the parts of a boto3 S3 client the ETL uses.
+    Object keys map to files below `root`, e.g. "Jumbo/cat/page.html".
+    """
+
+    def __init__(self, root: Path, page_size: int = 1000):
+        self.root = Path(root)
+        self.page_size = page_size
+        self.get_calls = []
+
+    def put(self, key: str, body: bytes):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+
+    def head_bucket(self, Bucket):
+        return {}
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix="", Delimiter=None, PaginationConfig=None):
+        keys = sorted(
+            path.relative_to(self.root).as_posix()
+            for path in self.root.rglob("*") if path.is_file()
+        )
+        keys = [key for key in keys if key.startswith(Prefix)]
+        if Delimiter is not None:
+            prefixes = sorted({Prefix + key[len(Prefix):].split(Delimiter)[0] + Delimiter
+                               for key in keys if Delimiter in key[len(Prefix):]})
+            keys = [key for key in keys if Delimiter not in key[len(Prefix):]]
+            yield {"CommonPrefixes": [{"Prefix": prefix} for prefix in prefixes],
+                   "Contents": [self._describe(key) for key in keys]}
+            return
+        for start in range(0, len(keys), self.page_size):
+            yield {"Contents": [self._describe(key) for key in keys[start:start + self.page_size]]}
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.get_calls.append(Key)
+        body = (self.root / Key).read_bytes()
+        if Range is not None:
+            first, last = Range.removeprefix("bytes=").split("-")
+            body = body[int(first):int(last) + 1]
+        return {"Body": io.BytesIO(body), "ETag": self._describe(Key)["ETag"]}
+
+    def download_file(self, Bucket, Key, Filename):
+        self.get_calls.append(Key)
+        Path(Filename).write_bytes((self.root / Key).read_bytes())
+
+    def _describe(self, key: str):
+        path = self.root / key
+        body = path.read_bytes()
+        return {
+            "Key": key,
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+            "Size": len(body),
+            "LastModified": datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc),
+        }
@@ -0,0 +1,89 @@
+import unittest
+import logging
+import tempfile
+from pathlib import Path
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from data_processing.ETL.Jumbo.manifest import ParseManifest, content_hash
+from local_bucket import LocalBucket
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+CATEGORY = "ontbijt,-broodbeleg-en-bakproducten"
+
+
+class Manifest_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bucket = LocalBucket(Path(self.tmp.name) / "bucket")
+        self.html = FIXTURE.read_bytes()
+        self.keys = [f"Jumbo/{CATEGORY}/amorelli-pistache-creme-190-g-{n}POT.html" for n in range(5)]
+        for key in self.keys:
+            self.bucket.put(key, self.html)
+        self.manifest_path = Path(self.tmp.name) / "manifest.sqlite"
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def make_parser(self):
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", manifest_path=self.manifest_path)
+        parser._s3 = self.bucket
+        return parser
+
+
+    def test_second_run_skips_without_downloading(self):
+        stats = self.make_parser().run()
+        self.assertEqual((stats.listed, stats.processed, stats.skipped), (5, 5, 0))
+
+        self.bucket.get_calls.clear()
+        stats = self.make_parser().run()
+        self.assertEqual((stats.listed, stats.processed, stats.skipped), (5, 0, 5))
+        self.assertEqual(self.bucket.get_calls, [])
+
+
+    def test_changed_object_is_reprocessed(self):
+        self.make_parser().run(pipelined=True, parse_workers=0)
+        self.bucket.put(self.keys[2], self.html.replace(b"Pistache", b"Hazelnoot"))
+
+        self.bucket.get_calls.clear()
+        stats = self.make_parser().run(pipelined=True, parse_workers=0)
+        self.assertEqual((stats.processed, stats.skipped), (1, 4))
+        self.assertEqual(self.bucket.get_calls, [self.keys[2]])
+
+
+    def test_identical_reupload_is_not_reparsed(self):
+        self.make_parser().run()
+        manifest = ParseManifest(self.manifest_path)
+        manifest.record({"Key": self.keys[0], "ETag": '"stale"', "Size": len(self.html)}, content_hash(self.html))
+        manifest.close()
+
+        self.bucket.get_calls.clear()
+        stats = self.make_parser().run()
+        self.assertEqual((stats.processed, stats.skipped), (0, 5))
+        self.assertEqual(self.bucket.get_calls, [self.keys[0]])
+        # The fresh ETag is recorded, so the next run skips it from the listing alone
+        self.bucket.get_calls.clear()
+        self.make_parser().run()
+        self.assertEqual(self.bucket.get_calls, [])
+
+
+    def test_full_override(self):
+        self.make_parser().run()
+        stats = self.make_parser().run(full=True)
+        self.assertEqual((stats.processed, stats.skipped), (5, 0))
+
+
+    def test_without_manifest_everything_is_processed(self):
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy")
+        parser._s3 = self.bucket
+        parser.run()
+        stats = parser.run()
+        self.assertEqual((stats.processed, stats.skipped), (5, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
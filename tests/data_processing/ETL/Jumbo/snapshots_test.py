@@ -0,0 +1,104 @@
+import unittest
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from shared.models import ProductRow, PriceRow, NutritionRow
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+from data_processing.ETL.Jumbo.loader import CatalogLoader, connect
+from data_processing.ETL.Jumbo.snapshots import SnapshotIndex, nutrition_at, prices_at
+from local_bucket import LocalBucket
+
+FIXTURE = Path(__file__).parent / "amorelli-pistache-creme-190-g-666821POT.html"
+DAYS = [datetime(2025, 9, day, 6, 0) for day in (1, 2, 3)]
+
+
+def make_result(sku: str, scraped_at: datetime, price: float, kcal: float = 100.0):
+    return {
+        "product": ProductRow(store_id=1, external_sku=sku, name=sku),
+        "price": PriceRow(product_id=0, scraped_at=scraped_at, regular_price=price, price_per_kg=price * 4),
+        "nutrition": NutritionRow(product_id=0, scraped_at=scraped_at, kcal_per_100g=kcal,
+                                  raw_json={"header": ["Per 100 g"], "rows": [["Energie", f"{kcal} kcal"]]}),
+    }
+
+
+class SnapshotIndex_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_path = Path(self.tmp.name) / "snapshots.sqlite"
+        self.conn, self.dialect = connect("sqlite://")
+
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def scrape(self, index: SnapshotIndex, scraped_at: datetime, prices: dict[str, float]):
+        loader = CatalogLoader(self.conn, self.dialect, on_commit=index.flush)
+        loader.add_all(index.diff_all(make_result(sku, scraped_at, price) for sku, price in prices.items()))
+        loader.close()
+        return loader
+
+
+    def test_only_changes_are_written(self):
+        index = SnapshotIndex(self.index_path)
+        self.scrape(index, DAYS[0], {"A": 1.0, "B": 2.0})
+        index.close()
+
+        # The index survives a restart
+        index = SnapshotIndex(self.index_path)
+        self.assertEqual(len(index), 2)
+        second = self.scrape(index, DAYS[1], {"A": 1.0, "B": 2.5})
+        self.assertEqual((second.stats.products, second.stats.prices, second.stats.nutrition), (2, 1, 0))
+        self.assertEqual((index.stats.changed, index.stats.unchanged), (1, 3))
+        self.scrape(index, DAYS[2], {"A": 1.0, "B": 2.0})
+
+        rows = self.conn.execute("SELECT p.external_sku, s.scraped_at, s.regular_price FROM food.prices s "
+                                 "JOIN food.products p USING (product_id) ORDER BY 1, 2").fetchall()
+        self.assertEqual(rows, [("A", "2025-09-01 06:00:00", 1.0), ("B", "2025-09-01 06:00:00", 2.0),
+                                ("B", "2025-09-02 06:00:00", 2.5), ("B", "2025-09-03 06:00:00", 2.0)])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM food.nutrition").fetchone(), (2,))
+
+
+    def test_point_in_time_from_sparse_history(self):
+        index = SnapshotIndex()
+        loader = self.scrape(index, DAYS[0], {"A": 1.0, "B": 2.0})
+        self.scrape(index, DAYS[1], {"A": 1.0, "B": 2.5})
+        a, b = loader.product_ids["A"], loader.product_ids["B"]
+
+        self.assertEqual(prices_at(self.conn, self.dialect, datetime(2025, 8, 31)), {})
+        noon = prices_at(self.conn, self.dialect, datetime(2025, 9, 2, 12, 0))
+        self.assertEqual({product_id: row.regular_price for product_id, row in noon.items()}, {a: 1.0, b: 2.5})
+        self.assertEqual(noon[a], PriceRow(product_id=a, scraped_at=DAYS[0], regular_price=1.0, price_per_kg=4.0))
+        # Exactly at a scrape includes that scrape
+        self.assertEqual(prices_at(self.conn, self.dialect, DAYS[0], [b])[b].regular_price, 2.0)
+
+        nutrition = nutrition_at(self.conn, self.dialect, DAYS[1], [a])
+        self.assertEqual(nutrition[a].raw_json, {"header": ["Per 100 g"], "rows": [["Energie", "100.0 kcal"]]})
+
+
+    def test_parser_run_skips_unchanged_prices(self):
+        bucket = LocalBucket(Path(self.tmp.name) / "bucket")
+        for n in range(3):
+            bucket.put(f"Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-{n}POT.html",
+                       FIXTURE.read_bytes())
+        db_path = Path(self.tmp.name) / "food.sqlite"
+        for _ in range(2):
+            parser = JumboHTMLParser("dummy", "Jumbo/", f"sqlite:///{db_path}", snapshot_index_path=self.index_path)
+            parser._s3 = bucket
+            parser.run()
+            parser.snapshots.close()
+
+        conn, _ = connect(f"sqlite:///{db_path}")
+        counts = [conn.execute(f"SELECT COUNT(*) FROM food.{table}").fetchone()[0] for table in ("prices", "nutrition")]
+        conn.close()
+        self.assertEqual(counts, [3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import logging
+from data_processing.ETL.Jumbo.loader import connect
+from data_processing.ETL.Jumbo.units import Unit, normalize_unit, normalize_units, renormalize_products
+
+# What the if/elif chain in parse_html produced for the spellings the site uses
+LEGACY = {
+    "kilo": ("weight", 1000, "1 kilogram"),
+    "kg": ("weight", 1000, "1 kilogram"),
+    "Kilo": ("weight", 1000, "1 kilogram"),
+    "gram": ("weight", 1, "1 GRAM"),
+    "grams": ("weight", 1, "1 GRAMS"),
+    "liter": ("volume", 1000, "1 liter"),
+    " Liter ": ("volume", 1000, "1 liter"),
+    "l": ("volume", 1000, "1 liter"),
+    "ml": ("volume", 1, "ML"),
+    "100 ml": ("volume", 100, "100 ML"),
+    "stuk": ("piece", 1, "per stuk"),
+    "stuks": ("piece", 1, "per stuk"),
+    "stukken": ("piece", 1, "per stuk"),
+    "per doos": ("package", 1, "per doos"),
+    "Wasbeurt": ("package", 1, "wasbeurt"),
+}
+
+
+class Units_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+
+    def test_same_output_as_before_for_known_spellings(self):
+        for text, expected in LEGACY.items():
+            with self.subTest(text=text):
+                self.assertEqual(normalize_unit(text), Unit(*expected))
+
+
+    def test_amounts_and_multipacks(self):
+        self.assertEqual(normalize_unit("100 gram"), Unit("weight", 100, "100 GRAM"))
+        self.assertEqual(normalize_unit("6 x 330 ml"), Unit("volume", 1980, "6 x 330 ml"))
+        self.assertEqual(normalize_unit("4x1,5 l"), Unit("volume", 6000, "4 x 1.5 l"))
+        self.assertEqual(normalize_unit("1,5 kg"), Unit("weight", 1500, "1.5 kilogram"))
+        self.assertEqual(normalize_unit("per 10 stuks"), Unit("piece", 10, "10 stuks"))
+        self.assertEqual(normalize_unit("75 cl"), Unit("volume", 750, "75 CL"))
+        # Outside the grammar, the first unit word decides
+        self.assertEqual(normalize_unit("kilo (uitgelekt)"), Unit("weight", 1000, "1 kilogram"))
+
+
+    def test_repeated_texts_are_cached(self):
+        normalize_unit.cache_clear()
+        units = normalize_units(["kilo", "stuk", "kilo", "kilo"])
+        self.assertEqual([unit.unit_type for unit in units], ["weight", "piece", "weight", "weight"])
+        self.assertEqual(normalize_unit.cache_info().misses, 2)
+        normalize_unit("kilo")
+        self.assertEqual(normalize_unit.cache_info().hits, 1)
+
+
+    def test_renormalize_products(self):
+        conn, dialect = connect("sqlite://")
+        conn.executemany("INSERT INTO food.products (store_id, external_sku, unit_type, unit_value, unit_description) "
+                         "VALUES (1, ?, ?, ?, ?)",
+                         [("A", "weight", 1000, "1 kilogram"),
+                          ("B", "weight", 1, "1 100 GRAM"),        # written by the old chain for "100 gram"
+                          ("C", "package", 1, "6 x 330 ml"),
+                          ("D", None, None, None)])
+        self.assertEqual(renormalize_products(conn, dialect, batch_size=2), 2)
+        self.assertEqual(conn.execute("SELECT external_sku, unit_type, unit_value, unit_description "
+                                      "FROM food.products ORDER BY external_sku").fetchall(),
+                         [("A", "weight", 1000, "1 kilogram"), ("B", "weight", 100, "100 GRAM"),
+                          ("C", "volume", 1980, "6 x 330 ml"), ("D", None, None, None)])
+        self.assertEqual(renormalize_products(conn, dialect), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
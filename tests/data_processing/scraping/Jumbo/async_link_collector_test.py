@@ -0,0 +1,63 @@
+import unittest
+import asyncio
+import contextlib
+import csv
+import io
+import tempfile
+from pathlib import Path
+import httpx
+from local_site import PAGE_SIZE, closed_port_url, serve
+from async_link_collector import collect_all, collect_category
+from rate_limiter import HostRateLimiter
+
+
+def read_links(folder, name):
+    with open(Path(folder) / f"links_{name}.csv", encoding="utf-8") as f:
+        return [row[0] for row in csv.reader(f)]
+
+
+class AsyncLinkCollector_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = self.tmp.name
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def collect(self, categories):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(collect_all(categories, rate=1000, burst=10, folder=self.out, retry_wait=0))
+
+
+    def test_collect_category_stops_without_new_links(self):
+        async def collect(base):
+            async with httpx.AsyncClient() as client:
+                return await collect_category(client, HostRateLimiter(1000, 10), asyncio.Semaphore(4), "zuivel",
+                                              f"{base}/producten/zuivel/")
+
+        with serve(pages_per_category=3) as (base, site), contextlib.redirect_stdout(io.StringIO()):
+            links = asyncio.run(collect(base))
+        self.assertEqual(len(links), 3 * PAGE_SIZE)
+        # Three pages with links, a fourth that repeats the last one
+        self.assertEqual(site.requests[-1], f"/producten/zuivel/?offSet={3 * PAGE_SIZE}")
+        self.assertEqual(len(site.requests), 4)
+
+
+    def test_failing_category_does_not_abort_the_others(self):
+        with serve() as (base, _):
+            links = self.collect([{"name": "zuivel", "url": f"{base}/producten/zuivel/"},
+                                  {"name": "blocked", "url": f"{base}/status/503"},
+                                  {"name": "offline", "url": f"{closed_port_url()}/producten/diepvries/"}])
+
+        self.assertEqual({name: len(cat_links) for name, cat_links in links.items()},
+                         {"zuivel": 2 * PAGE_SIZE, "blocked": 0, "offline": 0})
+        self.assertEqual(sorted(read_links(self.out, "zuivel")), sorted(links["zuivel"]))
+        self.assertEqual(read_links(self.out, "offline"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
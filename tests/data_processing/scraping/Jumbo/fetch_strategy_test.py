@@ -0,0 +1,36 @@
+import unittest
+from pathlib import Path
+from local_site import closed_port_url, serve
+from fetch_strategy import HttpFetcher, has_required_fields
+
+# Server-rendered: the fixture the ETL tests parse
+SERVER_RENDERED = (Path(__file__).resolve().parents[2] / "ETL" / "Jumbo" /
+                   "amorelli-pistache-creme-190-g-666821POT.html").read_text(encoding="utf-8")
+# Client-rendered: an app shell whose title and price only appear after the scripts ran
+CLIENT_RENDERED = ('<html><body><div id="app"><h1 data-testid="product-title"><!-- --></h1></div>'
+                   '<script src="/app.js"></script></body></html>')
+
+
+class FetchStrategy_test(unittest.TestCase):
+
+
+    def test_required_fields(self):
+        self.assertTrue(has_required_fields(SERVER_RENDERED))
+        self.assertFalse(has_required_fields(CLIENT_RENDERED))
+        self.assertFalse(has_required_fields('<h1 data-testid="product-title">Skyr</h1>'))
+
+
+    def test_hits_misses_and_errors(self):
+        pages = {"/producten/skyr": SERVER_RENDERED, "/producten/app": CLIENT_RENDERED}
+        fetcher = HttpFetcher(pool_size=2, timeout=5)
+        with serve(pages) as (base, site):
+            self.assertEqual(fetcher.fetch(f"{base}/producten/skyr"), SERVER_RENDERED)
+            # None sends the page to the browser
+            self.assertIsNone(fetcher.fetch(f"{base}/producten/app"))
+            self.assertIsNone(fetcher.fetch(f"{base}/status/503"))
+        self.assertIsNone(fetcher.fetch(f"{closed_port_url()}/producten/skyr"))
+        self.assertEqual((fetcher.hits, fetcher.misses, fetcher.errors), (1, 2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import contextlib
+import io
+import os
+import tempfile
+from unittest import mock
+from local_site import PAGE_SIZE, serve
+import link_collector
+
+
+class LinkCollector_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.mkdir(link_collector.LINKS_FOLDER)
+        self.addCleanup(os.chdir, cwd)
+        patch = mock.patch.object(link_collector.time, "sleep")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def collect(self, name, url):
+        with contextlib.redirect_stdout(io.StringIO()):
+            stopped = link_collector.collect_links(name, url)
+        with open(os.path.join(link_collector.LINKS_FOLDER, f"links_{name}.csv"), encoding="utf-8") as f:
+            return stopped, f.read().split()
+
+
+    def test_complete_walk(self):
+        with serve(pages_per_category=2) as (base, _):
+            stopped, links = self.collect("zuivel", f"{base}/producten/zuivel/")
+        self.assertIsNone(stopped)
+        self.assertEqual(len(links), 2 * PAGE_SIZE)
+
+
+    def test_blocked_walk_reports_why(self):
+        with serve() as (base, _):
+            stopped, links = self.collect("zuivel", f"{base}/status/403")
+        self.assertEqual((stopped, links), ("HTTP 403", []))
+
+
+if __name__ == "__main__":
+    unittest.main()
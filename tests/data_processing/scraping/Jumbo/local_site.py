@@ -0,0 +1,74 @@
+import sys
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# The scraper modules import each other flat, as when run from the Jumbo folder
+SCRAPER_DIR = Path(__file__).resolve().parents[4] / "data_processing" / "scraping" / "Jumbo"
+sys.path.insert(0, str(SCRAPER_DIR))
+
+from link_collector import PAGE_SIZE  # noqa: E402
+
+
+class LocalSite(BaseHTTPRequestHandler):
+    """
+    Canned Jumbo pages: /producten/<category>/?offSet=N serves category
+    pages with PAGE_SIZE product links (the last page repeats past the end,
+    like the site), /status/<code> answers with that status and any path
+    in `pages` serves that HTML. Every requested path is recorded.
+    """
+    pages_per_category = 2
+    pages: dict[str, str] = {}
+    requests: list[str] = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        url = urlsplit(self.path)
+        if url.path.startswith("/status/"):
+            self.answer(int(url.path.rsplit("/", 1)[1]), "")
+        elif url.path in self.pages:
+            self.answer(200, self.pages[url.path])
+        elif url.path.startswith("/producten/"):
+            category = url.path.strip("/").split("/")[-1]
+            offset = int(parse_qs(url.query).get("offSet", ["0"])[0])
+            page = min(offset // PAGE_SIZE, self.pages_per_category - 1)
+            links = "".join(f'<a href="/producten/{category}/product-{page}-{n}">x</a>' for n in range(PAGE_SIZE))
+            self.answer(200, f"<html><body>{links}</body></html>")
+        else:
+            self.answer(404, "")
+
+    def answer(self, status, html):
+        body = html.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve(pages=None, pages_per_category=2):
+    """Base URL of a LocalSite on a free port, for the duration of the block."""
+    handler = type("Site", (LocalSite,), {"pages": pages or {}, "pages_per_category": pages_per_category,
+                                          "requests": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def closed_port_url():
+    """A URL nothing listens on, connections to it are refused."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LocalSite)
+    port = server.server_address[1]
+    server.server_close()
+    return f"http://127.0.0.1:{port}"
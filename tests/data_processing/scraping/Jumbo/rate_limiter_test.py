@@ -0,0 +1,76 @@
+import unittest
+import asyncio
+from unittest import mock
+import local_site  # noqa: F401  (puts the scraper directory on sys.path)
+from rate_limiter import HostRateLimiter, TokenBucket
+
+_sleep = asyncio.sleep
+
+
+class FakeClock:
+    """monotonic() and asyncio.sleep that only advance when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await _sleep(0)
+
+
+class RateLimiter_test(unittest.IsolatedAsyncioTestCase):
+
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patches = [mock.patch("rate_limiter.time.monotonic", self.clock.monotonic),
+                   mock.patch("rate_limiter.asyncio.sleep", self.clock.sleep)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+    async def acquire_times(self, acquire, count):
+        times = []
+        for _ in range(count):
+            await acquire()
+            times.append(self.clock.now)
+        return times
+
+
+    async def test_burst_then_steady_rate(self):
+        bucket = TokenBucket(rate=2, burst=3)
+        self.assertEqual(await self.acquire_times(bucket.acquire, 6), [0, 0, 0, 0.5, 1.0, 1.5])
+
+        # An idle second refills two tokens, never more than the burst
+        self.clock.now += 1
+        self.assertEqual(await self.acquire_times(bucket.acquire, 3), [2.5, 2.5, 3.0])
+
+
+    async def test_concurrent_waiters_share_the_rate(self):
+        bucket = TokenBucket(rate=4, burst=1)
+        done = []
+
+        async def take(n):
+            await bucket.acquire()
+            done.append((n, self.clock.now))
+
+        await asyncio.gather(*(take(n) for n in range(4)))
+        self.assertEqual(done, [(0, 0), (1, 0.25), (2, 0.5), (3, 0.75)])
+
+
+    async def test_one_bucket_per_host(self):
+        limiter = HostRateLimiter(rate=1, burst=1)
+        await limiter.acquire("https://www.jumbo.com/producten/a")
+        await limiter.acquire("https://static.jumbo.com/img.png")
+        self.assertEqual(self.clock.now, 0)
+        await limiter.acquire("https://www.jumbo.com/producten/b")
+        self.assertEqual(self.clock.now, 1)
+        self.assertEqual(set(limiter.buckets), {"www.jumbo.com", "static.jumbo.com"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+import unittest
+import contextlib
+import importlib.util
+import io
+import os
+import queue
+import tempfile
+from pathlib import Path
+from unittest import mock
+from local_site import serve
+from fetch_strategy import HttpFetcher
+
+# The scraper drives Chrome through undetected_chromedriver and selenium
+HAS_BROWSER_DEPS = all(importlib.util.find_spec(name) for name in ("undetected_chromedriver", "selenium"))
+if HAS_BROWSER_DEPS:
+    import scraper
+    import distributed
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+PAGE = '<h1 data-testid="product-title">Skyr</h1><div class="price-per-unit">€ 1,79</div>'
+
+
+class FakeDriver:
+    """Renders every link to PAGE unless told to crash or time out on it."""
+
+    started = 0
+
+    def __init__(self, crash=(), slow=()):
+        type(self).started += 1
+        self.crash = crash
+        self.slow = slow
+        self.quit_called = False
+
+    def render(self, link):
+        if link in self.crash:
+            raise WebDriverException("chrome not reachable")
+        if link in self.slow:
+            raise TimeoutException()
+        return PAGE
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeStore:
+    """Records pages; raises for the first `fail` calls like a failing S3 put."""
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.pages = []
+
+    def __call__(self, cat_name, link, html):
+        if self.fail:
+            self.fail -= 1
+            raise OSError("S3 put failed")
+        self.pages.append(link)
+
+
+class FlakyS3:
+    """upload_file that fails the first `fail` calls."""
+
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.uploaded = []
+
+    def upload_file(self, filename, bucket, key):
+        if self.fail:
+            self.fail -= 1
+            raise OSError("connection reset")
+        self.uploaded.append(key.rsplit("/", 1)[1])
+
+
+class FakeFetcher:
+    def __init__(self, server_rendered=()):
+        self.server_rendered = server_rendered
+
+    def fetch(self, link):
+        return PAGE if link in self.server_rendered else None
+
+
+@unittest.skipUnless(HAS_BROWSER_DEPS, "undetected_chromedriver and selenium are not installed")
+class Scraper_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.drivers = []
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def run_worker(self, links, store, crash=(), slow=(), http_fetcher=None, use_browser=True):
+        jobs = queue.Queue()
+        for link in links:
+            jobs.put(("zuivel", link, 0))
+        stats = scraper.ScrapeStats()
+
+        def new_driver(headless=True):
+            driver = FakeDriver(crash, slow)
+            self.drivers.append(driver)
+            return driver
+
+        with mock.patch.object(scraper, "new_driver", new_driver), \
+                mock.patch.object(scraper, "scrape_page", lambda driver, link, timeout: driver.render(link)), \
+                contextlib.redirect_stdout(io.StringIO()):
+            scraper.worker(jobs, store, stats, http_fetcher=http_fetcher, use_browser=use_browser)
+        self.assertTrue(jobs.empty())
+        return stats
+
+
+    def test_checkpoint_resumes(self):
+        path = Path(self.tmp.name) / "checkpoint.txt"
+        checkpoint = scraper.Checkpoint(str(path))
+        checkpoint.mark("https://www.jumbo.com/a")
+        checkpoint.mark("https://www.jumbo.com/b")
+        checkpoint.close()
+
+        checkpoint = scraper.Checkpoint(str(path))
+        self.assertEqual(checkpoint.done, {"https://www.jumbo.com/a", "https://www.jumbo.com/b"})
+        checkpoint.mark("https://www.jumbo.com/c")
+        checkpoint.close()
+        self.assertEqual(path.read_text().split(), ["https://www.jumbo.com/a", "https://www.jumbo.com/b",
+                                                    "https://www.jumbo.com/c"])
+
+
+    def test_crashed_browser_is_recycled_and_the_link_retried(self):
+        store = FakeStore()
+        stats = self.run_worker(["a", "b", "c"], store, crash=["b"])
+
+        # "b" crashes every session it gets, so it fails after MAX_ATTEMPTS
+        self.assertEqual(store.pages, ["a", "c"])
+        self.assertEqual((stats.pages, stats.failed, stats.restarts), (2, 1, scraper.MAX_ATTEMPTS))
+        self.assertEqual(len(self.drivers), scraper.MAX_ATTEMPTS)
+        self.assertTrue(all(driver.quit_called for driver in self.drivers))
+
+
+    def test_render_timeout_fails_the_page_only(self):
+        store = FakeStore()
+        stats = self.run_worker(["a", "b"], store, slow=["a"])
+        self.assertEqual(store.pages, ["b"])
+        self.assertEqual((stats.pages, stats.failed, stats.restarts), (1, 1, 0))
+        self.assertEqual(len(self.drivers), 1)
+
+
+    def test_store_error_requeues_and_the_driver_is_quit(self):
+        store = FakeStore(fail=1)
+        stats = self.run_worker(["a", "b"], store)
+        self.assertEqual(sorted(store.pages), ["a", "b"])
+        self.assertEqual((stats.pages, stats.failed), (2, 0))
+
+        store = FakeStore(fail=10)
+        stats = self.run_worker(["a"], store)
+        self.assertEqual((stats.pages, stats.failed), (0, 1))
+        self.assertTrue(all(driver.quit_called for driver in self.drivers))
+
+
+    def test_http_first_then_browser(self):
+        store = FakeStore()
+        stats = self.run_worker(["a", "b"], store, http_fetcher=FakeFetcher(server_rendered=["a"]))
+        self.assertEqual((stats.via_http, stats.via_browser), (1, 1))
+
+        # http-only runs never start a browser, upload retries stay on HTTP
+        self.drivers.clear()
+        store = FakeStore(fail=1)
+        stats = self.run_worker(["a", "b"], store, http_fetcher=FakeFetcher(server_rendered=["a"]),
+                                use_browser=False)
+        self.assertEqual((stats.via_http, stats.failed), (1, 1))
+        self.assertEqual(store.pages, ["a"])
+        self.assertEqual(self.drivers, [])
+
+
+
+    def archive(self, s3, links):
+        checkpoint = scraper.Checkpoint(str(Path(self.tmp.name) / "checkpoint.txt"))
+        store = scraper.ArchiveStore(s3, checkpoint, Path(self.tmp.name) / "archive", max_shard_mb=0)
+        with mock.patch.object(scraper.time, "sleep"), contextlib.redirect_stdout(io.StringIO()):
+            for link in links:
+                store("zuivel", link, PAGE)
+            try:
+                store.close()
+            finally:
+                checkpoint.close()
+                self.checkpoint = checkpoint
+        return checkpoint
+
+
+    def test_shard_upload_is_retried(self):
+        s3 = FlakyS3(fail=scraper.UPLOAD_ATTEMPTS - 1)
+        checkpoint = self.archive(s3, ["https://www.jumbo.com/a", "https://www.jumbo.com/b"])
+        self.assertEqual(len(s3.uploaded), 4)
+        self.assertEqual(checkpoint.done, {"https://www.jumbo.com/a", "https://www.jumbo.com/b"})
+
+
+    def test_failed_shard_is_kept_and_reported_on_close(self):
+        s3 = FlakyS3(fail=3 * scraper.UPLOAD_ATTEMPTS)
+        with self.assertRaises(RuntimeError) as raised:
+            self.archive(s3, ["https://www.jumbo.com/a", "https://www.jumbo.com/b"])
+        # Both shards failed while scraping; on close the second one went up, the first failed again
+        self.assertIn("-0001.pages", str(raised.exception))
+        self.assertEqual(len(s3.uploaded), 2)
+        self.assertEqual(self.checkpoint.done, {"https://www.jumbo.com/b"})
+        self.assertEqual(len(list((Path(self.tmp.name) / "archive").glob("*.pages"))), 2)
+
+
+
+    def test_client_rendered_pages_fall_back_to_the_browser(self):
+        with serve({"/producten/skyr": PAGE, "/producten/app": "<div id=\"app\"></div>"}) as (base, _):
+            fetcher = HttpFetcher(pool_size=1, timeout=5)
+            store = FakeStore()
+            stats = self.run_worker([f"{base}/producten/skyr", f"{base}/producten/app"], store, http_fetcher=fetcher)
+        self.assertEqual((fetcher.hits, fetcher.misses), (1, 1))
+        self.assertEqual((stats.via_http, stats.via_browser), (1, 1))
+        self.assertEqual(len(self.drivers), 1)
+
+
+    def test_blocked_link_walk_fails_the_category_unit(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        os.mkdir(distributed.LINKS_FOLDER)
+        checkpoint = scraper.Checkpoint("checkpoint.txt")
+        self.addCleanup(checkpoint.close)
+        handler = distributed.CategoryHandler(FlakyS3(), checkpoint, workers=1, strategy="http")
+
+        with mock.patch.object(distributed, "collect_links", lambda cat_name, cat_url: "HTTP 403"), \
+                self.assertRaises(RuntimeError) as raised:
+            handler({"name": "zuivel", "url": "https://www.jumbo.com/producten/zuivel/"})
+        self.assertIn("HTTP 403", str(raised.exception))
+
+        with mock.patch.object(distributed, "collect_links", lambda cat_name, cat_url: None), \
+                self.assertRaises(RuntimeError) as raised:
+            handler({"name": "leeg", "url": "https://www.jumbo.com/producten/leeg/"})
+        self.assertIn("No product links", str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
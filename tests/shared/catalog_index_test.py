@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+from pathlib import Path
+from shared.catalog_index import CatalogIndex, CatalogRecord, update_index
+
+RECORDS = [
+    CatalogRecord("A1", "Skyr Naturel", "zuivel,-eieren,-boter", "Romige IJslandse skyr", price=1.79,
+                  regular_price=1.79, kcal=63, protein=11.0, fat=0.2, sugar=4.0),
+    CatalogRecord("B2", "Hazelnoot Pasta", "ontbijt,-broodbeleg-en-bakproducten", "Met 13% hazelnoten",
+                  price=2.49, regular_price=2.49, kcal=540, protein=6.0, sugar=56.0),
+    CatalogRecord("C3", "Kipfilet", "vlees,-vis-en-vega", "Verse kipfilet", on_promotion=True, price=4.99,
+                  regular_price=6.49, kcal=110, protein=23.5, fat=1.5, sugar=0.0),
+    CatalogRecord("D4", "Pindakaas Crème", "ontbijt,-broodbeleg-en-bakproducten", "100% pinda's",
+                  price=2.99, regular_price=2.99, kcal=620, protein=25.0, sugar=5.0),
+    CatalogRecord("E5", "Water", "frisdrank-en-sappen", None),
+]
+
+
+class CatalogIndex_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "index"
+        update_index(self.root, RECORDS)
+        self.index = CatalogIndex(self.root)
+
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+
+    def skus(self, rows):
+        return [row["sku"] for row in rows]
+
+
+    def test_filtered_lookups(self):
+        high_protein = self.index.search(ranges={"protein": (10, None)}, sort="-protein")
+        self.assertEqual(self.skus(high_protein), ["D4", "C3", "A1"])
+        # "high protein under €3 without nuts"
+        rows = self.index.search(ranges={"protein": (10, None), "price": (None, 3)},
+                                 exclude=["allergen:nuts", "allergen:peanuts"], sort="-protein")
+        self.assertEqual(self.skus(rows), ["A1"])
+        self.assertEqual(rows[0]["name"], "Skyr Naturel")
+        self.assertEqual((rows[0]["price"], rows[0]["price_per_kg"]), (1.79, None))
+
+        self.assertEqual(self.skus(self.index.search(terms=["creme"])), ["D4"])
+        self.assertEqual(self.skus(self.index.search(terms=["Crème", "category:ontbijt,-broodbeleg-en-bakproducten"])),
+                         ["D4"])
+        self.assertEqual(self.skus(self.index.search(terms=["flag:promotion"])), ["C3"])
+        self.assertEqual(self.skus(self.index.search(terms=["allergen:nuts"])), ["B2"])
+        self.assertEqual(self.skus(self.index.search(sort="sugar", limit=2)), ["C3", "A1"])
+        self.assertEqual(self.index.search(terms=["unknownword"]), [])
+        with self.assertRaises(ValueError):
+            self.index.search(ranges={"colour": (1, 2)})
+
+
+    def test_incremental_update(self):
+        first = self.index.generation
+        # Nothing changed, nothing written
+        self.assertFalse(update_index(self.root, RECORDS[:2]))
+        self.assertFalse(self.index.reload_if_changed())
+
+        cheaper = CatalogRecord("B2", "Hazelnoot Pasta", "ontbijt,-broodbeleg-en-bakproducten", "Met 13% hazelnoten",
+                                price=1.99, regular_price=2.49, kcal=540, protein=6.0, sugar=56.0)
+        new = CatalogRecord("F6", "Halfvolle Melk", "zuivel,-eieren,-boter", None, price=1.09, protein=3.5)
+        self.assertTrue(update_index(self.root, [cheaper, new]))
+        self.assertTrue(self.index.reload_if_changed())
+        self.assertNotEqual(self.index.generation, first)
+
+        self.assertEqual(len(self.index), 6)
+        self.assertEqual(self.skus(self.index.search(ranges={"price": (None, 2)}, sort="price")), ["F6", "A1", "B2"])
+        # Postings of the rows that were carried over still point at the right products
+        self.assertEqual(self.skus(self.index.search(terms=["kipfilet"])), ["C3"])
+        self.assertEqual(sorted(self.skus(self.index.search(terms=["allergen:milk"]))), ["A1", "F6"])
+        self.assertEqual(self.skus(self.index.search(terms=["allergen:nuts"])), ["B2"])
+
+        update_index(self.root, [new])
+        update_index(self.root, RECORDS, full=True)
+        self.assertEqual(len(list(self.root.glob("gen-*"))), 2)
+        self.assertTrue(self.index.reload_if_changed())
+        self.assertEqual(len(self.index), 5)
+        self.assertFalse(update_index(self.root, RECORDS, full=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
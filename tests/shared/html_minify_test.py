@@ -0,0 +1,75 @@
+import unittest
+import logging
+from datetime import datetime
+from pathlib import Path
+from shared.html_minify import minify_html
+from shared.models import ProductRow
+from data_processing.ETL.Jumbo.extractors import ENGINES, extract_bs4
+from data_processing.ETL.Jumbo.html_parser import JumboHTMLParser
+
+FIXTURE = (Path(__file__).resolve().parents[1] / "data_processing" / "ETL" / "Jumbo"
+           / "amorelli-pistache-creme-190-g-666821POT.html")
+KEY = "Jumbo/ontbijt,-broodbeleg-en-bakproducten/amorelli-pistache-creme-190-g-666821POT.html"
+
+
+class HtmlMinify_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+
+    def test_fixture_golden_product_row(self):
+        # Same expectation as html_parser_test.py, on the minified page, for every engine
+        desired_output = ProductRow(store_id=1, external_sku='666821POT', name='Amorelli Pistache Crème 190 g',
+                            category='ontbijt,-broodbeleg-en-bakproducten', unit_type='weight', unit_value=1000,
+                            unit_description='1 kilogram', description='Pistache crème', country_of_origin=None)
+        minified = minify_html(FIXTURE.read_bytes())
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", engine=engine)
+                self.assertEqual(parser.parse_html(minified, KEY)["product"], desired_output)
+
+
+    def test_price_and_nutrition_survive_minify(self):
+        scraped_at = datetime(2025, 9, 1, 12, 0)
+        parser = JumboHTMLParser("dummy", "Jumbo/", "dummy", engine="lxml")
+        original = parser.parse_html(FIXTURE.read_bytes(), KEY, scraped_at)
+        minified = parser.parse_html(minify_html(FIXTURE.read_bytes()), KEY, scraped_at)
+        self.assertEqual(minified["price"], original["price"])
+        self.assertEqual(minified["nutrition"], original["nutrition"])
+
+
+    def test_fixture_shrinks(self):
+        content = FIXTURE.read_bytes()
+        minified = minify_html(content)
+        self.assertLess(len(minified), len(content) / 4)
+        for tag in (b"<script", b"<style", b"<svg", b"<!--["):
+            self.assertNotIn(tag, minified)
+
+
+    def test_text_boundaries_survive(self):
+        html = ('<html><body><h1 data-testid="product-title">€ <!-- -->1,99<script>x</script>'
+                ' per kilo<svg><text>icon</text></svg></h1>'
+                '<div data-testid="product-description-text-body"><p>Verse<!-- -->melk</p>'
+                '<p><!--[-->Houdbaar<!--]--></p></div></body></html>')
+        minified = minify_html(html)
+        self.assertIsInstance(minified, str)
+        self.assertEqual(extract_bs4(minified.encode()).title, "€1,99per kilo")
+        self.assertEqual(extract_bs4(minified.encode()).description_parts,
+                         extract_bs4(html.encode()).description_parts)
+
+
+    def test_attributes(self):
+        minified = minify_html(b'<div class="price-per-unit" data-v-03d5c0c3="" style="color:red" '
+                               b'data-testid="x"><span aria-hidden="true">kilo</span></div>')
+        self.assertEqual(minified, b'<html><body><div class="price-per-unit" data-testid="x">'
+                                   b'<span aria-hidden="true">kilo</span></div></body></html>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+import logging
+import io
+import multiprocessing
+import queue
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from unittest import mock
+from shared.log import (DroppingQueueHandler, RateLimitFilter, configure_worker_logging, log_queue,
+                        setup_logger, shutdown_logger)
+
+
+def log_from_worker(n):
+    logging.getLogger("worker").warning("No title found in page-%d", n)
+    return multiprocessing.current_process().pid
+
+
+def record(message, level=logging.WARNING, *args):
+    return logging.LogRecord("test", level, __file__, 0, message, args, None)
+
+
+class Log_test(unittest.TestCase):
+
+
+    def setUp(self):
+        shutdown_logger()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+
+    def tearDown(self):
+        shutdown_logger()
+        self.tmp.cleanup()
+
+
+    def read_log(self, name="component"):
+        return (self.dir / f"{name}.log").read_text()
+
+
+    def test_queue_mode_writes_from_listener(self):
+        setup_logger("component", use_queue=True, log_dir=self.dir)
+        root = logging.getLogger()
+        self.assertTrue(any(isinstance(h, DroppingQueueHandler) for h in root.handlers))
+        self.assertFalse(any(isinstance(h, RotatingFileHandler) for h in root.handlers))
+
+        for n in range(100):
+            logging.getLogger("etl").warning("No title found in %s", f"page-{n}")
+        shutdown_logger()
+
+        lines = self.read_log().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertIn("etl - WARNING - No title found in page-99", lines[-1])
+
+
+    def test_direct_mode_is_unchanged(self):
+        setup_logger("component", use_queue=False, log_dir=self.dir)
+        self.assertIsNone(log_queue())
+        logging.getLogger("etl").info("hello")
+        shutdown_logger()
+        self.assertIn("etl - INFO - hello", self.read_log())
+
+
+    def test_drop_new_policy(self):
+        handler = DroppingQueueHandler(queue.Queue(3), "drop_new")
+        for n in range(5):
+            handler.emit(record(f"message {n}"))
+        self.assertEqual(handler.dropped, 2)
+        self.assertEqual([r.msg for r in handler.queue.queue], ["message 0", "message 1", "message 2"])
+
+        # Once there is room again, a notice about the dropped records goes first
+        handler.queue.get_nowait()
+        handler.queue.get_nowait()
+        handler.emit(record("message 5"))
+        self.assertEqual([r.getMessage() for r in list(handler.queue.queue)[1:]],
+                         ["Logging queue was full, 2 records dropped", "message 5"])
+
+
+    def test_drop_oldest_policy_and_errors_are_kept(self):
+        handler = DroppingQueueHandler(queue.Queue(2), "drop_oldest")
+        for n in range(4):
+            handler.emit(record(f"message {n}"))
+        self.assertEqual([r.msg for r in handler.queue.queue], ["message 2", "message 3"])
+
+        handler.queue.get_nowait()
+        handler.emit(record("boom", logging.ERROR))
+        self.assertEqual(handler.queue.queue[-1].msg, "boom")
+        with self.assertRaises(ValueError):
+            DroppingQueueHandler(queue.Queue(1), "block")
+
+
+    def test_rate_limit_per_template(self):
+        limiter = RateLimitFilter(interval=60, burst=2)
+        with mock.patch("shared.log.time.monotonic", return_value=0):
+            passed = [limiter.filter(record("No title found in %s", logging.WARNING, f"page-{n}"))
+                      for n in range(10)]
+            self.assertTrue(limiter.filter(record("Another warning")))
+            self.assertTrue(limiter.filter(record("Fetch failed", logging.ERROR)))
+        self.assertEqual(passed, [True, True] + [False] * 8)
+        self.assertEqual(limiter.suppressed, 8)
+
+        with mock.patch("shared.log.time.monotonic", return_value=61):
+            later = record("No title found in %s", logging.WARNING, "page-11")
+            self.assertTrue(limiter.filter(later))
+        self.assertEqual(later.getMessage(), "No title found in page-11 (8 similar suppressed)")
+
+
+    def test_dedupe_only_drops_exact_repeats(self):
+        limiter = RateLimitFilter(interval=60, dedupe=True)
+        self.assertTrue(limiter.filter(record("No title found in %s", logging.WARNING, "a")))
+        self.assertTrue(limiter.filter(record("No title found in %s", logging.WARNING, "b")))
+        self.assertFalse(limiter.filter(record("No title found in %s", logging.WARNING, "a")))
+
+
+    def test_handlers_share_one_decision(self):
+        stderr = io.StringIO()
+        with mock.patch.dict("os.environ", {"LOG_TO_STDOUT": "true"}), mock.patch("sys.stderr", stderr):
+            setup_logger("component", use_queue=False, rate_limit=60, log_dir=self.dir)
+            for n in range(3):
+                logging.getLogger("etl").warning("No title found in %s", f"page-{n}")
+        limiter = next(f for h in logging.getLogger().handlers for f in h.filters if isinstance(f, RateLimitFilter))
+        shutdown_logger()
+
+        self.assertEqual(limiter.suppressed, 2)
+        self.assertEqual(self.read_log().count("No title found"), 1)
+        self.assertEqual(stderr.getvalue().count("No title found"), 1)
+
+
+    def test_expired_windows_are_evicted(self):
+        limiter = RateLimitFilter(interval=60, dedupe=True)
+        with mock.patch("shared.log.time.monotonic", return_value=0):
+            for n in range(100):
+                limiter.filter(record("No title found in %s", logging.WARNING, f"page-{n}"))
+            limiter.filter(record("No title found in %s", logging.WARNING, "page-0"))
+        with mock.patch("shared.log.time.monotonic", return_value=61):
+            limiter.filter(record("Another warning"))
+        # Only the window with a suppressed repeat to report is kept
+        self.assertEqual(len(limiter._windows), 2)
+        with mock.patch("shared.log.time.monotonic", return_value=700):
+            limiter.filter(record("Another warning"))
+        self.assertEqual(len(limiter._windows), 1)
+
+
+    def test_worker_processes_log_through_parent(self):
+        setup_logger("component", use_queue=True, log_dir=self.dir)
+        with ProcessPoolExecutor(max_workers=2, initializer=configure_worker_logging,
+                                 initargs=(log_queue(),)) as pool:
+            pids = set(pool.map(log_from_worker, range(20)))
+        shutdown_logger()
+
+        lines = self.read_log().splitlines()
+        self.assertEqual(len(lines), 20)
+        self.assertTrue(all("worker - WARNING - No title found in page-" in line for line in lines))
+        self.assertNotIn(multiprocessing.current_process().pid, pids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import json
+import tempfile
+from pathlib import Path
+from shared.metrics import Histogram, Metrics
+
+
+class Metrics_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+
+    def test_counters_and_percentiles(self):
+        for n in range(1, 101):
+            self.metrics.observe("stage", n / 1000)
+        self.metrics.inc("pages", 100)
+        self.metrics.inc("bytes", 2048)
+
+        summary = self.metrics.summary()
+        stage = summary["timings_seconds"]["stage"]
+        self.assertEqual((stage["count"], stage["p50"], stage["p95"], stage["p99"], stage["max"]),
+                         (100, 0.05, 0.095, 0.099, 0.1))
+        self.assertEqual(summary["counters"], {"pages": 100, "bytes": 2048})
+        self.assertGreater(summary["rates_per_second"]["pages"], 0)
+
+
+    def test_timer_and_decorator(self):
+        @self.metrics.timed("work")
+        def work(fail=False):
+            if fail:
+                raise ValueError("boom")
+            return 42
+
+        self.assertEqual(work(), 42)
+        with self.assertRaises(ValueError):
+            work(fail=True)
+        with self.metrics.timer("block"):
+            pass
+
+        self.assertEqual(self.metrics.histograms["work"].count, 2)
+        self.assertEqual(self.metrics.counters, {"work.errors": 1})
+        self.assertEqual(self.metrics.histograms["block"].count, 1)
+
+
+    def test_drain_and_merge(self):
+        worker = Metrics()
+        worker.inc("pages", 3)
+        worker.observe("parse", 0.5)
+        self.metrics.observe("parse", 0.1)
+
+        self.metrics.merge(worker.drain())
+        self.assertEqual(worker.counters, {})
+        self.assertEqual(self.metrics.counters["pages"], 3)
+        self.assertEqual(self.metrics.histograms["parse"].count, 2)
+        self.assertAlmostEqual(self.metrics.histograms["parse"].sum, 0.6)
+
+
+    def test_sampled_histogram_keeps_exact_totals(self):
+        histogram = Histogram(max_samples=10)
+        for n in range(1000):
+            histogram.observe(n)
+        self.assertEqual(len(histogram.samples), 10)
+        self.assertEqual((histogram.count, histogram.sum, histogram.min, histogram.max), (1000, 499500, 0, 999))
+
+        merged = Histogram(max_samples=10)
+        merged.merge(histogram)
+        self.assertEqual((merged.count, merged.sum, merged.min, merged.max), (1000, 499500, 0, 999))
+
+
+    def test_write_summary_and_prometheus(self):
+        self.metrics.inc("s3.get.bytes", 10)
+        self.metrics.observe("s3.get", 0.25)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "run" / "metrics.json"
+            self.metrics.write_summary(path)
+            self.assertEqual(json.loads(path.read_text())["counters"], {"s3.get.bytes": 10})
+
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE foodv_s3_get_bytes_total counter\nfoodv_s3_get_bytes_total 10", text)
+        self.assertIn('foodv_s3_get_seconds{quantile="0.99"} 0.25', text)
+        self.assertIn("foodv_s3_get_seconds_count 1", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import dataclasses
+import pickle
+import time
+from datetime import datetime
+from shared.models import FrozenPriceRow, FrozenProductRow, NutritionRow, PriceRow, ProductRow, RowBatch
+
+SCRAPED_AT = datetime(2025, 9, 1, 12, 0)
+
+
+class Models_test(unittest.TestCase):
+
+
+    def test_scraped_at_is_taken_per_row(self):
+        first = PriceRow(product_id=1)
+        time.sleep(0.001)
+        second = PriceRow(product_id=1)
+        self.assertLess(first.scraped_at, second.scraped_at)
+        self.assertGreater(NutritionRow(product_id=1).scraped_at, first.scraped_at)
+
+
+    def test_rows_stay_mutable(self):
+        row = ProductRow(store_id=1, external_sku="666821POT", name="Amorelli Pistache Crème 190 g")
+        row.name = "other"
+        self.assertEqual(row.name, "other")
+
+
+    def test_frozen_variants_are_slotted_and_frozen(self):
+        row = FrozenProductRow(store_id=1, external_sku="666821POT", name="Amorelli Pistache Crème 190 g")
+        self.assertFalse(hasattr(row, "__dict__"))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            row.name = "other"
+        self.assertEqual([f.name for f in dataclasses.fields(row)], [f.name for f in dataclasses.fields(ProductRow)])
+        self.assertEqual(row.category, None)
+        # Rows cross process boundaries in the parse pool
+        self.assertEqual(pickle.loads(pickle.dumps(row)), row)
+
+        first = FrozenPriceRow(product_id=1)
+        time.sleep(0.001)
+        self.assertLess(first.scraped_at, FrozenPriceRow(product_id=1).scraped_at)
+
+
+class RowBatch_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.rows = [
+            PriceRow(product_id=1, scraped_at=SCRAPED_AT, regular_price=4.99, promo_price=3.99, on_promotion=True,
+                     promo_type="korting", promo_text="2e halve prijs", price_per_kg=26.26),
+            PriceRow(product_id=2, scraped_at=SCRAPED_AT, regular_price=1.19),
+        ]
+
+
+    def test_round_trip(self):
+        batch = RowBatch(PriceRow)
+        batch.extend(self.rows)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(list(batch), self.rows)
+        self.assertEqual(batch.column("promo_price"), [3.99, None])
+        self.assertEqual(batch.column("on_promotion"), [True, False])
+
+
+    def test_frozen_rows(self):
+        rows = [FrozenPriceRow(*dataclasses.astuple(row)) for row in self.rows]
+        batch = RowBatch(FrozenPriceRow)
+        batch.extend(rows)
+        self.assertEqual(list(batch), rows)
+        self.assertEqual(batch.column("promo_price"), [3.99, None])
+
+
+    def test_to_tuples_in_copy_column_order(self):
+        batch = RowBatch(PriceRow)
+        batch.extend(self.rows)
+        self.assertEqual(list(batch.to_tuples(["scraped_at", "regular_price", "promo_text"])),
+                         [(SCRAPED_AT, 4.99, "2e halve prijs"), (SCRAPED_AT, 1.19, None)])
+        self.assertEqual(list(batch.to_tuples()), [dataclasses.astuple(row) for row in self.rows])
+
+
+    def test_numeric_columns_are_arrays(self):
+        batch = RowBatch(NutritionRow)
+        batch.append_values(7, SCRAPED_AT, 539, 6.5, None, 60, 0.1, 1.2, 55, {"energie": "539 kcal"})
+        self.assertEqual(batch._columns[batch.names.index("kcal_per_100g")].typecode, "d")
+        self.assertIsInstance(batch._columns[batch.names.index("raw_json")], list)
+        self.assertEqual(next(iter(batch)).fat_per_100g, None)
+
+
+    def test_bad_value_leaves_batch_consistent(self):
+        batch = RowBatch(PriceRow)
+        batch.append(self.rows[0])
+        with self.assertRaises(TypeError):
+            batch.append_values(3, SCRAPED_AT, "4,99", None, False, None, None, None)
+        with self.assertRaises(ValueError):
+            batch.append_values(3, SCRAPED_AT)
+        self.assertEqual(list(batch), self.rows[:1])
+
+        batch.clear()
+        self.assertEqual((len(batch), list(batch)), (0, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
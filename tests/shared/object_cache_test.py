@@ -0,0 +1,110 @@
+import unittest
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+from shared.object_cache import CacheMiss, ObjectCache
+
+
+class MemoryBucket:
+    """get_object of a boto3 S3 client over a dict, recording every call."""
+
+    def __init__(self):
+        self.objects = {}
+        self.get_calls = []
+
+    def put(self, key: str, body: bytes):
+        self.objects[key] = body
+
+    def etag(self, key: str) -> str:
+        return f'"{hashlib.md5(self.objects[key]).hexdigest()}"'
+
+    def get_object(self, Bucket, Key):
+        self.get_calls.append(Key)
+        return {"Body": io.BytesIO(self.objects[Key]), "ETag": self.etag(Key)}
+
+
+class ObjectCache_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.bucket = MemoryBucket()
+        self.cache_dir = root / "cache"
+        self.cache = ObjectCache(self.cache_dir, max_bytes=700)
+        for n in range(3):
+            self.bucket.put(f"Jumbo/page-{n}.html", bytes([n]) * 300)
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def etag(self, key):
+        return self.bucket.etag(key)
+
+
+    def test_second_read_is_served_from_disk(self):
+        key = "Jumbo/page-0.html"
+        first = self.cache.get(self.bucket, "b", key, self.etag(key))
+        second = self.cache.get(self.bucket, "b", key, self.etag(key))
+        self.assertEqual(first, second)
+        self.assertEqual(self.bucket.get_calls, [key])
+        self.assertEqual(self.cache.read("b", key)[:3], b"\x00\x00\x00")
+
+
+    def test_new_etag_is_fetched_again(self):
+        key = "Jumbo/page-1.html"
+        self.cache.get(self.bucket, "b", key, self.etag(key))
+        self.bucket.put(key, b"changed")
+        self.assertEqual(self.cache.get(self.bucket, "b", key, self.etag(key)), b"changed")
+        self.assertEqual(self.bucket.get_calls, [key, key])
+
+
+    def test_least_recently_read_is_evicted(self):
+        keys = [f"Jumbo/page-{n}.html" for n in range(3)]
+        self.cache.get(self.bucket, "b", keys[0], self.etag(keys[0]))
+        self.cache.get(self.bucket, "b", keys[1], self.etag(keys[1]))
+        self.cache.get(self.bucket, "b", keys[0], self.etag(keys[0]))
+        self.cache.get(self.bucket, "b", keys[2], self.etag(keys[2]))
+        self.assertEqual(self.cache.bytes, 600)
+
+        # Order and size survive a restart
+        reopened = ObjectCache(self.cache_dir, max_bytes=700)
+        self.assertEqual(reopened.bytes, 600)
+        self.assertIsNone(reopened.read("b", keys[1], self.etag(keys[1])))
+        self.assertEqual(sorted(obj["Key"] for obj in reopened.list_objects("b", "Jumbo/")), [keys[0], keys[2]])
+
+
+    def test_keys_cannot_leave_the_cache_directory(self):
+        outside = Path(self.tmp.name) / "outside"
+        for key in ["../outside/x", "a/../../../outside/x", "/x", "a//b", "./x", "a/%2E%2E/x", "a/..%2Fx"]:
+            self.bucket.put(key, b"body")
+            self.assertEqual(self.cache.get(self.bucket, "b", key, self.etag(key)), b"body")
+            self.assertEqual(self.cache.get(self.bucket, "..", key, self.etag(key)), b"body")
+        self.assertFalse(outside.exists())
+        cached = [path.relative_to(self.cache_dir) for path in self.cache_dir.rglob("*.obj")]
+        self.assertEqual(len(cached), 2)    # the quoted %2E%2E and ..%2F keys are cached inside
+        # Uncacheable keys are fetched every time, and are a miss offline
+        self.assertEqual(self.bucket.get_calls.count("../outside/x"), 2)
+        with self.assertRaises(CacheMiss):
+            ObjectCache(self.cache_dir, offline=True).get(None, "b", "../outside/x")
+        self.assertEqual(sorted(obj["Key"] for obj in self.cache.list_objects("b")), ["a/%2E%2E/x", "a/..%2Fx"])
+        self.assertEqual(list(self.cache.list_objects("..")), [])
+
+
+    def test_offline_fails_fast_on_a_miss(self):
+        key = "Jumbo/page-2.html"
+        self.cache.get(self.bucket, "b", key)
+        offline = ObjectCache(self.cache_dir, offline=True)
+        self.assertEqual(offline.get(None, "b", key), bytes([2]) * 300)
+        with self.assertRaises(CacheMiss):
+            offline.get(None, "b", "Jumbo/page-0.html")
+        self.assertEqual(self.bucket.get_calls, [key])
+        listed = list(offline.list_objects("b"))
+        self.assertEqual([(obj["Key"], obj["ETag"], obj["Size"]) for obj in listed], [(key, self.etag(key), 300)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import io
+import tempfile
+import threading
+from pathlib import Path
+from shared.page_archive import (ArchiveWriter, LocalShard, ShardIndex, compress, decompress,
+                                 read_local_archive, s3_read)
+
+
+class RangeOnlyS3:
+    """Serves ranged GETs from a local file, like S3 does for a shard object."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def get_object(self, Bucket, Key, Range):
+        first, last = Range.removeprefix("bytes=").split("-")
+        return {"Body": io.BytesIO(self.path.read_bytes()[int(first):int(last) + 1])}
+
+
+class PageArchive_test(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.pages = {f"Jumbo/cat-{n % 3}/page-{n}.html": (f"<html>{n}</html>" * (50 + n)).encode()
+                      for n in range(20)}
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+    def write_archive(self, max_shard_bytes=10**9):
+        closed = []
+        writer = ArchiveWriter(self.dir, "Jumbo-test", codec="gzip", max_shard_bytes=max_shard_bytes,
+                               on_shard_closed=lambda shard, index_path, index: closed.append((shard, index)))
+        for key, content in self.pages.items():
+            writer.add(key, content)
+        writer.close()
+        return closed
+
+
+    def test_round_trip_across_shards(self):
+        closed = self.write_archive(max_shard_bytes=300)
+        self.assertGreater(len(closed), 1)
+        self.assertEqual(dict((entry.key, page) for entry, page in read_local_archive(self.dir)), self.pages)
+        # Compressed shards are much smaller than the raw pages
+        stored = sum(shard.stat().st_size for shard, _ in closed)
+        self.assertLess(stored, sum(map(len, self.pages.values())) / 5)
+
+
+    def test_index_round_trip(self):
+        (shard, index), = self.write_archive()
+        loaded = ShardIndex.from_json((self.dir / "Jumbo-test-0001.idx.json").read_bytes())
+        self.assertEqual(loaded, index)
+        self.assertEqual(loaded.shard, shard.name)
+
+
+    def test_mmap_and_range_reads(self):
+        (shard_path, index), = self.write_archive()
+        shard = LocalShard(shard_path, index.codec)
+        s3 = RangeOnlyS3(shard_path)
+        for entry in index.entries:
+            self.assertEqual(shard.read(entry), self.pages[entry.key])
+            self.assertEqual(s3_read(s3, "bucket", "Jumbo/_archive/x.pages", entry, index.codec),
+                             self.pages[entry.key])
+        shard.close()
+
+
+    def test_codecs(self):
+        self.assertEqual(decompress(compress(b"abc" * 100, "gzip"), "gzip"), b"abc" * 100)
+        with self.assertRaises(ValueError):
+            compress(b"abc", "lz4")
+
+
+
+    def test_upload_does_not_block_other_writers(self):
+        uploading = threading.Event()
+        release = threading.Event()
+        closed = []
+
+        def slow_upload(shard, index_path, index):
+            closed.append(shard.name)
+            if len(closed) == 1:
+                uploading.set()
+                release.wait(5)
+
+        writer = ArchiveWriter(self.dir, "Jumbo-test", codec="gzip", max_shard_bytes=1, on_shard_closed=slow_upload)
+        uploader = threading.Thread(target=writer.add, args=("Jumbo/a.html", b"<html>a</html>"))
+        uploader.start()
+        self.assertTrue(uploading.wait(5))
+        # The first shard is still uploading, the next page goes into a new shard meanwhile
+        other = threading.Thread(target=writer.add, args=("Jumbo/b.html", b"<html>b</html>"))
+        other.start()
+        other.join(5)
+        self.assertFalse(other.is_alive())
+        release.set()
+        uploader.join(5)
+        writer.close()
+        self.assertEqual(sorted(closed), ["Jumbo-test-0001.pages", "Jumbo-test-0002.pages"])
+
+
+if __name__ == "__main__":
+    unittest.main()
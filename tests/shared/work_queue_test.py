@@ -0,0 +1,109 @@
+import unittest
+import logging
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from shared.work_queue import DONE, FAILED, LEASED, PENDING, WorkQueue, run_worker
+
+
+def square(payload: dict) -> dict:
+    marker = payload.get("fail_once")
+    if marker and not Path(marker).exists():
+        Path(marker).touch()
+        raise RuntimeError("flaky")
+    time.sleep(0.01)
+    return {"square": payload["n"] ** 2}
+
+
+def _work_process(path: str, owner: str):
+    logging.disable(logging.CRITICAL)
+    queue = WorkQueue(path, lease_seconds=5, retry_delay=0)
+    run_worker(queue, "test", square, owner=owner, poll_seconds=0.05)
+    queue.close()
+
+
+class WorkQueue_test(unittest.TestCase):
+
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "queue.sqlite"
+
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+    def test_submit_is_idempotent(self):
+        queue = WorkQueue(self.path)
+        self.assertEqual(queue.submit("test", [("a", {"n": 1}), ("b", {"n": 2})]), 2)
+        self.assertEqual(queue.submit("test", [("a", {"n": 1}), ("c", {"n": 3})]), 1)
+        self.assertEqual(queue.counts("test"), {PENDING: 3, LEASED: 0, DONE: 0, FAILED: 0})
+        self.assertEqual(queue.counts("other")[PENDING], 0)
+        queue.close()
+
+
+    def test_expired_lease_is_taken_over(self):
+        queue = WorkQueue(self.path, lease_seconds=0.1)
+        queue.submit("test", [("a", {"n": 1})])
+        first = queue.lease("test", "w1")
+        self.assertIsNone(queue.lease("test", "w2"))
+        self.assertTrue(queue.heartbeat(first))
+
+        time.sleep(0.15)
+        second = queue.lease("test", "w2")
+        self.assertEqual((second.key, second.attempt), ("a", 2))
+        # The first worker lost its lease and cannot finish or renew the unit any more
+        self.assertFalse(queue.heartbeat(first))
+        self.assertFalse(queue.complete(first, {"square": 1}))
+        self.assertTrue(queue.complete(second, {"square": 1}))
+        self.assertTrue(queue.is_drained("test"))
+        queue.close()
+
+
+    def test_failed_units_retry_until_max_attempts(self):
+        queue = WorkQueue(self.path, max_attempts=2, retry_delay=0.05)
+        queue.submit("test", [("a", {"n": 1})])
+        unit = queue.lease("test", "w1")
+        self.assertTrue(queue.fail(unit, "RuntimeError: boom"))
+        # Backing off before the retry
+        self.assertIsNone(queue.lease("test", "w1"))
+        time.sleep(0.06)
+        unit = queue.lease("test", "w1")
+        queue.fail(unit, "RuntimeError: boom")
+        self.assertEqual(queue.units("test")[0]["status"], FAILED)
+        self.assertEqual(queue.units("test")[0]["attempts"], 2)
+        self.assertTrue(queue.is_drained("test"))
+
+        self.assertEqual(queue.submit("test", [("a", {"n": 1})], reset=True), 1)
+        self.assertEqual(queue.counts("test")[PENDING], 1)
+        queue.close()
+
+
+    def test_worker_processes_share_the_queue(self):
+        queue = WorkQueue(self.path)
+        units = [(f"unit-{n}", {"n": n}) for n in range(40)]
+        units[7][1]["fail_once"] = str(Path(self.tmp.name) / "failed-once")
+        queue.submit("test", units)
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=_work_process, args=(str(self.path), f"worker-{n}")) for n in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+
+        rows = queue.units("test")
+        self.assertEqual([row["status"] for row in rows], [DONE] * 40)
+        self.assertEqual([row["result"] for row in rows], [f'{{"square": {n * n}}}' for n in range(40)])
+        self.assertEqual(rows[7]["attempts"], 2)
+        self.assertGreater(len({row["lease_owner"] for row in rows}), 1)
+        queue.close()
+
+
+if __name__ == "__main__":
+    unittest.main()